@@ -0,0 +1,113 @@
+# Live port discovery: keep one session open while devices are plugged into each port in turn
+#
+# A session is fed either full topology snapshots (polling usbdump.exe) or port events (a subscription, or the
+# simulated source used for testing on machines without usbdump.exe). It remembers every port that ever had a device,
+# which is what portbudget needs as history, so a "plug a stick into every port" pass takes one session instead of a
+# full rescan per port.
+import subprocess
+import threading
+from typing import NamedTuple, Optional
+
+from Scripts import usbdump
+
+
+class PortState(NamedTuple):
+    status: str
+    devices: tuple
+
+    @property
+    def active(self):
+        return self.status == "DeviceConnected"
+
+
+class PortEvent(NamedTuple):
+    # (hub_name, port index); state is None when the port disappeared (hub unplugged)
+    key: tuple
+    state: Optional[PortState]
+
+
+class PortChange(NamedTuple):
+    key: tuple
+    before: Optional[PortState]
+    after: Optional[PortState]
+
+
+def get_port_state(port):
+    return PortState(port.status, tuple(device.get("name") or "" for device in port.devices if "error" not in device))
+
+
+def get_port_states(snapshot):
+    return {(hub["hub_name"], port.index): get_port_state(port) for hub in snapshot.hubs.values() for port in hub["ports"]}
+
+
+class DiscoverySession:
+    def __init__(self):
+        self.states = {}
+        # key -> names of every device seen on that port
+        self.seen = {}
+        self.snapshot = None
+
+    @property
+    def history(self):
+        return frozenset(self.seen)
+
+    def apply_events(self, events):
+        # O(len(events)): only the ports that changed are touched
+        changes = []
+        for event in events:
+            before = self.states.get(event.key)
+            if before == event.state:
+                continue
+            if event.state is None:
+                del self.states[event.key]
+            else:
+                self.states[event.key] = event.state
+                if event.state.active:
+                    self.seen.setdefault(event.key, set()).update(event.state.devices)
+            changes.append(PortChange(event.key, before, event.state))
+        return changes
+
+    def update(self, snapshot):
+        # A polled snapshot is turned into events for the ports whose state differs from the previous one
+        states = get_port_states(snapshot)
+        events = [PortEvent(key, state) for key, state in states.items() if self.states.get(key) != state]
+        events += [PortEvent(key, None) for key in self.states.keys() - states.keys()]
+        self.snapshot = snapshot
+        return self.apply_events(events)
+
+    def feed(self, item):
+        return self.update(item) if isinstance(item, usbdump.UsbSnapshot) else self.apply_events(item)
+
+    def run(self, source, callback=None, stop_event=None):
+        # source yields snapshots or batches of PortEvent; callback gets the changes of every item
+        for item in source:
+            changes = self.feed(item)
+            if changes and callback:
+                callback(changes)
+            if stop_event is not None and stop_event.is_set():
+                break
+        return self.history
+
+
+def poll_usbdump(usbdump_path, interval=1.0, stop_event=None, cwd=None):
+    # Re-runs usbdump.exe every interval seconds until stop_event is set
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        with subprocess.Popen(usbdump_path, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as process:
+            snapshot = usbdump.UsbTopology().parse(usbdump.iter_usbdump(process.stdout))
+        yield snapshot
+        stop_event.wait(interval)
+
+
+def simulate_plug_session(snapshot, device_name="USB Stick", ports=None):
+    # Plugs a device into every free port of the snapshot's controllers and unplugs it again, one event at a time
+    yield snapshot
+    for controller in snapshot.controllers:
+        for port in controller["ports"]:
+            key = (controller["hub_name"], port.index)
+            if ports is not None and key not in ports:
+                continue
+            if port.status != "NoDeviceConnected":
+                continue
+            yield [PortEvent(key, PortState("DeviceConnected", (device_name,)))]
+            yield [PortEvent(key, get_port_state(port))]
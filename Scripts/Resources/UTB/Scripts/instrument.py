@@ -0,0 +1,108 @@
+# Structured timing events for a USB map run
+#
+# A Recorder keeps one event per finished stage (dump, parse, guess, build, write, copy) with its duration and a few
+# counters. Nothing here blocks or touches a UI: listeners are called on the recording thread and are expected to hand
+# the event off (the customizer puts it on a queue that the Tk thread drains). A run exports as JSON, so timings from
+# different machines can be compared.
+import json
+import platform
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import NamedTuple, Optional
+
+from Scripts._build import BUILD
+
+
+class StageEvent(NamedTuple):
+    seq: int
+    stage: str
+    # "end" for a finished stage, "error" when it raised, "info" for a plain message
+    kind: str
+    # Seconds since the recorder was created
+    offset: float
+    duration: Optional[float]
+    data: dict
+
+
+class TimedStream:
+    # Wraps a binary stream and adds up the time spent blocked in read(), i.e. waiting on usbdump.exe
+    def __init__(self, stream):
+        self.stream = stream
+        self.elapsed = 0.0
+        self.bytes = 0
+
+    def read(self, size=-1):
+        start = time.perf_counter()
+        data = self.stream.read(size)
+        self.elapsed += time.perf_counter() - start
+        self.bytes += len(data)
+        return data
+
+
+class Recorder:
+    def __init__(self, listeners=()):
+        self.run_id = uuid.uuid4().hex
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self.listeners = list(listeners)
+        self._events = []
+        self._lock = threading.Lock()
+
+    @property
+    def events(self):
+        with self._lock:
+            return list(self._events)
+
+    def emit(self, stage, kind, duration=None, **data):
+        with self._lock:
+            event = StageEvent(len(self._events), stage, kind, time.perf_counter() - self._start, duration, data)
+            self._events.append(event)
+        for listener in self.listeners:
+            listener(event)
+        return event
+
+    def record(self, stage, duration, **data):
+        # For durations measured elsewhere (another process, a TimedStream)
+        return self.emit(stage, "end", duration, **data)
+
+    def info(self, stage, message, **data):
+        return self.emit(stage, "info", message=message, **data)
+
+    @contextmanager
+    def stage(self, name, **data):
+        # The yielded dict can be filled in with counters while the stage runs; they end up in the event
+        start = time.perf_counter()
+        try:
+            yield data
+        except BaseException as e:
+            self.emit(name, "error", time.perf_counter() - start, error=f"{type(e).__name__}: {e}", **data)
+            raise
+        self.emit(name, "end", time.perf_counter() - start, **data)
+
+    def durations(self):
+        totals = {}
+        for event in self.events:
+            if event.duration is not None:
+                totals[event.stage] = totals.get(event.stage, 0.0) + event.duration
+        return totals
+
+    def to_dict(self):
+        events = self.events
+        return {
+            "run": self.run_id,
+            "build": BUILD,
+            "started": self.started,
+            "machine": {"platform": platform.platform(), "processor": platform.processor(), "python": platform.python_version()},
+            "durations": self.durations(),
+            "events": [event._asdict() for event in events],
+        }
+
+    def export(self, path):
+        with open(path, "w", encoding="utf-8") as export_file:
+            json.dump(self.to_dict(), export_file, indent=2, ensure_ascii=False, default=str)
+
+
+# Used by shared.time_it and shared.debug, which have no run of their own
+default_recorder = Recorder()
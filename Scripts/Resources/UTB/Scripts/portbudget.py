@@ -0,0 +1,174 @@
+# Port selection under macOS's 15 port per controller limit
+#
+# Every physical connector is one unit: a USB 2 port together with its USB 3 companion, or a lone port. Units are
+# scored by the policy (connected-device history, internal, Type-C, USB 3) and the best set that fits in the limit is
+# picked with a 0/1 knapsack. The limit is tiny, so the exact search is O(units * limit) and is the default.
+#
+# Benchmark (from the UTB directory):
+#   python -m Scripts.portbudget --benchmark 2000
+import argparse
+import random
+import sys
+import time
+from typing import NamedTuple
+
+from Scripts import shared
+
+
+class BudgetPolicy(NamedTuple):
+    limit: int = 15
+    # Score of a connector, summed over everything that applies to it
+    used: int = 50
+    internal: int = 40
+    type_c: int = 20
+    usb3: int = 10
+    base: int = 1
+    # "exact" or "greedy"
+    search: str = "exact"
+
+
+DEFAULT_POLICY = BudgetPolicy()
+
+
+class PortUnit(NamedTuple):
+    ports: tuple
+    value: int
+
+    @property
+    def cost(self):
+        return len(self.ports)
+
+    @property
+    def index(self):
+        return self.ports[0].index
+
+
+INTERNAL = int(shared.USBPhysicalPortTypes.Internal)
+TYPE_C = int(shared.USBPhysicalPortTypes.USB3TypeC_WithSwitch)
+
+
+def is_used(hub_name, port, history):
+    return port.status == "DeviceConnected" or (hub_name, port.index) in history
+
+
+def get_port_units(controller, history=frozenset(), policy=DEFAULT_POLICY):
+    # Only ports with a known type can go in the map; see usbmap.is_mappable
+    hub_name = controller["hub_name"]
+    ports = [port for port in controller["ports"] if port.connector is not None]
+    by_index = {port.index: port for port in ports}
+    # Often only one side of a pair names the other (e.g. the USB 3 port points at its USB 2 port but not back)
+    partners = {}
+    for port in ports:
+        if port.companion_hub == hub_name and port.companion_port in by_index and port.companion_port != port.index:
+            partners.setdefault(port.index, port.companion_port)
+            partners.setdefault(port.companion_port, port.index)
+    units = []
+    seen = set()
+    for port in ports:
+        if port.index in seen:
+            continue
+        members = [port]
+        companion = by_index.get(partners.get(port.index))
+        if companion is not None and companion.index not in seen:
+            members.append(companion)
+        seen.update(member.index for member in members)
+
+        connectors = [member.connector for member in members]
+        value = policy.base
+        if any(is_used(hub_name, member, history) for member in members):
+            value += policy.used
+        if INTERNAL in connectors:
+            value += policy.internal
+        if any(member.type_c for member in members) or TYPE_C in connectors:
+            value += policy.type_c
+        if any(shared.SPEED_SUPER <= member.speed < shared.SPEED_UNKNOWN for member in members):
+            value += policy.usb3
+        units.append(PortUnit(tuple(sorted(members, key=lambda i: i.index)), value))
+    return units
+
+
+def select_exact(units, limit):
+    # best[c] = (value, chosen unit positions) using at most c ports. Units are visited in port order and ties keep
+    # the earlier choice, so the result is deterministic.
+    best = [(0, ())] * (limit + 1)
+    for position, unit in enumerate(units):
+        if unit.cost > limit:
+            continue
+        for capacity in range(limit, unit.cost - 1, -1):
+            value, chosen = best[capacity - unit.cost]
+            if value + unit.value > best[capacity][0]:
+                best[capacity] = (value + unit.value, chosen + (position,))
+    return [units[i] for i in best[limit][1]]
+
+
+def select_greedy(units, limit):
+    chosen = []
+    remaining = limit
+    for unit in sorted(units, key=lambda i: (-i.value / i.cost, i.index)):
+        if unit.cost <= remaining:
+            chosen.append(unit)
+            remaining -= unit.cost
+    return chosen
+
+
+def select_units(controller, history=frozenset(), policy=DEFAULT_POLICY):
+    units = sorted(get_port_units(controller, history, policy), key=lambda i: i.index)
+    return select_greedy(units, policy.limit) if policy.search == "greedy" else select_exact(units, policy.limit)
+
+
+def select_ports(controller, history=frozenset(), policy=DEFAULT_POLICY):
+    # Returns the ports to keep, in port order. history holds (hub_name, port index) pairs that ever had a device.
+    return sorted((port for unit in select_units(controller, history, policy) for port in unit.ports), key=lambda i: i.index)
+
+
+def make_synthetic_controller(port_count, seed=0):
+    rnd = random.Random(seed)
+    hub_name = "SYNTHETIC"
+    half = port_count // 2
+    ports = []
+    for index in range(1, port_count + 1):
+        usb3 = index > half
+        companion = index - half if usb3 else index + half
+        has_companion = rnd.random() < 0.7 and companion <= port_count
+        ports.append(
+            shared.PortRecord(
+                index,
+                "DeviceConnected" if rnd.random() < 0.2 else "NoDeviceConnected",
+                speed=shared.SPEED_SUPER if usb3 else shared.SPEED_HIGH,
+                guessed=int(rnd.choice(list(shared.USBPhysicalPortTypes))),
+                companion_port=companion if has_companion else 0,
+                companion_hub=hub_name,
+            )
+        )
+    return {"hub_name": hub_name, "ports": ports}
+
+
+def benchmark(port_count, runs=5):
+    results = {}
+    for search in ("exact", "greedy"):
+        policy = DEFAULT_POLICY._replace(search=search)
+        elapsed = 0
+        total = 0
+        for seed in range(runs):
+            controller = make_synthetic_controller(port_count, seed)
+            start = time.perf_counter()
+            units = select_units(controller, policy=policy)
+            elapsed += time.perf_counter() - start
+            total += sum(unit.value for unit in units)
+        results[search] = (elapsed / runs, total / runs)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pick the ports to keep under the per-controller port limit")
+    parser.add_argument("--benchmark", type=int, metavar="PORTS", required=True, help="ports per synthetic controller")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    for search, (elapsed, value) in benchmark(args.benchmark, args.runs).items():
+        print(f"{search}: {elapsed * 1000:.2f} ms per controller, average score {value:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
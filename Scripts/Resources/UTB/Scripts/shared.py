@@ -1,10 +1,10 @@
 # pylint: disable=invalid-name
 import enum
 import sys
-from time import time
-from typing import Callable
+from typing import Callable, NamedTuple, Optional
 from pathlib import Path
 
+from Scripts import instrument
 from Scripts._build import BUILD
 
 VERSION = "0.2"
@@ -28,7 +28,7 @@ class USBDeviceSpeeds(enum.IntEnum):
     Unknown = 9999
 
     def __str__(self) -> str:
-        return _usb_protocol_names[self]
+        return usb_speed_names[self]
 
     def __bool__(self) -> bool:
         return True
@@ -49,7 +49,7 @@ class USBPhysicalPortTypes(enum.IntEnum):
     Internal = 255
 
     def __str__(self) -> str:
-        return _usb_physical_port_types[self]
+        return usb_port_type_names[self]
 
     def __bool__(self) -> bool:
         return True
@@ -63,7 +63,7 @@ class USBControllerTypes(enum.IntEnum):
     Unknown = 9999
 
     def __str__(self) -> str:
-        return _usb_controller_types[self]
+        return usb_controller_type_names[self]
 
     def __bool__(self) -> bool:
         return True
@@ -114,19 +114,107 @@ _usb_protocol_names_short = {
 
 _usb_protocol_names = _usb_protocol_names_short if _short_names else _usb_protocol_names_full
 
+# Display names keyed by the plain integer codes, built once. Port records only store the codes; these are used when
+# something is actually shown, so hot paths never construct enum members or go through __str__.
+usb_speed_names = {int(k): v for k, v in _usb_protocol_names.items()}
+usb_port_type_names = {int(k): v for k, v in _usb_physical_port_types.items()}
+usb_controller_type_names = {int(k): v for k, v in _usb_controller_types.items()}
+
+SPEED_LOW = int(USBDeviceSpeeds.LowSpeed)
+SPEED_FULL = int(USBDeviceSpeeds.FullSpeed)
+SPEED_HIGH = int(USBDeviceSpeeds.HighSpeed)
+SPEED_SUPER = int(USBDeviceSpeeds.SuperSpeed)
+SPEED_SUPER_PLUS = int(USBDeviceSpeeds.SuperSpeedPlus)
+SPEED_UNKNOWN = int(USBDeviceSpeeds.Unknown)
+
+
+def speed_name(code):
+    return usb_speed_names.get(code, usb_speed_names[SPEED_UNKNOWN])
+
+
+def port_type_name(code):
+    return "Unknown" if code is None else usb_port_type_names.get(code, "Unknown")
+
+
+class PortRecord(NamedTuple):
+    # One port of a serialized hub. speed, type and guessed hold the integer codes of USBDeviceSpeeds and
+    # USBPhysicalPortTypes (type/guessed are None when unset). Records are immutable; use _replace.
+    index: int
+    status: str
+    speed: int = SPEED_UNKNOWN
+    type: Optional[int] = None
+    guessed: Optional[int] = None
+    comment: Optional[str] = None
+    companion_port: int = 0
+    companion_hub: str = ""
+    multiple_companions: bool = False
+    type_c: bool = False
+    user_connectable: bool = True
+    devices: tuple = ()
+
+    @property
+    def name(self):
+        return f"Port {self.index}"
+
+    @property
+    def connected(self):
+        # False for ports whose status couldn't be read (overcurrent etc.)
+        return self.status.endswith("DeviceConnected")
+
+    @property
+    def connector(self):
+        # A type set by hand always wins over the guess
+        return self.type if self.type is not None else self.guessed
+
+    def to_dict(self):
+        # The dict layout serialize_hub used to produce, for JSON output and older callers
+        port_info = {
+            "index": self.index,
+            "comment": self.comment,
+            "class": self.speed,
+            "status": self.status,
+            "type": self.type,
+            "guessed": self.guessed,
+            "devices": list(self.devices),
+            "name": self.name,
+        }
+        if self.connected:
+            port_info["companion_info"] = {"port": self.companion_port, "hub": self.companion_hub, "multiple_companions": self.multiple_companions}
+            port_info["type_c"] = self.type_c
+            port_info["user_connectable"] = self.user_connectable
+        return port_info
+
+    def __getitem__(self, key):
+        # Also readable with the old dict keys
+        if not isinstance(key, str):
+            return tuple.__getitem__(self, key)
+        if key == "class":
+            return self.speed
+        if key == "companion_info":
+            return {"port": self.companion_port, "hub": self.companion_hub, "multiple_companions": self.multiple_companions}
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
 
 def time_it(func: Callable, text: str, *args, **kwargs):
-    start = time()
-    result = func(*args, **kwargs)
-    end = time()
-    input(f"{text} took {end - start}, press enter to continue".strip())
-    return result
+    # Recorded as a stage of instrument.default_recorder instead of waiting for enter
+    with instrument.default_recorder.stage(text):
+        return func(*args, **kwargs)
 
 debugging = False
 
 def debug(str):
     if debugging:
-        input(f"DEBUG: {str}\nPress enter to continue")
+        instrument.default_recorder.info("debug", str)
+        print(f"DEBUG: {str}", file=sys.stderr)
 
 test_mode = False and debugging
 if test_mode:
@@ -1,12 +1,17 @@
 # USBDump Conversion Interface
+import codecs
 import itertools
 import json
+import re
 import subprocess
 import sys
-from operator import itemgetter
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from operator import attrgetter
 from pathlib import Path
+from typing import NamedTuple
 
-from Scripts import shared
+from Scripts import instrument, shared
 
 # input_path = input("File path: ")
 # if input_path:
@@ -16,21 +21,66 @@ from Scripts import shared
 # info = json.load(file_path.open())
 
 
-hub_map = {}
+class FrozenDict(dict):
+    """Read-only dict used for snapshot results. Still a dict, so it serializes to JSON as-is."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("USB topology snapshots are read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def freeze(obj, memo=None):
+    # memo keeps objects shared between the controller list and the hub index shared in the snapshot too
+    if memo is None:
+        memo = {}
+    if not isinstance(obj, (dict, list, shared.PortRecord)):
+        return obj
+    if id(obj) not in memo:
+        if isinstance(obj, dict):
+            memo[id(obj)] = FrozenDict((key, freeze(value, memo)) for key, value in obj.items())
+        elif isinstance(obj, shared.PortRecord):
+            # The record itself is immutable; only the device dicts inside need freezing
+            memo[id(obj)] = obj._replace(devices=tuple(freeze(i, memo) for i in obj.devices)) if obj.devices else obj
+        else:
+            memo[id(obj)] = tuple(freeze(i, memo) for i in obj)
+    return memo[id(obj)]
+
+
+def thaw(obj):
+    # Back to plain dicts and lists (port records included), e.g. for JSON output
+    if isinstance(obj, shared.PortRecord):
+        return thaw(obj.to_dict())
+    if isinstance(obj, dict):
+        return {key: thaw(value) for key, value in obj.items()}
+    if isinstance(obj, (tuple, list)):
+        return [thaw(i) for i in obj]
+    return obj
 
 
 def get_port_type(port):
+    # Integer speed code, see shared.USBDeviceSpeeds
     if not port["ConnectionInfoV2"]:
-        return shared.USBDeviceSpeeds.Unknown
+        return shared.SPEED_UNKNOWN
     supported_usb_protocols = port["ConnectionInfoV2"]["SupportedUsbProtocols"]
     if supported_usb_protocols["Usb300"]:
-        return shared.USBDeviceSpeeds.SuperSpeed
+        return shared.SPEED_SUPER
     elif supported_usb_protocols["Usb200"] and supported_usb_protocols["Usb110"]:
-        return shared.USBDeviceSpeeds.HighSpeed
+        return shared.SPEED_HIGH
     elif supported_usb_protocols["Usb110"]:
-        return shared.USBDeviceSpeeds.FullSpeed
+        return shared.SPEED_FULL
     else:
-        return shared.USBDeviceSpeeds.Unknown
+        return shared.SPEED_UNKNOWN
 
 
 def get_device_speed(port):
@@ -98,154 +148,293 @@ def get_hub_type(port):
 #     return controllers
 
 
-def get_hub_by_name(name):
-    return hub_map.get(name)
-
-# TODO: Figure out how to deal with the hub name not matching
-def get_companion_port(port):
-    return ([i for i in hub_map.get(port["companion_info"]["hub"], {"ports": []})["ports"] if i["index"] == port["companion_info"]["port"]] or [None])[0]
-
-
-def guess_ports():
-    for hub in hub_map:
-        for port in hub_map[hub]["ports"]:
-            if not port["status"].endswith("DeviceConnected"):
-                # we don't have info. anything else is going to error
-                port["guessed"] = None
-            elif port["type_c"] or port["companion_info"]["port"] and get_companion_port(port) and get_companion_port(port).get("type_c", None):
-                port["guessed"] = shared.USBPhysicalPortTypes.USB3TypeC_WithSwitch
-            elif not port["user_connectable"]:
-                port["guessed"] = shared.USBPhysicalPortTypes.Internal
-            elif (
-                port["class"] == shared.USBDeviceSpeeds.SuperSpeed
-                and port["companion_info"]["port"]
-                and get_companion_port(port)
-                and get_companion_port(port)["class"] == shared.USBDeviceSpeeds.HighSpeed
-                or port["class"] == shared.USBDeviceSpeeds.HighSpeed
-                and port["companion_info"]["port"]
-                and get_companion_port(port)
-                and get_companion_port(port)["class"] == shared.USBDeviceSpeeds.SuperSpeed
-            ):
-                port["guessed"] = shared.USBPhysicalPortTypes.USB3TypeA
-            elif port["class"] == shared.USBDeviceSpeeds.SuperSpeed and not port["companion_info"]["port"]:
-                port["guessed"] = shared.USBPhysicalPortTypes.Internal
-            else:
-                port["guessed"] = shared.USBPhysicalPortTypes.USBTypeA
-
-
-def serialize_hub(hub):
-    hub_info = {
-        "hub_name": hub["HubName"],
-        # "class": get_hub_type(hub),
-        "port_count": hub["HubInfo"]["HubInformation"]["HubDescriptor"]["bNumberOfPorts"],
-        # "highest_port_number": hub["HubInfoEx"]["HighestPortNumber"],
-        "ports": [],
-    }
-
-    # HubPorts
-    hub_ports = hub["HubPorts"]
-    if hub_ports:  # For some reason, this is sometimes null? Botched driver?
-        for i, port in enumerate(hub_ports):
-            if not port:
-                continue
-            port_info = {
-                "index": (port.get("PortConnectorProps") or {}).get("ConnectionIndex")
-                or (port.get("ConnectionInfo") or {}).get("ConnectionIndex")
-                or (port.get("ConnectionInfoV2") or {}).get("ConnectionIndex")
-                or i + 1,
-                "comment": None,
-                "class": shared.USBDeviceSpeeds.Unknown,
-                "status": port["ConnectionInfo"]["ConnectionStatus"],
-                "type": None,
-                "guessed": None,
-                "devices": [],
-            }
-            port_info["name"] = f"Port {port_info['index']}"
-
-            friendly_error = {"DeviceCausedOvercurrent": "Device connected to port pulled too much current."}
-
-            if not port_info["status"].endswith("DeviceConnected"):
-                # shared.debug(f"Device connected to port {port_info['index']} errored. Please unplug or connect a different device.")
-                port_info["devices"] = [{"error": friendly_error.get(port_info["status"], True)}]
-                hub_info["ports"].append(port_info)
+class UsbSnapshot(NamedTuple):
+    # Controllers (with their root hub ports merged in) and every hub by name, including external hubs
+    controllers: tuple
+    hubs: FrozenDict
+
+    def get_hub_by_name(self, name):
+        return self.hubs.get(name)
+
+
+class UsbTopology:
+    # Owns the hub and port index for one dump, so several dumps can be parsed side by side
+
+    def __init__(self):
+        self.hubs = {}
+        # (hub_name, port index) -> port, filled by serialize_hub so companion lookups are O(1)
+        self.ports = {}
+
+    def get_hub_by_name(self, name):
+        return self.hubs.get(name)
+
+    # TODO: Figure out how to deal with the hub name not matching
+    def get_companion_port(self, port):
+        if not port.companion_port:
+            return None
+        return self.ports.get((port.companion_hub, port.companion_port))
+
+    def guess_port(self, port):
+        if not port.connected:
+            # we don't have info. anything else is going to error
+            return None
+
+        # Resolve the companion once through the port index instead of rescanning the hub for every check
+        companion = self.get_companion_port(port)
+        if port.type_c or companion and companion.type_c:
+            return shared.USBPhysicalPortTypes.USB3TypeC_WithSwitch
+        elif not port.user_connectable:
+            return shared.USBPhysicalPortTypes.Internal
+        elif (
+            companion
+            and (
+                port.speed == shared.SPEED_SUPER
+                and companion.speed == shared.SPEED_HIGH
+                or port.speed == shared.SPEED_HIGH
+                and companion.speed == shared.SPEED_SUPER
+            )
+        ):
+            return shared.USBPhysicalPortTypes.USB3TypeA
+        elif port.speed == shared.SPEED_SUPER and not port.companion_port:
+            return shared.USBPhysicalPortTypes.Internal
+        else:
+            return shared.USBPhysicalPortTypes.USBTypeA
+
+    def guess_ports(self):
+        # Guesses read the companions' original records, so all of them are computed before any record is replaced
+        guesses = [(hub, i, self.guess_port(port)) for hub in self.hubs.values() for i, port in enumerate(hub["ports"])]
+        for hub, i, guessed in guesses:
+            port = hub["ports"][i]._replace(guessed=None if guessed is None else int(guessed))
+            hub["ports"][i] = port
+            self.ports[(hub["hub_name"], port.index)] = port
+
+    def serialize_hub(self, hub):
+        hub_info = {
+            "hub_name": hub["HubName"],
+            # "class": get_hub_type(hub),
+            "port_count": hub["HubInfo"]["HubInformation"]["HubDescriptor"]["bNumberOfPorts"],
+            # "highest_port_number": hub["HubInfoEx"]["HighestPortNumber"],
+            "ports": [],
+        }
+
+        # HubPorts
+        hub_ports = hub["HubPorts"]
+        if hub_ports:  # For some reason, this is sometimes null? Botched driver?
+            for i, port in enumerate(hub_ports):
+                if not port:
+                    continue
+                index = (
+                    (port.get("PortConnectorProps") or {}).get("ConnectionIndex")
+                    or (port.get("ConnectionInfo") or {}).get("ConnectionIndex")
+                    or (port.get("ConnectionInfoV2") or {}).get("ConnectionIndex")
+                    or i + 1
+                )
+                status = sys.intern(port["ConnectionInfo"]["ConnectionStatus"])
+
+                friendly_error = {"DeviceCausedOvercurrent": "Device connected to port pulled too much current."}
+
+                if not status.endswith("DeviceConnected"):
+                    # shared.debug(f"Device connected to port {index} errored. Please unplug or connect a different device.")
+                    hub_info["ports"].append(shared.PortRecord(index, status, devices=({"error": friendly_error.get(status, True)},)))
+                    continue
+
+                if not port["PortConnectorProps"]:
+                    port["PortConnectorProps"] = {}
+                port_properties = port["PortConnectorProps"].get("UsbPortProperties", {})
+
+                # Guess port type
+
+                devices = ()
+                if port["ConnectionInfo"]["ConnectionStatus"] == "DeviceConnected":
+                    device_info = {"name": get_device_name(port), "instance_id": port["UsbDeviceProperties"].get("DeviceId"), "devices": []}
+
+                    if port["DeviceInfoType"] == "ExternalHubInfo":
+                        external_hub = self.serialize_hub(port)
+                        device_info["speed"] = get_device_speed_string(port, external_hub["port_count"])
+                        device_info["devices"] = [i for i in itertools.chain.from_iterable([hub_port.devices for hub_port in external_hub["ports"]]) if i]
+                        # device_info["hub_type"] = get_hub_type(port)
+                        # device_info["hub"] = self.serialize_hub(port)
+                    else:
+                        device_info["speed"] = get_device_speed_string(port)
+
+                    devices = (device_info,)
+
+                hub_info["ports"].append(
+                    shared.PortRecord(
+                        index,
+                        status,
+                        speed=get_port_type(port),
+                        companion_port=port["PortConnectorProps"].get("CompanionPortNumber") or 0,
+                        companion_hub=sys.intern(port["PortConnectorProps"].get("CompanionHubSymbolicLinkName") or ""),
+                        multiple_companions=bool(port_properties.get("PortHasMultipleCompanions", False)),
+                        type_c=bool(port_properties.get("PortConnectorIsTypeC", False)),
+                        user_connectable=bool(port_properties.get("PortIsUserConnectable", True)),
+                        devices=devices,
+                    )
+                )
+        hub_info["ports"].sort(key=attrgetter("index"))
+        for port_info in hub_info["ports"]:
+            self.ports[(hub_info["hub_name"], port_info.index)] = port_info
+        self.hubs[hub_info["hub_name"]] = hub_info
+        return hub_info
+
+    def build(self, info, recorder=None):
+        # Mutable controller list, as returned by get_controllers
+        self.hubs = {}
+        self.ports = {}
+        new_info = []
+        for controller in info:
+            if not controller["RootHub"]:
+                # This is useless
                 continue
 
-            port_info["class"] = get_port_type(port)
-            if not port["PortConnectorProps"]:
-                port["PortConnectorProps"] = {}
-
-            port_info["companion_info"] = {
-                "port": port["PortConnectorProps"].get("CompanionPortNumber", ""),
-                "hub": port["PortConnectorProps"].get("CompanionHubSymbolicLinkName", ""),
-                "multiple_companions": bool(port["PortConnectorProps"].get("UsbPortProperties", {}).get("PortHasMultipleCompanions", False)),
-            }
-            port_info["type_c"] = bool(port["PortConnectorProps"].get("UsbPortProperties", {}).get("PortConnectorIsTypeC", False))
-            port_info["user_connectable"] = bool(port["PortConnectorProps"].get("UsbPortProperties", {}).get("PortIsUserConnectable", True))
-
-            # Guess port type
-
-            if port["ConnectionInfo"]["ConnectionStatus"] == "DeviceConnected":
-                device_info = {"name": get_device_name(port), "instance_id": port["UsbDeviceProperties"].get("DeviceId"), "devices": []}
-
-                if port["DeviceInfoType"] == "ExternalHubInfo":
-                    external_hub = serialize_hub(port)
-                    device_info["speed"] = get_device_speed_string(port, external_hub["port_count"])
-                    device_info["devices"] = [i for i in itertools.chain.from_iterable([hub_port["devices"] for hub_port in external_hub["ports"]]) if i]
-                    # device_info["hub_type"] = get_hub_type(port)
-                    # device_info["hub"] = serialize_hub(port)
+            # root
+            controller_info = {
+                "name": controller["UsbDeviceProperties"]["DeviceDesc"],
+                "identifiers": {
+                    "instance_id": controller["UsbDeviceProperties"]["DeviceId"],
+                    # "revision": controller["Revision"],
+                },
+                # "port_count_no3": controller["ControllerInfo"]["NumberOfRootPorts"],
+                "class": "",
+            } | self.serialize_hub(controller["RootHub"])
+
+            if all(controller[i] not in [0, int("0xFFFF", 16)] for i in ["VendorID", "DeviceID"]):
+                controller_info["identifiers"]["pci_id"] = [hex(controller[i])[2:] for i in ["VendorID", "DeviceID"]]
+
+            if controller["SubSysID"] not in [0, int("0xFFFFFFFF", 16)]:
+                controller_info["identifiers"]["pci_id"] += [hex(controller["SubSysID"])[2:6], hex(controller["SubSysID"])[6:]]
+
+            if (controller.get("ControllerInfo") or {}).get("PciRevision", 0) not in [0, int("0xFF", 16)]:
+                controller_info["identifiers"]["pci_revision"] = int(controller["ControllerInfo"]["PciRevision"])
+
+            if controller["BusDeviceFunctionValid"]:
+                controller_info["identifiers"]["bdf"] = [controller["BusNumber"], controller["BusDevice"], controller["BusFunction"]]
+
+            new_info.append(controller_info)
+        if recorder is None:
+            self.guess_ports()
+        else:
+            with recorder.stage("guess", ports=len(self.ports)):
+                self.guess_ports()
+        return new_info
+
+    def parse(self, info, recorder=None):
+        controllers = self.build(info, recorder)
+        memo = {}
+        return UsbSnapshot(freeze(controllers, memo), freeze(self.hubs, memo))
+
+
+# Every key serialize_hub, get_device_speed and friends read. Everything else (config descriptors, BOS, most of
+# the device info node, ...) is dropped while parsing.
+USBDUMP_KEYS = frozenset(
+    [
+        # controller
+        "RootHub", "UsbDeviceProperties", "DeviceDesc", "DeviceId", "VendorID", "DeviceID", "SubSysID", "ControllerInfo",
+        "PciRevision", "BusDeviceFunctionValid", "BusNumber", "BusDevice", "BusFunction",
+        # hub
+        "HubName", "HubInfo", "HubInformation", "HubDescriptor", "bNumberOfPorts", "HubInfoEx", "HubType", "HubPorts",
+        # port
+        "PortConnectorProps", "ConnectionIndex", "CompanionPortNumber", "CompanionHubSymbolicLinkName", "UsbPortProperties",
+        "PortHasMultipleCompanions", "PortConnectorIsTypeC", "PortIsUserConnectable",
+        "ConnectionInfo", "ConnectionStatus", "Speed", "DeviceDescriptor", "iProduct",
+        "ConnectionInfoV2", "SupportedUsbProtocols", "Usb110", "Usb200", "Usb300", "Flags",
+        "DeviceIsOperatingAtSuperSpeedPlusOrHigher", "DeviceIsSuperSpeedPlusCapableOrHigher", "DeviceIsSuperSpeedCapableOrHigher",
+        "DeviceInfoNode", "DeviceDescName", "StringDescs", "DescriptorIndex", "StringDescriptor", "bString", "DeviceInfoType",
+    ]
+)
+
+# Start of the controller array: raw output is the array itself, the debug format wraps it as {"usbdump": [...]}
+_usbdump_array = re.compile(r'^\s*\[|"usbdump"\s*:\s*\[')
+_usbdump_separator = re.compile(r'[\s,]*')
+
+
+def prune_usbdump_object(obj):
+    return {key: value for key, value in obj.items() if key in USBDUMP_KEYS}
+
+
+def iter_usbdump(stream, chunk_size=1 << 20):
+    # Yields controllers one at a time from a binary stream of usbdump output. Only the text of the controllers
+    # not yet decoded is kept, and each controller is decoded straight into a pruned tree.
+    decoder = json.JSONDecoder(object_hook=prune_usbdump_object)
+    utf8 = codecs.getincrementaldecoder("utf-8-sig")()
+    text = ""
+    pos = None
+    needed = 0
+    eof = False
+    while True:
+        if pos is None and (match := _usbdump_array.search(text)):
+            pos = match.end()
+        if pos is not None:
+            pos = _usbdump_separator.match(text, pos).end()
+            if text.startswith("]", pos):
+                return
+            if pos < len(text) and (eof or len(text) - pos >= needed):
+                try:
+                    controller, pos = decoder.raw_decode(text, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    # Incomplete controller: wait for twice as much text before retrying, so retries stay O(n) overall
+                    needed = 2 * (len(text) - pos)
                 else:
-                    device_info["speed"] = get_device_speed_string(port)
-
-                port_info["devices"].append(device_info)
-
-            hub_info["ports"].append(port_info)
-    hub_info["ports"].sort(key=itemgetter("index"))
-    hub_map[hub_info["hub_name"]] = hub_info
-    return hub_info
-
-
-def get_controllers():
-    new_info = []
-
+                    needed = 0
+                    yield controller
+                    continue
+        if eof:
+            raise ValueError("usbdump output is empty or truncated")
+
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        if pos:
+            text, pos = text[pos:], 0
+        text += utf8.decode(chunk, final=eof)
+
+
+def load_dump(path):
+    # Saved dumps are either the raw usbdump.exe output or wrapped as {"usbdump": [...]}
+    with Path(path).open("rb") as dump_file:
+        return list(iter_usbdump(dump_file))
+
+
+def parse_dump_file(path):
+    return UsbTopology().parse(load_dump(path))
+
+
+def parse_dump_files(paths, max_workers=None, processes=True):
+    # Yields (path, snapshot) in input order; every dump gets its own UsbTopology, so workers share nothing
+    executor_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    paths = list(paths)
+    with executor_class(max_workers=max_workers) as executor:
+        yield from zip(paths, executor.map(parse_dump_file, paths))
+
+
+def read_controllers(stream, recorder=None):
+    # Builds the controller list from usbdump.exe output while it is still being written. With a recorder, the time
+    # spent waiting on the stream is recorded as "dump" and the rest of the work, minus guessing, as "parse".
+    if recorder is None:
+        return UsbTopology().build(iter_usbdump(stream))
+    stream = instrument.TimedStream(stream)
+    guess_before = recorder.durations().get("guess", 0.0)
+    start = time.perf_counter()
+    controllers = UsbTopology().build(iter_usbdump(stream), recorder)
+    elapsed = time.perf_counter() - start
+    guess = recorder.durations().get("guess", 0.0) - guess_before
+    recorder.record("dump", stream.elapsed, bytes=stream.bytes)
+    recorder.record("parse", elapsed - stream.elapsed - guess, controllers=len(controllers))
+    return controllers
+
+
+def get_controllers(recorder=None):
     usbdump_path = Path("resources/usbdump.exe")
 
     if getattr(sys, "frozen", False) and hasattr(sys, "_MEIPASS"):
         usbdump_path = Path(sys._MEIPASS) / usbdump_path
 
-    info = json.load(shared.debug_dump_path.open())["usbdump"] if shared.test_mode else json.loads(subprocess.run(usbdump_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE).stdout.decode())
-    for controller in info:
-        if not controller["RootHub"]:
-            # This is useless
-            continue
-
-        # root
-        controller_info = {
-            "name": controller["UsbDeviceProperties"]["DeviceDesc"],
-            "identifiers": {
-                "instance_id": controller["UsbDeviceProperties"]["DeviceId"],
-                # "revision": controller["Revision"],
-            },
-            # "port_count_no3": controller["ControllerInfo"]["NumberOfRootPorts"],
-            "class": "",
-        } | serialize_hub(controller["RootHub"])
-
-        if all(controller[i] not in [0, int("0xFFFF", 16)] for i in ["VendorID", "DeviceID"]):
-            controller_info["identifiers"]["pci_id"] = [hex(controller[i])[2:] for i in ["VendorID", "DeviceID"]]
-
-        if controller["SubSysID"] not in [0, int("0xFFFFFFFF", 16)]:
-            controller_info["identifiers"]["pci_id"] += [hex(controller["SubSysID"])[2:6], hex(controller["SubSysID"])[6:]]
-
-        if (controller.get("ControllerInfo") or {}).get("PciRevision", 0) not in [0, int("0xFF", 16)]:
-            controller_info["identifiers"]["pci_revision"] = int(controller["ControllerInfo"]["PciRevision"])
-
-        if controller["BusDeviceFunctionValid"]:
-            controller_info["identifiers"]["bdf"] = [controller["BusNumber"], controller["BusDevice"], controller["BusFunction"]]
-
-        new_info.append(controller_info)
-    guess_ports()
-    if False:
-        for hub in hub_map:
-            for port in hub_map[hub]["ports"]:
-                if port["companion_info"]["hub"]:
-                    port["companion_info"]["hub"] = hub_map[port["companion_info"]["hub"]]
-    return new_info
+    if shared.test_mode:
+        with shared.debug_dump_path.open("rb") as dump_file:
+            return read_controllers(dump_file, recorder)
+
+    # Controllers are parsed while usbdump.exe is still writing the rest of the tree
+    with subprocess.Popen(usbdump_path, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as process:
+        return read_controllers(process.stdout, recorder)
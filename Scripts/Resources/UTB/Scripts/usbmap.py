@@ -0,0 +1,182 @@
+# Offline UTBMap generation from saved usbdump JSON
+#
+# Usage (from the UTB directory):
+#   python -m Scripts.usbmap dump1.json dump2.json ... -o maps [-j 4] [--model MacBookPro16,1]
+#
+# Every dump is parsed with its own UsbTopology in a process pool and written to
+# maps/<dump name>/UTBMap.kext/Contents/Info.plist, so no usbdump.exe or TUI session is needed.
+import argparse
+import functools
+import os
+import plistlib
+import stat
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from Scripts import instrument, portbudget, shared, usbdump
+
+template_path = shared.resource_dir / Path("Info.plist")
+
+
+def get_port_connector(port):
+    # Integer code from shared.USBPhysicalPortTypes; a type set by hand always wins over the guess
+    return port.connector
+
+
+def is_mappable(port):
+    # Ports whose status we couldn't read (overcurrent etc.) were never guessed
+    return get_port_connector(port) is not None
+
+
+def get_controller_match(controller):
+    identifiers = controller["identifiers"]
+    if "bdf" in identifiers:
+        return {"IOPropertyMatch": {"pcidebug": ":".join(str(i) for i in identifiers["bdf"])}}
+    elif "pci_id" in identifiers:
+        return {"IOPCIPrimaryMatch": f"0x{int(identifiers['pci_id'][1], 16):04x}{int(identifiers['pci_id'][0], 16):04x}"}
+    else:
+        return {}
+
+
+def build_personality(controller, model=None, ports=None):
+    ports = [port for port in controller["ports"] if is_mappable(port)] if ports is None else ports
+    personality = {
+        "CFBundleIdentifier": "com.dhinakg.USBToolBox.kext",
+        "IOClass": "USBToolBox",
+        "IOMatchCategory": "USBToolBox",
+        "IOProviderClass": "IOPCIDevice",
+        "IOProviderMergeProperties": {"ports": {}, "port-count": 0},
+    } | get_controller_match(controller)
+    if model:
+        personality["model"] = model
+
+    port_count = 0
+    for port in ports:
+        personality["IOProviderMergeProperties"]["ports"][port.name] = {
+            "port": port.index.to_bytes(4, "little"),
+            "UsbConnector": get_port_connector(port),
+        }
+        if port.comment:
+            personality["IOProviderMergeProperties"]["ports"][port.name]["#comment"] = port.comment
+        port_count = max(port_count, port.index)
+    personality["IOProviderMergeProperties"]["port-count"] = port_count.to_bytes(4, "little")
+    return personality
+
+
+@functools.lru_cache(maxsize=None)
+def get_template_bytes():
+    return template_path.read_bytes()
+
+
+def get_selected_ports(controller, policy=portbudget.DEFAULT_POLICY, history=frozenset()):
+    # Without a policy every mappable port is kept, even past the port limit
+    if policy is None:
+        return [port for port in controller["ports"] if is_mappable(port)]
+    return portbudget.select_ports(controller, history, policy)
+
+
+def build_map(controllers, model=None, policy=portbudget.DEFAULT_POLICY, history=frozenset()):
+    # Pure function of the controllers: same topology in, byte-identical Info.plist out
+    template = plistlib.loads(get_template_bytes())
+    for controller in controllers:
+        name = controller["name"]
+        # Two identical controllers on one board would otherwise overwrite each other
+        if name in template["IOKitPersonalities"]:
+            name = f"{name} {':'.join(str(i) for i in controller['identifiers'].get('bdf', [len(template['IOKitPersonalities'])]))}"
+        template["IOKitPersonalities"][name] = build_personality(controller, model, get_selected_ports(controller, policy, history))
+    template["OSBundleLibraries"] = {"com.dhinakg.USBToolBox.kext": "1.0.0"}
+    return template
+
+
+def get_file_mode(path):
+    try:
+        return stat.S_IMODE(path.stat().st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def write_map(plist, output_dir):
+    # The Info.plist is written to a temporary file next to it and swapped in, so a kext that is being copied or
+    # loaded never sees a half-written map
+    plist_path = Path(output_dir) / Path("UTBMap.kext/Contents/Info.plist")
+    plist_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=".Info.plist.", dir=plist_path.parent)
+    try:
+        with os.fdopen(fd, "wb") as plist_file:
+            plistlib.dump(plist, plist_file, sort_keys=True)
+            plist_file.flush()
+            os.fsync(plist_file.fileno())
+        # mkstemp creates the file as 0600; keep the mode of the map being replaced, or the umask default like the rest
+        # of the kext
+        os.chmod(temp_path, get_file_mode(plist_path))
+        os.replace(temp_path, plist_path)
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+    return plist_path.parent.parent
+
+
+def map_dump(dump_path, output_root, model=None, policy=portbudget.DEFAULT_POLICY):
+    # Runs in a worker process; returns a summary instead of raising so one bad dump doesn't stop the batch
+    # Timings come back with the summary; "parse" covers reading the file and guessing the port types
+    dump_path = Path(dump_path)
+    recorder = instrument.Recorder()
+    try:
+        with recorder.stage("parse"):
+            snapshot = usbdump.parse_dump_file(dump_path)
+        with recorder.stage("build"):
+            plist = build_map(snapshot.controllers, model, policy)
+        with recorder.stage("write"):
+            kext_path = write_map(plist, Path(output_root) / dump_path.stem)
+    except Exception as e:  # pylint: disable=broad-except
+        return {"dump": str(dump_path), "error": f"{type(e).__name__}: {e}"}
+    mappable = sum(1 for controller in snapshot.controllers for port in controller["ports"] if is_mappable(port))
+    selected = sum(len(i["IOProviderMergeProperties"]["ports"]) for i in plist["IOKitPersonalities"].values())
+    return {
+        "dump": str(dump_path),
+        "kext": str(kext_path),
+        "controllers": len(snapshot.controllers),
+        "ports": selected,
+        "dropped": mappable - selected,
+        "timings": recorder.durations(),
+    }
+
+
+def map_dumps(dump_paths, output_root, model=None, max_workers=None, policy=portbudget.DEFAULT_POLICY):
+    dump_paths = [Path(i) for i in dump_paths]
+    stems = [i.stem for i in dump_paths]
+    duplicates = {i for i in stems if stems.count(i) > 1}
+    if duplicates:
+        raise ValueError(f"Dump names must be unique, found duplicates: {', '.join(sorted(duplicates))}")
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        yield from executor.map(map_dump, dump_paths, [output_root] * len(dump_paths), [model] * len(dump_paths), [policy] * len(dump_paths))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate UTBMap.kext from saved usbdump JSON files")
+    parser.add_argument("dumps", nargs="+", help="usbdump JSON files, raw or wrapped as {\"usbdump\": [...]}")
+    parser.add_argument("-o", "--output", default="maps", help="output directory, one subdirectory per dump")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--model", help="model identifier to add to every personality")
+    parser.add_argument("--limit", type=int, default=portbudget.DEFAULT_POLICY.limit, help="ports to keep per controller, 0 keeps every port")
+    parser.add_argument("--greedy", action="store_true", help="use the greedy port selection instead of the exact one")
+    args = parser.parse_args(argv)
+    policy = portbudget.DEFAULT_POLICY._replace(limit=args.limit, search="greedy" if args.greedy else "exact") if args.limit else None
+
+    failed = 0
+    for result in map_dumps(args.dumps, args.output, args.model, args.jobs, policy):
+        if "error" in result:
+            failed += 1
+            print(f"{result['dump']}: {result['error']}")
+        else:
+            dropped = f" ({result['dropped']} dropped over the limit)" if result["dropped"] else ""
+            print(f"{result['dump']}: {result['controllers']} controllers, {result['ports']} ports{dropped} -> {result['kext']}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
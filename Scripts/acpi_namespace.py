@@ -0,0 +1,631 @@
+'''
+The MIT License (MIT)
+Copyright © 2025 王孝慈
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+'''
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+# 解析结果缓存（按表内容哈希）
+CACHE_FILE = os.path.join(tempfile.gettempdir(), "acpi_namespace_cache.json")
+
+# 根作用域下预定义的对象
+PREDEFINED = {
+    "\\_SB_": "Device",
+    "\\_GPE": "Scope",
+    "\\_PR_": "Scope",
+    "\\_TZ_": "Scope",
+    "\\_SI_": "Scope",
+    "\\_GL_": "Mutex",
+    "\\_OSI": "Method",
+    "\\_OS_": "Name",
+    "\\_REV": "Name",
+}
+
+# 预定义方法的参数个数（解析AML中的方法调用时需要）
+PREDEFINED_ARGS = {"\\_OSI": 1}
+
+# ExternalOp 的 ObjectType 编码
+EXTERNAL_TYPES = [
+    "UnknownObj", "IntObj", "StrObj", "BuffObj", "PkgObj", "FieldUnitObj",
+    "DeviceObj", "EventObj", "MethodObj", "MutexObj", "OpRegionObj",
+    "PowerResObj", "ProcessorObj", "ThermalZoneObj", "BuffFieldObj", "DDBHandleObj",
+]
+
+# External类型与命名空间对象类型的对应关系
+EXTERNAL_KINDS = {
+    "IntObj": ("Name",),
+    "StrObj": ("Name",),
+    "BuffObj": ("Name",),
+    "PkgObj": ("Name",),
+    "FieldUnitObj": ("Field",),
+    "DeviceObj": ("Device", "Processor", "ThermalZone", "PowerResource"),
+    "EventObj": ("Event",),
+    "MethodObj": ("Method",),
+    "MutexObj": ("Mutex",),
+    "OpRegionObj": ("OperationRegion",),
+    "PowerResObj": ("PowerResource",),
+    "ProcessorObj": ("Processor", "Device"),
+    "ThermalZoneObj": ("ThermalZone",),
+    "BuffFieldObj": ("BufferField",),
+}
+
+
+def normalize_name(name: str, scope=()) -> str:
+    """
+    将ASL/AML名称规范为绝对路径 (如 _SB.PCI0 -> \\_SB_.PCI0)
+    :param name: 名称字符串
+    :param scope: 当前作用域的名称段
+    :return: 以反斜杠开头、各段补齐4字符的绝对路径
+    """
+    if name.startswith("\\"):
+        segs = []
+        name = name[1:]
+    else:
+        segs = list(scope)
+        while name.startswith("^"):
+            segs = segs[:-1]
+            name = name[1:]
+    segs += [seg.ljust(4, "_") for seg in name.split(".") if seg]
+    return "\\" + ".".join(segs)
+
+
+def split_name(full_name: str) -> List[str]:
+    """拆分绝对路径为名称段"""
+    return [seg for seg in full_name[1:].split(".") if seg]
+
+
+class TableInfo:
+    """单张ACPI表中与命名空间相关的信息"""
+    __slots__ = ("signature", "definitions", "externals", "scopes", "method_args", "skipped")
+
+    def __init__(self, signature=""):
+        self.signature = signature
+        self.definitions: List[Tuple[str, str]] = []   # (绝对路径, 类型)
+        self.externals: List[Tuple[str, str]] = []     # (绝对路径, External类型)
+        self.scopes: List[str] = []                    # Scope() 引用的路径
+        self.method_args: Dict[str, int] = {}
+        self.skipped = 0                               # 无法解析而跳过的块数
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        info = cls()
+        for slot in cls.__slots__:
+            value = data.get(slot, getattr(info, slot))
+            if slot in ("definitions", "externals"):
+                value = [tuple(item) for item in value]
+            setattr(info, slot, value)
+        return info
+
+
+# ======================== DSL 扫描 ========================
+def scan_dsl(text: str) -> TableInfo:
+    """
+    扫描ASL源码中的External、Scope及命名对象定义（方法体内部的局部对象除外）
+    :param text: ASL源码
+    :return: TableInfo
+    """
+    signature = re.search(r'DefinitionBlock\s*\(\s*"[^"]*"\s*,\s*"(\w{4})"', text)
+    info = TableInfo(signature.group(1) if signature else "")
+
+    # 去掉注释和字符串，避免误判
+    text = re.sub(r'/\*.*?\*/|//[^\n]*|"(?:[^"\\]|\\.)*"', " ", text, flags=re.S)
+
+    stack = []      # 每层大括号对应的作用域，None表示非作用域块(If/Package等)，METHOD表示方法体
+    pending = None  # 等待大括号打开的作用域
+    pattern = r"\b(External|Device|Scope|Method|Name|ThermalZone|PowerResource|Processor|OperationRegion|Mutex|Event)\s*\(\s*([\\^A-Za-z0-9_.]+)\s*(?:,\s*(\w+))?|[{}]"
+    for match in re.finditer(pattern, text):
+        token = match.group(0)
+        if token == "{":
+            stack.append(pending)
+            pending = None
+            continue
+        if token == "}":
+            if stack:
+                stack.pop()
+            continue
+
+        # 方法体内部的对象在运行时才创建，不计入命名空间
+        if "METHOD" in stack:
+            continue
+
+        kind, name, arg = match.groups()
+        scope = next((entry for entry in reversed(stack) if entry is not None), [])
+        full_name = normalize_name(name, scope)
+        if kind == "External":
+            info.externals.append((full_name, arg or "UnknownObj"))
+        elif kind == "Scope":
+            info.scopes.append(full_name)
+        else:
+            info.definitions.append((full_name, kind))
+            if kind == "Method" and arg and arg.isdigit():
+                info.method_args[full_name] = int(arg)
+
+        if kind == "Method":
+            pending = "METHOD"
+        elif kind in ("Device", "Scope", "ThermalZone", "PowerResource", "Processor"):
+            pending = split_name(full_name)
+    return info
+
+
+# ======================== AML 解析 ========================
+class _AmlError(Exception):
+    """遇到无法识别的操作码"""
+
+
+# 表达式操作码及其操作数个数 ('t'=TermArg/Target, 'b'=字节, 'w'=字)
+_EXPR_OPS = {
+    0x70: "tt", 0x71: "t", 0x72: "ttt", 0x73: "ttt", 0x74: "ttt", 0x75: "t", 0x76: "t",
+    0x77: "ttt", 0x78: "tttt", 0x79: "ttt", 0x7A: "ttt", 0x7B: "ttt", 0x7C: "ttt",
+    0x7D: "ttt", 0x7E: "ttt", 0x7F: "ttt", 0x80: "tt", 0x81: "tt", 0x82: "tt",
+    0x83: "t", 0x84: "ttt", 0x85: "ttt", 0x86: "tt", 0x87: "t", 0x88: "ttt",
+    0x89: "tbtbtt", 0x8E: "t", 0x90: "tt", 0x91: "tt", 0x92: "t", 0x93: "tt",
+    0x94: "tt", 0x95: "tt", 0x96: "tt", 0x97: "tt", 0x98: "tt", 0x99: "tt",
+    0x9C: "ttt", 0x9D: "tt", 0x9E: "tttt",
+}
+_EXT_EXPR_OPS = {
+    0x12: "tt", 0x1F: "tttttt", 0x20: "tt", 0x21: "t", 0x22: "t", 0x23: "tw",
+    0x24: "t", 0x25: "tt", 0x26: "t", 0x27: "t", 0x28: "tt", 0x29: "tt",
+    0x30: "", 0x31: "", 0x33: "",
+}
+
+
+class AmlParser:
+    """
+    解析AML二进制表中的命名空间对象
+    只关心命名对象的定义位置，不求值；遇到无法识别的内容时跳过所在的包
+    """
+    HEADER_SIZE = 36
+
+    def __init__(self, data: bytes, method_args: Optional[Dict[str, int]] = None):
+        self.data = data
+        self.info = TableInfo(data[:4].decode("ascii", "replace"))
+        # 已知的方法参数个数（用于跳过If谓词中的方法调用）
+        self.method_args = dict(PREDEFINED_ARGS)
+        self.method_args.update(method_args or {})
+
+    def parse(self) -> TableInfo:
+        length = int.from_bytes(self.data[4:8], "little")
+        self._parse_term_list(self.HEADER_SIZE, min(length, len(self.data)), [])
+        return self.info
+
+    # ---------- 基础编码 ----------
+    def _pkg_length(self, pos):
+        """读取PkgLength，返回 (包结束位置, 包内容起始位置)"""
+        lead = self.data[pos]
+        count = lead >> 6
+        if count == 0:
+            return pos + (lead & 0x3F), pos + 1
+        length = lead & 0x0F
+        for i in range(count):
+            length |= self.data[pos + 1 + i] << (4 + 8 * i)
+        return pos + length, pos + 1 + count
+
+    def _name_string(self, pos):
+        """读取NameString，返回 (原始名称, 新位置)"""
+        data = self.data
+        prefix = ""
+        if data[pos] == 0x5C:
+            prefix = "\\"
+            pos += 1
+        else:
+            while data[pos] == 0x5E:
+                prefix += "^"
+                pos += 1
+
+        if data[pos] == 0x00:
+            return prefix, pos + 1
+        if data[pos] == 0x2E:
+            count, pos = 2, pos + 1
+        elif data[pos] == 0x2F:
+            count, pos = data[pos + 1], pos + 2
+        else:
+            count = 1
+        if not (0x41 <= data[pos] <= 0x5A or data[pos] == 0x5F):
+            raise _AmlError(f"无效的NameSeg @0x{pos:X}")
+        segs = [data[pos + 4 * i:pos + 4 * i + 4].decode("ascii") for i in range(count)]
+        return prefix + ".".join(segs), pos + 4 * count
+
+    @staticmethod
+    def _is_name_lead(byte):
+        return byte in (0x5C, 0x5E, 0x2E, 0x2F) or 0x41 <= byte <= 0x5A or byte == 0x5F
+
+    def _define(self, name, scope, kind):
+        full_name = normalize_name(name, scope)
+        self.info.definitions.append((full_name, kind))
+        return full_name
+
+    def _lookup_args(self, name, scope):
+        """按ACPI名称搜索规则查找方法参数个数"""
+        if name.startswith(("\\", "^")) or "." in name:
+            return self.method_args.get(normalize_name(name, scope), 0)
+        segs = list(scope)
+        while True:
+            candidate = normalize_name(name, segs)
+            if candidate in self.method_args:
+                return self.method_args[candidate]
+            if not segs:
+                return 0
+            segs.pop()
+
+    # ---------- 表达式跳过 ----------
+    def _skip_term(self, pos, scope):
+        """跳过一个TermArg/DataObject，返回新位置"""
+        data = self.data
+        op = data[pos]
+        if op in (0x00, 0x01, 0xA3, 0xFF) or 0x60 <= op <= 0x6E:
+            return pos + 1
+        if op == 0x0A:
+            return pos + 2
+        if op == 0x0B:
+            return pos + 3
+        if op == 0x0C:
+            return pos + 5
+        if op == 0x0E:
+            return pos + 9
+        if op == 0x0D:
+            return data.index(b"\x00", pos + 1) + 1
+        if op in (0x11, 0x12, 0x13):
+            return self._pkg_length(pos + 1)[0]
+        if op in _EXPR_OPS:
+            return self._skip_operands(pos + 1, _EXPR_OPS[op], scope)
+        if op == 0x5B and data[pos + 1] in _EXT_EXPR_OPS:
+            return self._skip_operands(pos + 2, _EXT_EXPR_OPS[data[pos + 1]], scope)
+        if self._is_name_lead(op):
+            name, pos = self._name_string(pos)
+            for _ in range(self._lookup_args(name, scope)):
+                pos = self._skip_term(pos, scope)
+            return pos
+        raise _AmlError(f"未识别的操作码 0x{op:02X} @0x{pos:X}")
+
+    def _skip_operands(self, pos, operands, scope):
+        for kind in operands:
+            if kind == "b":
+                pos += 1
+            elif kind == "w":
+                pos += 2
+            else:
+                pos = self._skip_term(pos, scope)
+        return pos
+
+    # ---------- 命名空间对象 ----------
+    def _parse_term_list(self, pos, end, scope):
+        data = self.data
+        while pos < end:
+            op = data[pos]
+            try:
+                if op == 0x10:  # Scope
+                    pkg_end, pos = self._pkg_length(pos + 1)
+                    name, pos = self._name_string(pos)
+                    full_name = normalize_name(name, scope)
+                    self.info.scopes.append(full_name)
+                    self._parse_term_list(pos, pkg_end, split_name(full_name))
+                    pos = pkg_end
+                elif op == 0x14:  # Method
+                    pkg_end, pos = self._pkg_length(pos + 1)
+                    name, pos = self._name_string(pos)
+                    full_name = self._define(name, scope, "Method")
+                    self.method_args[full_name] = self.info.method_args[full_name] = data[pos] & 0x07
+                    pos = pkg_end
+                elif op == 0x08:  # Name
+                    name, pos = self._name_string(pos + 1)
+                    self._define(name, scope, "Name")
+                    pos = self._skip_term(pos, scope)
+                elif op == 0x06:  # Alias
+                    _, pos = self._name_string(pos + 1)
+                    name, pos = self._name_string(pos)
+                    self._define(name, scope, "Alias")
+                elif op == 0x15:  # External
+                    name, pos = self._name_string(pos + 1)
+                    obj_type, arg_count = data[pos], data[pos + 1]
+                    full_name = normalize_name(name, scope)
+                    type_name = EXTERNAL_TYPES[obj_type] if obj_type < len(EXTERNAL_TYPES) else "UnknownObj"
+                    self.info.externals.append((full_name, type_name))
+                    if type_name == "MethodObj":
+                        self.method_args.setdefault(full_name, arg_count)
+                    pos += 2
+                elif op in (0x8A, 0x8B, 0x8C, 0x8D, 0x8F):  # CreateXxxField
+                    pos = self._skip_operands(pos + 1, "tt", scope)
+                    name, pos = self._name_string(pos)
+                    self._define(name, scope, "BufferField")
+                elif op == 0xA0:  # If
+                    pkg_end, pos = self._pkg_length(pos + 1)
+                    try:
+                        pos = self._skip_term(pos, scope)
+                    except (_AmlError, IndexError, ValueError):
+                        self.info.skipped += 1
+                        pos = pkg_end
+                        continue
+                    self._parse_term_list(pos, pkg_end, scope)
+                    pos = pkg_end
+                elif op == 0xA1:  # Else
+                    pkg_end, pos = self._pkg_length(pos + 1)
+                    self._parse_term_list(pos, pkg_end, scope)
+                    pos = pkg_end
+                elif op == 0x5B:
+                    pos = self._parse_ext_op(pos, scope)
+                else:
+                    # 作用域级别的普通语句（如Store），跳过
+                    pos = self._skip_term(pos, scope)
+            except (_AmlError, IndexError, ValueError):
+                # 无法继续解析此包，剩余内容放弃
+                self.info.skipped += 1
+                return
+
+    def _parse_ext_op(self, pos, scope):
+        data = self.data
+        ext = data[pos + 1]
+        pos += 2
+        if ext in (0x82, 0x83, 0x84, 0x85):  # Device / Processor / PowerResource / ThermalZone
+            kind = {0x82: "Device", 0x83: "Processor", 0x84: "PowerResource", 0x85: "ThermalZone"}[ext]
+            pkg_end, pos = self._pkg_length(pos)
+            name, pos = self._name_string(pos)
+            full_name = self._define(name, scope, kind)
+            pos += {0x82: 0, 0x83: 6, 0x84: 3, 0x85: 0}[ext]
+            self._parse_term_list(pos, pkg_end, split_name(full_name))
+            return pkg_end
+        if ext == 0x80:  # OperationRegion
+            name, pos = self._name_string(pos)
+            self._define(name, scope, "OperationRegion")
+            return self._skip_operands(pos + 1, "tt", scope)
+        if ext in (0x81, 0x86, 0x87):  # Field / IndexField / BankField
+            pkg_end, pos = self._pkg_length(pos)
+            _, pos = self._name_string(pos)
+            if ext in (0x86, 0x87):
+                _, pos = self._name_string(pos)
+            if ext == 0x87:
+                pos = self._skip_term(pos, scope)
+            self._parse_field_list(pos + 1, pkg_end, scope)
+            return pkg_end
+        if ext in (0x01, 0x02):  # Mutex / Event
+            name, pos = self._name_string(pos)
+            self._define(name, scope, "Mutex" if ext == 0x01 else "Event")
+            return pos + (1 if ext == 0x01 else 0)
+        if ext == 0x13:  # CreateField
+            pos = self._skip_operands(pos, "ttt", scope)
+            name, pos = self._name_string(pos)
+            self._define(name, scope, "BufferField")
+            return pos
+        if ext == 0x88:  # DataRegion
+            name, pos = self._name_string(pos)
+            self._define(name, scope, "OperationRegion")
+            return self._skip_operands(pos, "ttt", scope)
+        if ext in _EXT_EXPR_OPS:
+            return self._skip_operands(pos, _EXT_EXPR_OPS[ext], scope)
+        raise _AmlError(f"未识别的扩展操作码 0x5B 0x{ext:02X} @0x{pos - 2:X}")
+
+    def _parse_field_list(self, pos, end, scope):
+        data = self.data
+        while pos < end:
+            op = data[pos]
+            if op == 0x00:  # ReservedField
+                pos += 1
+            elif op == 0x01:  # AccessField
+                pos += 3
+                continue
+            elif op == 0x03:  # ExtendedAccessField
+                pos += 4
+                continue
+            elif 0x41 <= op <= 0x5A or op == 0x5F:
+                name = data[pos:pos + 4].decode("ascii")
+                self._define(name, scope, "Field")
+                pos += 4
+            else:
+                # ConnectField 等，放弃剩余字段
+                self.info.skipped += 1
+                return
+            # 字段宽度 (PkgLength编码)
+            pos += 1 + (data[pos] >> 6)
+
+
+# ======================== 命名空间 ========================
+class NamespaceNode:
+    """命名空间前缀树节点"""
+    __slots__ = ("children", "kind", "source")
+
+    def __init__(self, kind=None, source=None):
+        self.children: Dict[str, "NamespaceNode"] = {}
+        self.kind = kind
+        self.source = source
+
+
+class AcpiNamespace:
+    """由DSDT/SSDT转储构建的ACPI命名空间索引"""
+    _memory_cache: Dict[str, TableInfo] = {}
+
+    def __init__(self):
+        self.root = NamespaceNode("Scope")
+        self.tables: List[str] = []
+        self.method_args: Dict[str, int] = dict(PREDEFINED_ARGS)
+        self.skipped = 0
+        for name, kind in PREDEFINED.items():
+            self.add(name, kind, "predefined")
+
+    def add(self, full_name, kind, source=None):
+        node = self.root
+        for seg in split_name(full_name):
+            node = node.children.setdefault(seg, NamespaceNode())
+        if node.kind is None or node.kind == "Scope":
+            node.kind = kind
+            node.source = source
+        return node
+
+    def lookup(self, full_name) -> Optional[NamespaceNode]:
+        """按绝对路径查找对象，复杂度O(路径长度)"""
+        node = self.root
+        for seg in split_name(full_name):
+            node = node.children.get(seg)
+            if node is None or node.kind is None:
+                return None
+        return node
+
+    def __contains__(self, full_name):
+        return self.lookup(full_name) is not None
+
+    # ---------- 加载 ----------
+    @classmethod
+    def parse_table(cls, data: bytes, method_args=None, disk_cache=None) -> TableInfo:
+        """
+        解析单张表（AML二进制或ASL源码），结果按内容哈希缓存
+        :param data: 表内容
+        :param method_args: 其他表中已知的方法参数个数
+        :param disk_cache: 磁盘缓存字典，为None时只使用内存缓存
+        """
+        aml = is_aml(data)
+        digest = hashlib.sha1(data)
+        if aml and method_args:
+            digest.update(json.dumps(sorted(method_args.items())).encode())
+        digest = digest.hexdigest()
+
+        if digest in cls._memory_cache:
+            return cls._memory_cache[digest]
+
+        if disk_cache is not None and digest in disk_cache:
+            info = TableInfo.from_dict(disk_cache[digest])
+        else:
+            info = AmlParser(data, method_args).parse() if aml else scan_dsl(data.decode("utf-8", "replace"))
+            if disk_cache is not None:
+                disk_cache[digest] = info.to_dict()
+
+        cls._memory_cache[digest] = info
+        return info
+
+    @classmethod
+    def from_tables(cls, paths: List[str], use_disk_cache=True) -> "AcpiNamespace":
+        """
+        从转储文件构建命名空间（DSDT优先解析，SSDT可调用其中的方法）
+        :param paths: AML(.aml/.dat/.bin)或反编译的.dsl文件路径
+        :param use_disk_cache: 是否使用磁盘缓存
+        """
+        namespace = cls()
+        blobs = []
+        for path in paths:
+            with open(path, "rb") as f:
+                data = f.read()
+            blobs.append((0 if data[:4] == b"DSDT" else 1, path, data))
+
+        disk_cache = cls._load_disk_cache() if use_disk_cache else None
+        cache_size = len(disk_cache or {})
+        for _, path, data in sorted(blobs, key=lambda item: item[0]):
+            info = cls.parse_table(data, namespace.method_args, disk_cache)
+            namespace.method_args.update(info.method_args)
+            for full_name, kind in info.definitions:
+                namespace.add(full_name, kind, os.path.basename(path))
+            namespace.tables.append(os.path.basename(path))
+            namespace.skipped += info.skipped
+
+        if disk_cache is not None and len(disk_cache) != cache_size:
+            cls._save_disk_cache(disk_cache)
+        return namespace
+
+    @staticmethod
+    def _load_disk_cache():
+        try:
+            with open(CACHE_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    @staticmethod
+    def _save_disk_cache(cache):
+        try:
+            with open(CACHE_FILE, "w", encoding="utf-8") as f:
+                json.dump(cache, f)
+        except Exception:
+            pass
+
+    # ---------- 校验 ----------
+    def validate(self, table: TableInfo) -> List[Tuple[str, str, str]]:
+        """
+        校验生成的SSDT对现有命名空间的引用
+        :param table: 待校验表的TableInfo（scan_dsl或AmlParser的结果）
+        :return: [(级别, 路径, 说明), ...]，级别为 error 或 warning
+        """
+        diagnostics = []
+        own = {name: kind for name, kind in table.definitions}
+
+        def exists(full_name):
+            return full_name in own or full_name in self
+
+        for full_name, obj_type in table.externals:
+            if full_name in own:
+                continue
+            node = self.lookup(full_name)
+            parent = full_name.rsplit(".", 1)[0] if "." in full_name else "\\"
+            if node is None and obj_type != "DeviceObj" and parent in self:
+                # 父设备存在时多为可选方法，模板中通常用CondRefOf保护
+                diagnostics.append(("warning", full_name, f"External引用的对象不存在 ({obj_type})"))
+            elif node is None:
+                diagnostics.append(("error", full_name, f"External引用的对象不存在 ({obj_type})"))
+            elif obj_type in EXTERNAL_KINDS and node.kind not in EXTERNAL_KINDS[obj_type] + ("Alias", "Scope"):
+                diagnostics.append(("warning", full_name, f"External类型为{obj_type}，实际为{node.kind}"))
+
+        for full_name in dict.fromkeys(table.scopes):
+            if not exists(full_name):
+                diagnostics.append(("error", full_name, "Scope目标不存在"))
+
+        for full_name, kind in table.definitions:
+            parent = full_name.rsplit(".", 1)[0] if "." in full_name else "\\"
+            if parent != "\\" and not exists(parent):
+                diagnostics.append(("error", full_name, f"{kind}的父对象 {parent} 不存在"))
+            node = self.lookup(full_name)
+            if node is not None and node.source != "predefined":
+                diagnostics.append(("error", full_name, f"{kind}与 {node.source} 中的现有对象重名"))
+        return diagnostics
+
+
+def is_aml(data: bytes) -> bool:
+    """根据表头判断是否为AML二进制"""
+    return (
+        len(data) >= AmlParser.HEADER_SIZE
+        and re.fullmatch(rb"[A-Z0-9_]{4}", data[:4]) is not None
+        and int.from_bytes(data[4:8], "little") <= len(data)
+    )
+
+
+def validate_file(namespace: AcpiNamespace, path: str) -> List[Tuple[str, str, str]]:
+    """校验单个生成的SSDT文件（.dsl或.aml）"""
+    with open(path, "rb") as f:
+        data = f.read()
+    table = AmlParser(data, namespace.method_args).parse() if is_aml(data) else scan_dsl(data.decode("utf-8", "replace"))
+    return namespace.validate(table)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="根据DSDT/SSDT转储校验生成的SSDT")
+    parser.add_argument("-t", "--tables", nargs="+", required=True, help="机器的DSDT/SSDT转储 (AML或DSL)")
+    parser.add_argument("ssdts", nargs="+", help="待校验的SSDT (.dsl或.aml)")
+    args = parser.parse_args(argv)
+
+    namespace = AcpiNamespace.from_tables(args.tables)
+    print(f"已加载 {len(namespace.tables)} 张表" + (f"，{namespace.skipped} 处无法解析已跳过" if namespace.skipped else ""))
+
+    error_count = 0
+    for path in args.ssdts:
+        diagnostics = validate_file(namespace, path)
+        if not diagnostics:
+            print(f"[通过] {path}")
+            continue
+        for level, full_name, message in diagnostics:
+            error_count += level == "error"
+            print(f"[{'错误' if level == 'error' else '警告'}] {path}: {full_name} - {message}")
+    return 1 if error_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
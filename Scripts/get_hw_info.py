@@ -13,6 +13,7 @@ import re
 import os
 import ctypes
 from colorama import init, Fore, Style
+from pci_ids import PciIdsIndex
 
 # 初始化colorama
 init()
@@ -71,14 +72,27 @@ def load_support_info(filename):
                         support_info[key.upper()] = value
     return support_info, details_info, kext_info
 
-def get_support_info(device_id, support_info, details_info, kext_info):
-    """获取设备支持信息"""
+def get_support_info(device_id, support_info, details_info, kext_info, pci_index=None):
+    """获取设备支持信息，列表中未收录的设备用pci.ids补充名称"""
     if not device_id:
         return None, "N/A", "未知", "无"
     
-    status = support_info.get(device_id)
-    detail = details_info.get(device_id, "未知")
-    kext = kext_info.get(device_id, "无")
+    # 匹配顺序与图形版一致：精确 → XXFF 模糊 → FFFF 厂商通配
+    ven_id, _, dev_id = device_id.partition('&')
+    for key, unknown in ((device_id, "未知"), (f"{ven_id}&{dev_id[:2]}FF", "未知(模糊匹配)"), (f"{ven_id}&FFFF", "未知(厂商通用支持)")):
+        if key in support_info:
+            break
+    else:
+        key, unknown = None, "未知"
+    
+    status = support_info.get(key)
+    detail = details_info.get(key, unknown)
+    kext = kext_info.get(key, "无")
+    # 只有列表中没有任何匹配时才是"未收录"，已收录但缺少详情的条目保持原样
+    if key is None and pci_index:
+        name = pci_index.describe(device_id)
+        if name:
+            detail = f"未收录: {name}"
     
     return status, device_id, detail, kext
 
@@ -162,6 +176,8 @@ def get_comprehensive_hardware_info():
     gpu_support, gpu_details, gpu_kext = load_support_info("GPUSupportInfo.list")
     hda_support, hda_details, hda_kext = load_support_info("HDASupportInfo.list")
     eth_support, eth_details, eth_kext = load_support_info("ETHSupportInfo.list")
+    # pci.ids 可选，存在时为未收录设备显示名称
+    pci_index = PciIdsIndex.load("pci.ids")
     
     c = wmi.WMI()
     
@@ -243,7 +259,7 @@ def get_comprehensive_hardware_info():
     for gpu in c.Win32_VideoController():
         if gpu.Name.strip() not in ["Microsoft Basic Display Driver"]:
             device_id = extract_hardware_ids(gpu.PNPDeviceID)
-            status, clean_id, detail, required_kext = get_support_info(device_id, gpu_support, gpu_details, gpu_kext)
+            status, clean_id, detail, required_kext = get_support_info(device_id, gpu_support, gpu_details, gpu_kext, pci_index)
             
             status_text = "支持" if status == "1" else ("不支持" if status == "0" else "未知")
             print_aligned(cols,
@@ -258,7 +274,7 @@ def get_comprehensive_hardware_info():
     # 声卡信息
     for sound in c.Win32_SoundDevice():
         device_id = extract_hardware_ids(sound.PNPDeviceID)
-        status, clean_id, detail, required_kext = get_support_info(device_id, hda_support, hda_details, hda_kext)
+        status, clean_id, detail, required_kext = get_support_info(device_id, hda_support, hda_details, hda_kext, pci_index)
         
         status_text = "支持" if status == "1" else ("不支持" if status == "0" else "未知")
         print_aligned(cols,
@@ -273,7 +289,7 @@ def get_comprehensive_hardware_info():
     # 网卡信息
     for nic in c.Win32_NetworkAdapter(PhysicalAdapter=True):
         device_id = extract_hardware_ids(nic.PNPDeviceID)
-        status, clean_id, detail, required_kext = get_support_info(device_id, eth_support, eth_details, eth_kext)
+        status, clean_id, detail, required_kext = get_support_info(device_id, eth_support, eth_details, eth_kext, pci_index)
         
         status_text = "支持" if status == "1" else ("不支持" if status == "0" else "未知")
         print_aligned(cols,
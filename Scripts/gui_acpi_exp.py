@@ -16,14 +16,20 @@ import os
 import tempfile
 import re
 import subprocess
+import threading
+import hashlib
+import difflib
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QWidget, QTableWidget, QTableWidgetItem,
     QTextEdit, QHBoxLayout, QLabel, QLineEdit, QPushButton, QHeaderView,
-    QMessageBox, QProgressBar, QFileDialog, QDialog, QGroupBox
+    QMessageBox, QProgressBar, QFileDialog, QDialog, QGroupBox, QProgressDialog, QComboBox,
+    QCheckBox
 )
-from PySide6.QtCore import Qt, QSize, QThread, Signal
+from PySide6.QtCore import Qt, QSize, QThread, Signal, QEventLoop
 from PySide6.QtGui import QFont, QIcon, QColor
 
+from acpi_namespace import AcpiNamespace, scan_dsl, validate_file
+
 CACHE_FILE = "device_cache.json"
 
 class SSDTBuilder:
@@ -38,6 +44,21 @@ class SSDTBuilder:
         'spoof_generic': "SSDT-SH-SPOOF.dsl",
         'spoof_rx6500': "SSDT-6x50XT-GPU-SPOOF.dsl"
     }
+    # 合并模式输出
+    MERGED_DISABLE_NAME = "SSDT-DISABLE-MERGED"
+    MERGED_OEM_TABLE_ID = "NDGPALL"
+    # 已生成SSDT源码的清单（用于增量重建），按输出目录分别记录；保存在用户目录，不写入EFI
+    SSDT_MANIFEST = os.path.join(os.path.expanduser("~"), ".ssdt_manifest.json")
+    # 属性注入输出
+    PROPERTY_SSDT_NAME = "SSDT-DSM-PROPS"
+    PROPERTY_OEM_TABLE_ID = "DSMPROP"
+    # 已加载的目标机器ACPI命名空间（用于编译前校验）
+    namespace = None
+    # 编译器设置：compiler_path 可为可执行文件路径或命令列表，None 表示使用内置iasl
+    compiler_path = None
+    COMPILE_TIMEOUT = 60
+    # 编译输出的实时日志回调（由主窗口设置）
+    log_handler = None
 
 
     @classmethod
@@ -60,49 +81,370 @@ class SSDTBuilder:
         return True
 
     @classmethod
-    def build_disable_ssdt(cls, acpi_paths, method, parent_window):
+    def build_merged_disable_ssdt(cls, targets, parent_window):
         """
-        构建禁用设备的SSDT
-        :param acpi_paths: 已转义为ACPI格式的路径列表 (如 ["SB.PCI0.GFX0"])
-        :param method: 禁用方法 (s3/off/ioname)
+        将多个禁用目标合并为单个SSDT（只编译一次）
+        :param targets: (ACPI路径, 禁用方法) 列表 (如 [("SB.PCI0.GFX0", "off")])
         :param parent_window: 父窗口对象
         :return: 是否成功
         """
         # 验证输入
-        if not cls._validate_input(acpi_paths, method, parent_window):
+        acpi_paths = [path for path, _ in targets]
+        for method in dict.fromkeys(method for _, method in targets) or [None]:
+            if not cls._validate_input(acpi_paths, method, parent_window):
+                return False
+
+        content, collisions = cls.merge_disable_dsl(targets, parent_window)
+        if content is None:
             return False
 
-        # 获取模板路径
+        if collisions:
+            QMessageBox.critical(parent_window, "命名冲突",
+                "合并后的SSDT存在重复定义，已取消生成:\n" + "\n".join(collisions))
+            return False
+
+        output_dir = cls._select_output_dir(parent_window)
+        if not output_dir:
+            return False
+
+        temp_dsl = os.path.join(output_dir, cls.MERGED_DISABLE_NAME + ".dsl")
+        if not cls._write_temp_file(temp_dsl, content, parent_window):
+            return False
+
+        if not cls.compile_aml(temp_dsl, parent_window):
+            return False
+        cls._cleanup_temp_files(temp_dsl)
+
+        cls._show_success(parent_window, output_dir,
+            f"已将 {len(targets)} 个目标合并为 {cls.MERGED_DISABLE_NAME}.aml")
+        return True
+
+    @classmethod
+    def merge_disable_dsl(cls, targets, parent_window=None):
+        """
+        生成合并后的禁用SSDT源码
+        :param targets: (ACPI路径, 禁用方法) 列表
+        :param parent_window: 用于显示错误消息的父窗口
+        :return: (DSL内容, 冲突列表)，模板缺失时DSL内容为None
+        """
+        templates = {}
+        externals = {}
+        bodies = []
+        defined = {}
+        collisions = []
+
+        # 同一路径同一方法只保留一次
+        for path, method in dict.fromkeys(targets):
+            if method not in templates:
+                template_file = cls._get_template_path(f'disable_{method}', parent_window)
+                if not template_file:
+                    return None, []
+                with open(template_file, "r", encoding="utf-8") as f:
+                    templates[method] = cls._split_definition_block(f.read())
+
+            template_externals, template_body = templates[method]
+            body = template_body.replace("{ADDR}", path)
+
+            # 根作用域下的同名设备(如DGPU)自动重命名
+            # 只在模板正文上替换，避免改写目标路径中的同名段 (如 SB.PCI0.RP01.DGPU)
+            renamed = False
+            for name, kind in scan_dsl(body).definitions:
+                if name in defined and kind == "Device" and "." not in name:
+                    seg = name[1:]
+                    new_seg = cls._unique_seg(seg, defined)
+                    template_body = re.sub(rf"\b{re.escape(seg.rstrip('_'))}\b", new_seg, template_body)
+                    renamed = True
+            if renamed:
+                body = template_body.replace("{ADDR}", path)
+
+            for name, kind in scan_dsl(body).definitions:
+                if name in defined:
+                    collisions.append(f"{name} ({defined[name]} / {path}-{method.upper()})")
+                else:
+                    defined[name] = f"{path}-{method.upper()}"
+
+            for line in template_externals:
+                line = line.replace("{ADDR}", path)
+                (name, obj_type), = scan_dsl(line).externals
+                if name in externals and externals[name][0] != obj_type:
+                    collisions.append(f"{name} (External类型冲突: {externals[name][0]} / {obj_type})")
+                    continue
+                externals.setdefault(name, (obj_type, line))
+
+            bodies.append(f"    // {path} - {method.upper()}\n{body.rstrip()}")
+
+        # 本表内已定义的对象不再声明External
+        external_lines = [f"    {line}" for name, (_, line) in externals.items() if name not in defined]
+
+        content = (
+            f'DefinitionBlock ("", "SSDT", 2, "OCLT", "{cls.MERGED_OEM_TABLE_ID}", 0x00000000)\n'
+            "{\n"
+            + "\n".join(external_lines)
+            + "\n\n"
+            + "\n\n".join(bodies)
+            + "\n}\n"
+        )
+        return content, collisions
+
+    @classmethod
+    def render_disable_jobs(cls, acpi_paths, method, merged=False, parent_window=None):
+        """
+        生成禁用SSDT的源码（不写文件）
+        :param acpi_paths: ACPI路径列表
+        :param method: 禁用方法 (s3/off/ioname)
+        :param merged: 是否合并为单个SSDT
+        :return: [(文件名(不含扩展名), DSL内容, 冲突列表), ...]，模板缺失时返回None
+        """
+        if merged:
+            content, collisions = cls.merge_disable_dsl([(path, method) for path in acpi_paths], parent_window)
+            if content is None:
+                return None
+            return [(cls.MERGED_DISABLE_NAME, content, collisions)]
+
         template_file = cls._get_template_path(f'disable_{method}', parent_window)
         if not template_file:
+            return None
+        with open(template_file, "r", encoding="utf-8") as f:
+            template = f.read()
+        return [
+            (cls.disable_ssdt_name(path, method), template.replace("{ADDR}", path), [])
+            for path in acpi_paths
+        ]
+
+    @classmethod
+    def disable_ssdt_name(cls, acpi_path, method):
+        """
+        单个禁用SSDT的文件名，由ACPI路径决定 (如 SB.PCI0.PEG0.PEGP -> SSDT-DISABLE-OFF-SB-PCI0-PEG0-PEGP)
+        增删或调整其他设备不会改变已有表的名称
+        """
+        return f"SSDT-DISABLE-{method.upper()}-" + re.sub(r"[^A-Za-z0-9]+", "-", acpi_path).strip("-")
+
+    @classmethod
+    def plan_ssdts(cls, jobs, output_dir):
+        """
+        预检：计算每个SSDT在输出目录中的状态，不写入任何文件
+        :param jobs: render_disable_jobs 等返回的 [(文件名, DSL内容, 冲突列表), ...]
+        :param output_dir: 输出目录
+        :return: 计划条目列表，status 为 new/changed/unchanged/foreign/conflict
+        """
+        manifest = cls._load_manifest(output_dir)
+        plan = []
+        seen = set()
+        for name, content, collisions in jobs:
+            aml_path = os.path.join(output_dir, f"{name}.aml")
+            source_hash = hashlib.sha1(content.encode("utf-8")).hexdigest()
+            record = manifest.get(name)
+            aml_size = os.path.getsize(aml_path) if os.path.exists(aml_path) else None
+
+            item = {
+                "name": name,
+                "content": content,
+                "size": len(content.encode("utf-8")),
+                "aml_size": aml_size,
+                "source_hash": source_hash,
+                "diff": "",
+                "reason": "",
+            }
+            if name in seen or collisions:
+                item["status"] = "conflict"
+                item["reason"] = "文件名重复" if name in seen else "命名冲突: " + "; ".join(collisions)
+            elif aml_size is None:
+                item["status"] = "new"
+            elif not record or record.get("aml_hash") != cls._file_hash(aml_path):
+                # 目录中的AML不是由本工具生成，或生成后被修改过
+                item["status"] = "foreign"
+                item["reason"] = "输出目录中已有同名AML且来源未知，生成将覆盖"
+            elif record.get("source_hash") == source_hash:
+                item["status"] = "unchanged"
+            else:
+                item["status"] = "changed"
+                item["diff"] = "\n".join(difflib.unified_diff(
+                    record.get("source", "").splitlines(), content.splitlines(),
+                    f"{name}.dsl (现有)", f"{name}.dsl (新)", lineterm=""
+                ))
+            seen.add(name)
+            plan.append(item)
+        return plan
+
+    @classmethod
+    def apply_plan(cls, plan, output_dir, parent_window, overwrite_foreign=False):
+        """
+        按计划写入并编译，跳过未变化和冲突的表
+        :return: (编译成功数, 跳过数, 失败数)
+        """
+        manifest = cls._load_manifest(output_dir)
+        built = skipped = failed = 0
+        for item in plan:
+            if item["status"] in ("unchanged", "conflict") or (item["status"] == "foreign" and not overwrite_foreign):
+                skipped += 1
+                continue
+
+            temp_dsl = os.path.join(output_dir, f"{item['name']}.dsl")
+            if not cls._write_temp_file(temp_dsl, item["content"], parent_window) or not cls.compile_aml(temp_dsl, parent_window):
+                failed += 1
+                continue
+            cls._cleanup_temp_files(temp_dsl)
+
+            manifest[item["name"]] = {
+                "source_hash": item["source_hash"],
+                "aml_hash": cls._file_hash(os.path.join(output_dir, f"{item['name']}.aml")),
+                "source": item["content"],
+            }
+            built += 1
+
+        cls._save_manifest(output_dir, manifest)
+        return built, skipped, failed
+
+    @classmethod
+    def build_property_ssdt(cls, device_properties, parent_window):
+        """
+        为多个设备生成单个_DSM属性注入SSDT
+        :param device_properties: {ACPI路径: {属性名: 值}}，值可为 str / int / bytes
+        :param parent_window: 父窗口对象
+        :return: 是否成功
+        """
+        try:
+            content = cls.generate_property_dsl(device_properties)
+        except ValueError as e:
+            QMessageBox.warning(parent_window, "参数错误", str(e))
             return False
 
-        # 选择输出目录
         output_dir = cls._select_output_dir(parent_window)
         if not output_dir:
             return False
 
-        success_count = 0
-        for i, path in enumerate(acpi_paths, 1):
-            # 读取并修改模板
-            with open(template_file, "r", encoding="utf-8") as f:
-                content = f.read().replace("{ADDR}", path)
+        output_dsl = os.path.join(output_dir, f"{cls.PROPERTY_SSDT_NAME}.dsl")
+        if not cls._write_temp_file(output_dsl, content, parent_window):
+            return False
 
-            # 生成临时文件
-            temp_dsl = os.path.join(output_dir, f"SSDT-DISABLE-{method.upper()}-{i}.dsl")
-            if not cls._write_temp_file(temp_dsl, content, parent_window):
-                continue
+        if not cls.compile_aml(output_dsl, parent_window):
+            return False
+        cls._cleanup_temp_files(output_dsl)
 
-            # 编译AML
-            if cls.compile_aml(temp_dsl, parent_window):
-                success_count += 1
-                cls._cleanup_temp_files(temp_dsl)
+        cls._show_success(parent_window, output_dir,
+            f"已为 {len(device_properties)} 个设备生成 {cls.PROPERTY_SSDT_NAME}.aml")
+        return True
 
-        # 结果处理
-        if success_count > 0:
-            cls._show_success(parent_window, output_dir, f"成功生成 {success_count}/{len(acpi_paths)} 个SSDT文件")
-            return True
-        return False
+    @classmethod
+    def generate_property_dsl(cls, device_properties):
+        """
+        生成_DSM属性注入SSDT源码
+        :param device_properties: {ACPI路径: {属性名: 值}}
+        :return: DSL内容
+        """
+        if not device_properties:
+            raise ValueError("没有需要注入的设备属性！")
+
+        externals = []
+        methods = []
+        for path, properties in device_properties.items():
+            if not path or not properties:
+                raise ValueError(f"设备 {path or '(空路径)'} 没有属性")
+
+            entries = []
+            for name, value in properties.items():
+                entries.append(f'            "{cls._asl_string(name)}",')
+                entries.extend(f"            {line}" for line in cls.encode_dsm_value(value))
+                entries[-1] += ","
+            entries[-1] = entries[-1].rstrip(",")
+
+            externals.append(f"    External (_{path}, DeviceObj)")
+            methods.append(
+                f"    Method (_{path}._DSM, 4, NotSerialized)  // _DSM: Device-Specific Method\n"
+                "    {\n"
+                '        If ((!Arg2 || !_OSI ("Darwin")))\n'
+                "        {\n"
+                "            Return (Buffer (One)\n"
+                "            {\n"
+                "                 0x03\n"
+                "            })\n"
+                "        }\n"
+                "\n"
+                f"        Return (Package (0x{len(properties) * 2:02X})\n"
+                "        {\n"
+                + "\n".join(entries) + "\n"
+                "        })\n"
+                "    }"
+            )
+
+        return (
+            f'DefinitionBlock ("", "SSDT", 2, "hack", "{cls.PROPERTY_OEM_TABLE_ID}", 0x00000000)\n'
+            "{\n"
+            + "\n".join(externals)
+            + "\n\n"
+            + "\n\n".join(methods)
+            + "\n}\n"
+        )
+
+    @classmethod
+    def encode_dsm_value(cls, value):
+        """
+        将属性值编码为ASL数据对象
+        str -> 以NUL结尾的字符串Buffer；int -> 4字节小端Buffer（如layout-id）；bytes -> 原样Buffer
+        :return: ASL代码行列表
+        """
+        if isinstance(value, bool) or not isinstance(value, (str, int, bytes, bytearray)):
+            raise ValueError(f"不支持的属性值类型: {type(value).__name__}")
+
+        if isinstance(value, str):
+            return ["Buffer ()", "{", f'    "{cls._asl_string(value)}"', "}"]
+
+        if isinstance(value, int):
+            if not 0 <= value <= 0xFFFFFFFF:
+                raise ValueError(f"整数属性超出32位范围: {value}")
+            value = value.to_bytes(4, "little")
+
+        if not value:
+            return ["Buffer (Zero) {}"]
+        lines = [f"Buffer (0x{len(value):02X})", "{"]
+        for i in range(0, len(value), 8):
+            lines.append("    " + ", ".join(f"0x{b:02X}" for b in value[i:i + 8]) + ("," if i + 8 < len(value) else ""))
+        lines.append("}")
+        return lines
+
+    @classmethod
+    def parse_property_value(cls, value, value_type=None):
+        """
+        解析清单/界面中的属性值
+        :param value: 原始值；字符串形式 <0900A53E> 表示字节数据，0x开头或纯数字表示整数
+        :param value_type: 强制类型 (string/integer/data)，为None时自动识别
+        """
+        if not isinstance(value, str):
+            return value
+        text = value.strip()
+        hex_match = re.fullmatch(r"<([0-9A-Fa-f\s]*)>", text)
+        if value_type == "data" or (value_type is None and hex_match):
+            digits = re.sub(r"\s", "", hex_match.group(1) if hex_match else text)
+            if len(digits) % 2 or not re.fullmatch(r"[0-9A-Fa-f]*", digits):
+                raise ValueError(f"无效的十六进制数据: {value}")
+            return bytes.fromhex(digits)
+        if value_type == "integer" or (value_type is None and re.fullmatch(r"0[xX][0-9A-Fa-f]+|\d+", text)):
+            try:
+                return int(text, 0)
+            except ValueError:
+                raise ValueError(f"无效的整数: {value}")
+        return value
+
+    @classmethod
+    def load_property_inventory(cls, file_path):
+        """
+        读取批量属性清单 (JSON)
+        格式: {"SB.PCI0.GFX0": {"AAPL,ig-platform-id": "<0900A53E>", "model": "..."}, ...}
+        :return: {ACPI路径: {属性名: 值}}
+        """
+        with open(file_path, "r", encoding="utf-8") as f:
+            inventory = json.load(f)
+        if not isinstance(inventory, dict):
+            raise ValueError("清单顶层必须是以ACPI路径为键的对象")
+
+        device_properties = {}
+        for path, properties in inventory.items():
+            if not isinstance(properties, dict):
+                raise ValueError(f"{path} 的属性必须是对象")
+            device_properties[path.strip().lstrip("\\_")] = {
+                name: cls.parse_property_value(value) for name, value in properties.items()
+            }
+        return device_properties
 
     @classmethod
     def build_gpu_spoof_ssdt(cls, acpi_path, device_id, model_name=None, is_rx6500=False, parent_window=None):
@@ -168,32 +510,114 @@ class SSDTBuilder:
         return False
 
     @classmethod
-    def compile_aml(cls, dsl_path, parent_window):
-        """编译DSL为AML"""
+    def load_namespace(cls, table_paths, parent_window):
+        """
+        加载目标机器的DSDT/SSDT转储，之后生成的SSDT会在编译前校验
+        :param table_paths: 转储文件路径列表 (AML或DSL)
+        :param parent_window: 父窗口对象
+        :return: 是否成功
+        """
+        try:
+            cls.namespace = AcpiNamespace.from_tables(table_paths)
+        except Exception as e:
+            QMessageBox.critical(parent_window, "错误", f"解析ACPI转储失败: {str(e)}")
+            return False
+
+        msg = f"已加载 {len(cls.namespace.tables)} 张表:\n" + "\n".join(cls.namespace.tables)
+        if cls.namespace.skipped:
+            msg += f"\n\n{cls.namespace.skipped} 处内容无法解析已跳过，校验结果可能不完整"
+        QMessageBox.information(parent_window, "加载完成", msg)
+        return True
+
+    @classmethod
+    def validate_against_namespace(cls, dsl_path, parent_window):
+        """
+        根据已加载的命名空间校验SSDT，未加载时直接通过
+        :return: 是否继续编译
+        """
+        if cls.namespace is None:
+            return True
+
+        diagnostics = validate_file(cls.namespace, dsl_path)
+        errors = [d for d in diagnostics if d[0] == "error"]
+        if not errors:
+            return True
+
+        detail = "\n".join(f"{'错误' if level == 'error' else '警告'}: {name} - {message}"
+                           for level, name, message in diagnostics)
+        reply = QMessageBox.question(
+            parent_window, "命名空间校验",
+            f"{os.path.basename(dsl_path)} 引用了目标机器上不存在的对象:\n{detail}\n\n仍然继续编译？",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        return reply == QMessageBox.Yes
+
+    @classmethod
+    def get_compiler_path(cls):
+        """
+        获取编译器命令
+        优先使用 compiler_path / 环境变量 IASL_PATH，其次为内置iasl.exe，最后查找PATH中的iasl
+        """
+        if cls.compiler_path:
+            return cls.compiler_path
+        if os.environ.get("IASL_PATH"):
+            return os.environ["IASL_PATH"]
         iasl_path = resource_path(os.path.join(cls.RESOURCES_DIR, "iasl", "iasl.exe"))
-        
-        if not os.path.exists(iasl_path):
+        if os.name != "nt" and not os.path.exists(iasl_path):
+            return shutil.which("iasl") or iasl_path
+        return iasl_path
+
+    @classmethod
+    def compile_aml(cls, dsl_path, parent_window, timeout=None):
+        """
+        编译DSL为AML
+        编译在后台线程中进行，输出实时写入日志，等待期间界面保持响应并可取消
+        """
+        iasl_path = cls.get_compiler_path()
+
+        if not cls.validate_against_namespace(dsl_path, parent_window):
+            return False
+
+        if isinstance(iasl_path, str) and not os.path.exists(iasl_path):
             QMessageBox.critical(parent_window, "错误", 
                 f"未找到IASL编译器！请确认 {iasl_path} 存在")
             return False
 
-        try:
-            result = subprocess.run(
-                [iasl_path, dsl_path],
-                capture_output=True,
-                text=True,
-                cwd=os.path.dirname(dsl_path)
-            )
-            
-            if result.returncode != 0:
-                error_msg = f"编译失败:\n{result.stderr}" if result.stderr else "未知错误"
-                QMessageBox.critical(parent_window, "编译错误", error_msg)
-                return False
+        worker = CompileWorker(iasl_path, dsl_path, timeout or cls.COMPILE_TIMEOUT)
+        output = []
+        worker.log_update.connect(output.append)
+        if cls.log_handler:
+            worker.log_update.connect(cls.log_handler)
+
+        progress = QProgressDialog(f"正在编译 {os.path.basename(dsl_path)}...", "取消", 0, 0, parent_window)
+        progress.setWindowTitle("编译SSDT")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(500)
+        progress.canceled.connect(worker.stop)
+        worker.log_update.connect(lambda line: progress.setLabelText(line[:120]))
+
+        # 局部事件循环：等待编译结束的同时继续处理界面事件
+        loop = QEventLoop()
+        worker.compile_finished.connect(lambda *_: loop.quit())
+        worker.start()
+        loop.exec()
+        worker.wait()
+        progress.close()
+
+        if worker.status == "ok":
             return True
-            
-        except Exception as e:
-            QMessageBox.critical(parent_window, "异常错误", f"编译器执行出错: {str(e)}")
-            return False
+
+        detail = "\n".join(output[-30:]) or "未知错误"
+        if worker.status == "canceled":
+            QMessageBox.information(parent_window, "已取消", "编译已取消")
+        elif worker.status == "timeout":
+            QMessageBox.critical(parent_window, "编译超时",
+                f"编译超过 {worker.timeout} 秒未完成，已终止:\n{detail}")
+        elif worker.status == "error":
+            QMessageBox.critical(parent_window, "异常错误", f"编译器执行出错: {worker.message}")
+        else:
+            QMessageBox.critical(parent_window, "编译错误", f"编译失败:\n{detail}")
+        return False
 
     # ======================== 私有方法 ========================
     @classmethod
@@ -280,6 +704,76 @@ class SSDTBuilder:
         except:
             pass
 
+    @classmethod
+    def _split_definition_block(cls, content):
+        """
+        拆分模板为External声明与正文
+        :return: (External行列表, DefinitionBlock内的其余正文)
+        """
+        start = content.index("{", content.index("DefinitionBlock"))
+        end = content.rindex("}")
+        externals = []
+        body_lines = []
+        for line in content[start + 1:end].splitlines():
+            if re.match(r"\s*External\s*\(", line):
+                externals.append(line.strip())
+            elif line.strip() or body_lines:
+                body_lines.append(line.rstrip())
+        return externals, "\n".join(body_lines)
+
+    @classmethod
+    def _file_hash(cls, file_path):
+        """计算文件SHA1，文件不存在时返回None"""
+        try:
+            with open(file_path, "rb") as f:
+                return hashlib.sha1(f.read()).hexdigest()
+        except OSError:
+            return None
+
+    @classmethod
+    def _load_manifest(cls, output_dir):
+        """读取输出目录对应的生成清单"""
+        return cls._load_all_manifests().get(cls._manifest_key(output_dir), {})
+
+    @classmethod
+    def _load_all_manifests(cls):
+        try:
+            with open(cls.SSDT_MANIFEST, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    @classmethod
+    def _manifest_key(cls, output_dir):
+        return os.path.normcase(os.path.abspath(output_dir))
+
+    @classmethod
+    def _save_manifest(cls, output_dir, manifest):
+        """保存输出目录对应的生成清单"""
+        manifests = cls._load_all_manifests()
+        manifests[cls._manifest_key(output_dir)] = manifest
+        try:
+            with open(cls.SSDT_MANIFEST, "w", encoding="utf-8") as f:
+                json.dump(manifests, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f"保存生成清单失败: {str(e)}")
+
+    @classmethod
+    def _asl_string(cls, text):
+        """检查文本能否作为ASL字符串字面量"""
+        if '"' in text or "\\" in text or not text.isascii() or not text.isprintable():
+            raise ValueError(f"属性名/值只能包含可打印ASCII字符且不能含引号或反斜杠: {text}")
+        return text
+
+    @classmethod
+    def _unique_seg(cls, seg, defined):
+        """为根作用域下重名的设备生成新的4字符名称 (如 DGPU -> DG01)"""
+        for i in range(1, 256):
+            candidate = f"{seg[:2]}{i:02X}"
+            if "\\" + candidate not in defined:
+                return candidate
+        raise ValueError(f"无法为 {seg} 分配唯一名称")
+
     @classmethod
     def _show_success(cls, parent_window, output_dir, message=None):
         """显示成功提示"""
@@ -352,6 +846,314 @@ class RX6500SpoofDialog(QDialog):
             parent_window=self
         )
 
+class MergedDisableDialog(QDialog):
+    """多设备合并屏蔽对话框"""
+    METHODS = [("S3", "s3"), ("OFF", "off"), ("IOName", "ioname")]
+
+    def __init__(self, parent=None, acpi_paths=None):
+        super().__init__(parent)
+        self.acpi_paths = acpi_paths or []
+        self.setup_ui()
+
+    def setup_ui(self):
+        self.setWindowTitle("合并屏蔽设置")
+        self.setMinimumSize(600, 360)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("勾选每个路径需要的屏蔽方式，所有目标将合并生成一个SSDT:"))
+
+        # 路径 x 方法 勾选表
+        self.target_table = QTableWidget(len(self.acpi_paths), 1 + len(self.METHODS))
+        self.target_table.setHorizontalHeaderLabels(["ACPI路径"] + [text for text, _ in self.METHODS])
+        self.target_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        for row, path in enumerate(self.acpi_paths):
+            path_item = QTableWidgetItem(path)
+            path_item.setFlags(path_item.flags() & ~Qt.ItemIsEditable)
+            self.target_table.setItem(row, 0, path_item)
+            for col, (_, method) in enumerate(self.METHODS, 1):
+                check_item = QTableWidgetItem()
+                check_item.setFlags(Qt.ItemIsUserCheckable | Qt.ItemIsEnabled)
+                check_item.setCheckState(Qt.Checked if method == "off" else Qt.Unchecked)
+                self.target_table.setItem(row, col, check_item)
+        layout.addWidget(self.target_table)
+
+        # 操作按钮
+        btn_layout = QHBoxLayout()
+        generate_btn = QPushButton("生成合并SSDT")
+        generate_btn.clicked.connect(self.generate_ssdt)
+        btn_layout.addWidget(generate_btn)
+
+        cancel_btn = QPushButton("取消")
+        cancel_btn.clicked.connect(self.reject)
+        btn_layout.addWidget(cancel_btn)
+
+        layout.addLayout(btn_layout)
+
+    def get_targets(self):
+        """获取勾选的 (ACPI路径, 屏蔽方法) 列表"""
+        targets = []
+        for row, path in enumerate(self.acpi_paths):
+            for col, (_, method) in enumerate(self.METHODS, 1):
+                if self.target_table.item(row, col).checkState() == Qt.Checked:
+                    targets.append((path, method))
+        return targets
+
+    def generate_ssdt(self):
+        """生成合并SSDT"""
+        if SSDTBuilder.build_merged_disable_ssdt(self.get_targets(), self):
+            self.accept()
+
+class SSDTPlanDialog(QDialog):
+    """SSDT生成预检对话框：列出将生成的表及其与输出目录的差异，只重建有变化的表"""
+    STATUS_TEXT = {
+        "new": ("新建", "#2E7D32"),
+        "changed": ("有变化", "#E65100"),
+        "unchanged": ("未变化(跳过)", "#616161"),
+        "foreign": ("覆盖未知文件", "#C62828"),
+        "conflict": ("冲突(跳过)", "#C62828"),
+    }
+    METHODS = [("S3休眠屏蔽", "s3"), ("OFF屏蔽", "off"), ("IOName屏蔽", "ioname")]
+
+    def __init__(self, parent=None, acpi_paths=None, method="off"):
+        super().__init__(parent)
+        self.acpi_paths = acpi_paths or []
+        self.method = method
+        self.output_dir = ""
+        self.plan = []
+        self.setup_ui()
+
+    def setup_ui(self):
+        self.setWindowTitle("SSDT生成预检")
+        self.setMinimumSize(760, 520)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(f"目标路径 ({len(self.acpi_paths)}):\n" + "\n".join(self.acpi_paths)))
+
+        # 参数
+        option_layout = QHBoxLayout()
+        self.method_combo = QComboBox()
+        for text, method in self.METHODS:
+            self.method_combo.addItem(text, method)
+        self.method_combo.setCurrentIndex(next((i for i, (_, m) in enumerate(self.METHODS) if m == self.method), 0))
+        self.method_combo.currentIndexChanged.connect(self.refresh_plan)
+        option_layout.addWidget(QLabel("屏蔽方式:"))
+        option_layout.addWidget(self.method_combo)
+
+        self.merged_check = QCheckBox("合并为单个SSDT")
+        self.merged_check.toggled.connect(self.refresh_plan)
+        option_layout.addWidget(self.merged_check)
+
+        self.overwrite_check = QCheckBox("覆盖来源未知的AML")
+        option_layout.addWidget(self.overwrite_check)
+        option_layout.addStretch()
+
+        dir_btn = QPushButton("选择输出目录")
+        dir_btn.clicked.connect(self.select_output_dir)
+        option_layout.addWidget(dir_btn)
+        layout.addLayout(option_layout)
+
+        self.dir_label = QLabel("输出目录: (未选择)")
+        layout.addWidget(self.dir_label)
+
+        # 计划表
+        self.plan_table = QTableWidget(0, 4)
+        self.plan_table.setHorizontalHeaderLabels(["文件", "DSL大小", "现有AML", "状态"])
+        self.plan_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.plan_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.plan_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.plan_table.currentCellChanged.connect(lambda row, *_: self.show_diff(row))
+        layout.addWidget(self.plan_table, 3)
+
+        self.diff_text = QTextEdit()
+        self.diff_text.setReadOnly(True)
+        self.diff_text.setFont(QFont("Consolas", 10))
+        layout.addWidget(self.diff_text, 2)
+
+        # 操作按钮
+        btn_layout = QHBoxLayout()
+        self.summary_label = QLabel("")
+        btn_layout.addWidget(self.summary_label)
+        btn_layout.addStretch()
+
+        self.apply_btn = QPushButton("生成有变化的表")
+        self.apply_btn.setEnabled(False)
+        self.apply_btn.clicked.connect(self.apply_plan)
+        btn_layout.addWidget(self.apply_btn)
+
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.reject)
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+
+    def select_output_dir(self):
+        output_dir = SSDTBuilder._select_output_dir(self)
+        if output_dir:
+            self.output_dir = output_dir
+            self.dir_label.setText(f"输出目录: {output_dir}")
+            self.refresh_plan()
+
+    def refresh_plan(self):
+        """重新计算计划（只读，不写入任何文件）"""
+        if not self.output_dir:
+            return
+        jobs = SSDTBuilder.render_disable_jobs(
+            self.acpi_paths, self.method_combo.currentData(), self.merged_check.isChecked(), self
+        )
+        self.plan = SSDTBuilder.plan_ssdts(jobs or [], self.output_dir)
+
+        self.plan_table.setRowCount(len(self.plan))
+        for row, item in enumerate(self.plan):
+            text, color = self.STATUS_TEXT[item["status"]]
+            values = [
+                f"{item['name']}.aml",
+                f"{item['size']} B",
+                f"{item['aml_size']} B" if item["aml_size"] is not None else "-",
+                text,
+            ]
+            for col, value in enumerate(values):
+                cell = QTableWidgetItem(value)
+                if col == 3:
+                    cell.setForeground(QColor(color))
+                self.plan_table.setItem(row, col, cell)
+
+        pending = sum(item["status"] in ("new", "changed", "foreign") for item in self.plan)
+        self.summary_label.setText(f"共 {len(self.plan)} 个表，{pending} 个需要生成")
+        self.apply_btn.setEnabled(pending > 0)
+        self.diff_text.clear()
+
+    def show_diff(self, row):
+        """显示所选表与现有文件的差异"""
+        if not 0 <= row < len(self.plan):
+            return
+        item = self.plan[row]
+        if item["status"] == "changed":
+            self.diff_text.setPlainText(item["diff"])
+        elif item["reason"]:
+            self.diff_text.setPlainText(item["reason"] + "\n\n" + item["content"])
+        else:
+            self.diff_text.setPlainText(item["content"])
+
+    def apply_plan(self):
+        """只编译新建/有变化的表"""
+        built, skipped, failed = SSDTBuilder.apply_plan(
+            self.plan, self.output_dir, self, self.overwrite_check.isChecked()
+        )
+        self.refresh_plan()
+        if built:
+            SSDTBuilder._show_success(self, self.output_dir, f"生成 {built} 个，跳过 {skipped} 个，失败 {failed} 个")
+        else:
+            QMessageBox.information(self, "完成", f"没有生成新的表（跳过 {skipped} 个，失败 {failed} 个）")
+
+class PropertyInjectionDialog(QDialog):
+    """通用_DSM属性注入对话框（支持多设备批量注入）"""
+    VALUE_TYPES = [("自动识别", None), ("字符串", "string"), ("整数", "integer"), ("数据", "data")]
+
+    def __init__(self, parent=None, acpi_paths=None):
+        super().__init__(parent)
+        self.acpi_paths = acpi_paths or []
+        self.setup_ui()
+
+    def setup_ui(self):
+        self.setWindowTitle("_DSM属性注入")
+        self.setMinimumSize(720, 420)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("每行一个属性，同一路径的属性合并到同一个_DSM；数据写作 <0900A53E>，整数写作 0x0B 或 11"))
+
+        self.property_table = QTableWidget(0, 4)
+        self.property_table.setHorizontalHeaderLabels(["ACPI路径", "属性名", "类型", "值"])
+        self.property_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
+        layout.addWidget(self.property_table)
+        for path in self.acpi_paths:
+            self.add_row(path)
+
+        # 操作按钮
+        btn_layout = QHBoxLayout()
+        add_btn = QPushButton("添加属性")
+        add_btn.clicked.connect(lambda: self.add_row(self.acpi_paths[0] if self.acpi_paths else ""))
+        btn_layout.addWidget(add_btn)
+
+        remove_btn = QPushButton("删除所选")
+        remove_btn.clicked.connect(self.remove_selected_rows)
+        btn_layout.addWidget(remove_btn)
+
+        import_btn = QPushButton("从清单导入")
+        import_btn.clicked.connect(self.import_inventory)
+        btn_layout.addWidget(import_btn)
+
+        btn_layout.addStretch()
+
+        generate_btn = QPushButton("生成SSDT")
+        generate_btn.clicked.connect(self.generate_ssdt)
+        btn_layout.addWidget(generate_btn)
+
+        cancel_btn = QPushButton("取消")
+        cancel_btn.clicked.connect(self.reject)
+        btn_layout.addWidget(cancel_btn)
+
+        layout.addLayout(btn_layout)
+
+    def add_row(self, path="", name="", value="", value_type=None):
+        row = self.property_table.rowCount()
+        self.property_table.insertRow(row)
+        self.property_table.setItem(row, 0, QTableWidgetItem(path))
+        self.property_table.setItem(row, 1, QTableWidgetItem(name))
+        type_combo = QComboBox()
+        for text, key in self.VALUE_TYPES:
+            type_combo.addItem(text, key)
+        type_combo.setCurrentIndex(next(i for i, (_, key) in enumerate(self.VALUE_TYPES) if key == value_type))
+        self.property_table.setCellWidget(row, 2, type_combo)
+        self.property_table.setItem(row, 3, QTableWidgetItem(value))
+
+    def remove_selected_rows(self):
+        for row in sorted({index.row() for index in self.property_table.selectedIndexes()}, reverse=True):
+            self.property_table.removeRow(row)
+
+    def import_inventory(self):
+        """从JSON清单批量导入"""
+        file_path, _ = QFileDialog.getOpenFileName(self, "选择属性清单", "", "JSON Files (*.json);;All Files (*)")
+        if not file_path:
+            return
+        try:
+            device_properties = SSDTBuilder.load_property_inventory(file_path)
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"读取清单失败: {str(e)}")
+            return
+
+        for path, properties in device_properties.items():
+            for name, value in properties.items():
+                if isinstance(value, (bytes, bytearray)):
+                    self.add_row(path, name, f"<{value.hex().upper()}>", "data")
+                elif isinstance(value, int):
+                    self.add_row(path, name, f"0x{value:X}", "integer")
+                else:
+                    self.add_row(path, name, str(value), "string")
+
+    def get_device_properties(self):
+        """汇总表格为 {ACPI路径: {属性名: 值}}"""
+        device_properties = {}
+        for row in range(self.property_table.rowCount()):
+            path = (self.property_table.item(row, 0).text() if self.property_table.item(row, 0) else "").strip().lstrip("\\_")
+            name = (self.property_table.item(row, 1).text() if self.property_table.item(row, 1) else "").strip()
+            value = self.property_table.item(row, 3).text() if self.property_table.item(row, 3) else ""
+            if not path and not name:
+                continue
+            if not path or not name:
+                raise ValueError(f"第{row + 1}行缺少ACPI路径或属性名")
+            value_type = self.property_table.cellWidget(row, 2).currentData()
+            device_properties.setdefault(path, {})[name] = SSDTBuilder.parse_property_value(value, value_type)
+        return device_properties
+
+    def generate_ssdt(self):
+        """生成属性注入SSDT"""
+        try:
+            device_properties = self.get_device_properties()
+        except ValueError as e:
+            QMessageBox.warning(self, "参数错误", str(e))
+            return
+        if SSDTBuilder.build_property_ssdt(device_properties, self):
+            self.accept()
+
 # ======================== 路径转义工具函数 ========================
 def convert_pci_path(win_path):
     """转换 Windows PCI 路径为 ACPI 格式"""
@@ -504,6 +1306,101 @@ class DeviceLoaderThread(QThread):
         self.quit()
         self.wait(2000)  # 等待线程结束
 
+class CompileWorker(QThread):
+    """后台编译线程：逐行转发编译器输出，支持超时与取消"""
+    log_update = Signal(str)
+    compile_finished = Signal(bool, str)
+
+    def __init__(self, compiler, dsl_path, timeout=60, parent=None):
+        """
+        :param compiler: 编译器可执行文件路径，或命令列表 (如 [sys.executable, "stub.py"])
+        :param dsl_path: 待编译的DSL文件
+        :param timeout: 超时秒数
+        """
+        super().__init__(parent)
+        self.compiler = compiler
+        self.dsl_path = dsl_path
+        self.timeout = timeout
+        self.process = None
+        self.status = None  # ok / failed / timeout / canceled / error
+        self.message = ""
+        # 超时计时器、取消和正常结束分别在不同线程中设置结果，只有第一个生效
+        self._status_lock = threading.Lock()
+
+    def run(self):
+        command = list(self.compiler) if isinstance(self.compiler, (list, tuple)) else [self.compiler]
+        command.append(self.dsl_path)
+        self.log_update.emit(f"=== 开始编译 {os.path.basename(self.dsl_path)} ===")
+
+        timer = threading.Timer(self.timeout, self._on_timeout)
+        timer.daemon = True
+        try:
+            kwargs = {}
+            if os.name == "nt":
+                startupinfo = subprocess.STARTUPINFO()
+                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+                startupinfo.wShowWindow = subprocess.SW_HIDE
+                kwargs["startupinfo"] = startupinfo
+
+            self.process = subprocess.Popen(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                stdin=subprocess.DEVNULL,
+                text=True,
+                encoding='utf-8',
+                errors='replace',
+                cwd=os.path.dirname(self.dsl_path) or None,
+                **kwargs
+            )
+            timer.start()
+
+            # 逐行读取，进程被终止时读到EOF退出
+            for line in self.process.stdout:
+                line = line.rstrip()
+                if line:
+                    self.log_update.emit(line)
+            returncode = self.process.wait()
+
+            self._set_status("ok" if returncode == 0 else "failed")
+            self.message = f"返回码 {returncode}"
+        except Exception as e:
+            self._set_status("error")
+            self.message = str(e)
+            self.log_update.emit(f"[异常] {str(e)}")
+        finally:
+            timer.cancel()
+            self.terminate_process()
+
+        self.log_update.emit(f"=== 编译结束: {self.status} ({self.message}) ===")
+        self.compile_finished.emit(self.status == "ok", self.message)
+
+    def _set_status(self, status):
+        """记录编译结果，已有结果时不覆盖"""
+        with self._status_lock:
+            if self.status is not None:
+                return False
+            self.status = status
+            return True
+
+    def _on_timeout(self):
+        if self._set_status("timeout"):
+            self.terminate_process()
+
+    def terminate_process(self):
+        """确保终止编译器进程"""
+        if self.process and self.process.poll() is None:
+            try:
+                self.process.terminate()
+                self.process.wait(timeout=2)
+            except Exception:
+                self.process.kill()
+
+    def stop(self):
+        """取消编译"""
+        if self._set_status("canceled"):
+            self.terminate_process()
+
 def resource_path(relative_path):
     """获取资源的绝对路径"""
     try:
@@ -592,7 +1489,9 @@ class SSDTFunctionDialog(QDialog):
         acpi_paths = [p for p in acpi_paths if p]
         
         if self.method.startswith("disable"):
-            SSDTBuilder.build_disable_ssdt(acpi_paths, self.method.split('_')[-1], self)
+            # 先预检，确认后只生成有变化的表
+            dialog = SSDTPlanDialog(self, acpi_paths, self.method.split('_')[-1])
+            dialog.exec()
         else:
             device_id = self.device_id_input.text().strip()
             model_name = getattr(self, 'model_input', None) and self.model_input.text().strip()
@@ -620,6 +1519,8 @@ class DeviceLocationViewer(QMainWindow):
         # 初始化日志文件路径
         self.log_file_path = os.path.join(tempfile.gettempdir(), "acpi_helper_log.txt")
         self.ensure_log_file()
+        # SSDT编译输出实时写入日志
+        SSDTBuilder.log_handler = self.append_compile_log
 
     def closeEvent(self, event):
         """重写关闭事件以确保线程和进程被正确清理"""
@@ -907,6 +1808,11 @@ class DeviceLocationViewer(QMainWindow):
         except Exception as e:
             print(f"写入日志失败: {str(e)}")
 
+    def append_compile_log(self, text):
+        """追加编译器输出到日志"""
+        self.log_button.show()
+        self.append_log(text)
+
     def update_progress(self, value, message):
         """更新进度条"""
         self.progress_bar.setValue(value)
@@ -971,6 +1877,11 @@ class DeviceLocationViewer(QMainWindow):
         for text, method in disable_types:
             action = disable_menu.addAction(text)
             action.triggered.connect(lambda _, m=method: self.show_ssdt_dialog(m))
+        disable_menu.addSeparator()
+        merged_action = disable_menu.addAction("🧩 多设备合并屏蔽 (单个SSDT)")
+        merged_action.triggered.connect(self.show_merged_disable_dialog)
+        plan_action = disable_menu.addAction("🗂 多设备批量预检生成")
+        plan_action.triggered.connect(self.show_plan_dialog)
     
         # 仿冒设备子菜单
         spoof_menu = ssdt_menu.addMenu("🎭 仿冒设备")
@@ -982,6 +1893,26 @@ class DeviceLocationViewer(QMainWindow):
             action = spoof_menu.addAction(text)
             action.triggered.connect(lambda _, m=method: self.show_ssdt_dialog(m))
 
+        # 通用属性注入
+        property_action = ssdt_menu.addAction("🧬 _DSM属性注入")
+        property_action.triggered.connect(self.show_property_dialog)
+
+        # 命名空间校验
+        ssdt_menu.addSeparator()
+        namespace_action = ssdt_menu.addAction("📂 加载DSDT/SSDT转储用于校验")
+        namespace_action.triggered.connect(self.load_acpi_tables)
+
+    def load_acpi_tables(self):
+        """选择目标机器的ACPI转储文件并建立命名空间索引"""
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self,
+            "选择DSDT/SSDT转储",
+            os.path.expanduser("~/Desktop"),
+            "ACPI Tables (*.aml *.dat *.bin *.dsl);;All Files (*)"
+        )
+        if file_paths:
+            SSDTBuilder.load_namespace(file_paths, self)
+
     # 修改后的路径转义处理（确保使用ACPI转义路径）
     def show_ssdt_dialog(self, method):
         """显示SSDT功能对话框"""
@@ -1003,6 +1934,66 @@ class DeviceLocationViewer(QMainWindow):
             dialog = SSDTFunctionDialog(self, device, method)
         dialog.exec()
     
+    def show_property_dialog(self):
+        """显示_DSM属性注入对话框（可不选设备，直接导入清单）"""
+        acpi_paths = []
+        if self.device_table.selectionModel().selectedRows():
+            for device in self.get_selected_devices():
+                paths = [convert_acpi_path(p) for p in device.get("LocationPaths", [])]
+                paths = [p for p in paths if p]
+                if paths and paths[0] not in acpi_paths:
+                    acpi_paths.append(paths[0])
+
+        dialog = PropertyInjectionDialog(self, acpi_paths)
+        dialog.exec()
+
+    def get_selected_acpi_paths(self):
+        """获取所有选中设备的ACPI路径（去重，保持顺序）"""
+        acpi_paths = []
+        for device in self.get_selected_devices():
+            for p in device.get("LocationPaths", []):
+                path = convert_acpi_path(p)
+                if path and path not in acpi_paths:
+                    acpi_paths.append(path)
+        return acpi_paths
+
+    def show_plan_dialog(self):
+        """显示多设备批量预检对话框"""
+        acpi_paths = self.get_selected_acpi_paths()
+        if not acpi_paths:
+            QMessageBox.warning(self, "错误", "所选设备没有有效的ACPI路径！")
+            return
+
+        dialog = SSDTPlanDialog(self, acpi_paths)
+        dialog.exec()
+
+    def show_merged_disable_dialog(self):
+        """显示多设备合并屏蔽对话框"""
+        acpi_paths = self.get_selected_acpi_paths()
+        if not acpi_paths:
+            QMessageBox.warning(self, "错误", "所选设备没有有效的ACPI路径！")
+            return
+
+        dialog = MergedDisableDialog(self, acpi_paths)
+        dialog.exec()
+
+    def get_selected_devices(self):
+        """获取表格中所有选中的设备信息（支持多选）"""
+        rows = sorted({index.row() for index in self.device_table.selectionModel().selectedRows()})
+        if not rows and self.device_table.currentRow() >= 0:
+            rows = [self.device_table.currentRow()]
+        if not rows:
+            QMessageBox.warning(self, "提示", "请先在表格中选择设备！")
+            return []
+
+        devices = []
+        for row in rows:
+            device_name = self.device_table.item(row, 0).text()
+            device = next((d for d in self.devices if d["DeviceName"] == device_name), None)
+            if device:
+                devices.append(device)
+        return devices
+
     def get_selected_device(self):
         """获取当前选中的设备信息"""
         if self.device_table.currentRow() >= 0:
@@ -13,7 +13,13 @@ import PySimpleGUI as sg
 import re
 import os
 from pathlib import Path
-from typing import Dict, Tuple, List
+from typing import Tuple, List
+
+from support_list import (
+    EditSession, StreamingImport, ImportCancelled, BulkEdit, RedundancyAnalyzer, Diagnostic, Transaction,
+    atomic_write, validate_list, apply_fixes, load_entries, diff_entries, merge3
+)
+from pci_ids import PciIdsIndex, default_path as pci_ids_default_path
 
 # 定义支持文件列表及对应的颜色标签
 SUPPORT_FILES = {
@@ -28,68 +34,6 @@ for file, _ in SUPPORT_FILES.values():
     if not os.path.exists(file):
         Path(file).touch()
 
-class ListFileValidator:
-    """列表文件格式验证器"""
-    @staticmethod
-    def is_valid_entry(line: str, file_type: str) -> Tuple[bool, str]:
-        """验证单行条目是否有效"""
-        line = line.strip()
-        if not line or line.startswith("#"):
-            return True, ""
-        
-        if "=" not in line:
-            return False, "缺少等号分隔符"
-        
-        key, value = line.split("=", 1)
-        key = key.strip()
-        value = value.strip()
-        
-        # 硬盘支持信息验证规则
-        if file_type == "硬盘支持信息":
-            if not key:
-                return False, "关键词不能为空"
-            # 允许任意格式的值
-            return True, ""
-        
-        # 其他支持信息验证规则
-        if not key.endswith(('.info', '.kext')):
-            if not re.match(r'^[0-9A-Fa-f]{4}&[0-9A-Fa-f]{4}$', key):
-                return False, f"无效设备ID格式: {key}"
-            if value and value not in ('0', '1'):
-                return False, "状态值必须是0或1"
-        
-        return True, ""
-
-    @staticmethod
-    def parse_file(content: str, file_type: str) -> Dict[str, dict]:
-        """解析文件内容为结构化数据"""
-        result = {}
-        for line in content.splitlines():
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-        
-            if "=" not in line:
-                continue
-            
-            key, value = line.split("=", 1)
-            key = key.strip()
-            value = value.strip()
-    
-            base_key = key.split(".")[0] if "." in key else key
-    
-            if base_key not in result:
-                result[base_key] = {"main": "", "info": "", "kext": ""}
-    
-            if key.endswith(".info"):
-                result[base_key]["info"] = value
-            elif key.endswith(".kext"):
-                result[base_key]["kext"] = value
-            else:
-                result[base_key]["main"] = value
-    
-        return result
-
 def create_import_window():
     """创建导入选项窗口"""
     layout = [
@@ -159,95 +103,195 @@ def show_skip_details(skip_details: List[Tuple[str, str]]):
             break
     detail_window.close()
 
-def import_entries(window, current_entries: Dict[str, dict], current_file: str, import_options: dict, import_file: str) -> Dict[str, dict]:
-    """导入条目到当前文件中"""
+def import_entries(window, session: EditSession, import_options: dict, import_file: str) -> EditSession:
+    """流式导入条目到当前编辑会话中，可取消，取消或出错时回滚"""
+    importer = StreamingImport(
+        session, import_file,
+        import_main=import_options["-IMPORT_MAIN-"],
+        import_info=import_options["-IMPORT_INFO-"],
+        import_kext=import_options["-IMPORT_KEXT-"],
+        overwrite=import_options["-OVERWRITE-"],
+        skip_errors=import_options["-SKIP_ERRORS-"],
+    )
+
+    def progress(done, total, imported):
+        # 返回False表示用户点击了取消
+        return sg.one_line_progress_meter(
+            "导入中", done, max(total, 1), f"已导入 {imported} 条",
+            key="-IMPORT_PROGRESS-", orientation="h"
+        )
+
     try:
-        with open(import_file, "r", encoding="utf-8") as f:
-            content = f.read()
+        importer.run(progress)
+    except ImportCancelled:
+        sg.popup_ok("导入已取消，所有修改已回滚", title="导入取消")
+        return session
+    except ValueError as e:
+        sg.one_line_progress_meter_cancel(key="-IMPORT_PROGRESS-")
+        sg.popup_error(f"{str(e)}\n本次导入已回滚")
+        return session
     except Exception as e:
-        sg.popup_error(f"无法读取导入文件: {str(e)}")
-        return current_entries
-    
-    imported_entries = {}
-    skip_details = []
-    file_type = os.path.basename(current_file).replace(".list", "")
-    
-    for line_num, line in enumerate(content.splitlines(), 1):
-        line = line.strip()
-        if not line or line.startswith("#"):
+        sg.one_line_progress_meter_cancel(key="-IMPORT_PROGRESS-")
+        sg.popup_error(f"导入失败: {str(e)}")
+        return session
+
+    show_import_result(importer.imported_count, importer.skipped_count, importer.skip_details)
+    return session
+
+def show_bulk_edit_window(session: EditSession) -> bool:
+    """
+    批量编辑窗口：按正则查询设备ID后批量修改，所有修改作为一个事务一次写回
+    :return: 是否有修改
+    """
+    default_query = r"10DE&0[4-6].."
+    layout = [
+        [sg.Text("设备ID查询(正则):"), sg.Input(default_query, key="-QUERY-", size=(25, 1), enable_events=True),
+         sg.Text("", key="-MATCHED-", size=(15, 1))],
+        [sg.Radio("设置状态", "OP", key="-OP_STATUS-", default=True), sg.Combo(["0", "1"], default_value="1", key="-NEW_STATUS-", size=(5, 1))],
+        [sg.Radio("设置驱动", "OP", key="-OP_KEXT-"), sg.Input(key="-NEW_KEXT-", size=(30, 1))],
+        [sg.Radio("重命名驱动", "OP", key="-OP_RENAME-"), sg.Input(key="-OLD_TEXT-", size=(15, 1)),
+         sg.Text("→"), sg.Input(key="-NEW_TEXT-", size=(15, 1))],
+        [sg.Radio("合并为XXFF模糊条目", "OP", key="-OP_RERANGE-")],
+        [sg.Button("执行", key="-RUN-"), sg.Button("关闭", key="-CLOSE-")]
+    ]
+    bulk_window = sg.Window("批量编辑", layout, modal=True, finalize=True)
+    changed = False
+
+    def count_matched(query):
+        try:
+            return len(BulkEdit(session).select(query)) if query else 0
+        except Exception:
+            return None
+
+    matched = count_matched(default_query)
+    bulk_window["-MATCHED-"].update(f"匹配 {matched} 条" if matched is not None else "正则无效")
+
+    while True:
+        event_bulk, values_bulk = bulk_window.read()
+        if event_bulk in (sg.WIN_CLOSED, "-CLOSE-"):
+            break
+
+        query = values_bulk["-QUERY-"].strip()
+        matched = count_matched(query)
+        bulk_window["-MATCHED-"].update(f"匹配 {matched} 条" if matched is not None else "正则无效")
+        if event_bulk != "-RUN-":
             continue
-            
-        # 验证格式（添加file_type参数）
-        valid, msg = ListFileValidator.is_valid_entry(line, file_type)
-        if not valid and import_options["-SKIP_ERRORS-"]:
-            skip_details.append((f"第{line_num}行", f"格式错误: {msg}"))
+        # 重命名驱动时查询为空表示处理全部条目
+        if not matched and not (values_bulk["-OP_RENAME-"] and not query):
+            sg.popup_error("没有匹配的条目!")
             continue
-        elif not valid:
-            sg.popup_error(f"第{line_num}行格式错误: {msg}")
-            return current_entries
-            
-        # 解析有效条目
-        key, value = line.split("=", 1)
-        key = key.strip()
-        value = value.strip()
-        base_key = key.split(".")[0] if "." in key else key
-        
-        if base_key not in imported_entries:
-            imported_entries[base_key] = {"main": None, "info": None, "kext": None}
-        
-        if key.endswith(".info"):
-            imported_entries[base_key]["info"] = value if value else None
-        elif key.endswith(".kext"):
-            imported_entries[base_key]["kext"] = value if value else None
-        else:
-            imported_entries[base_key]["main"] = value if value else None
-    
-    # 处理导入逻辑
-    imported_count = 0
-    skipped_count = len(skip_details)
-    overwrite = import_options["-OVERWRITE-"]
-    
-    for dev_id, data in imported_entries.items():
-        # 检查是否已存在且不覆盖
-        if dev_id in current_entries and not overwrite:
-            skip_details.append((dev_id, "已存在且不覆盖"))
-            skipped_count += 1
+        if sg.popup_yes_no("将对匹配的条目执行批量修改并立即写入文件，是否继续?", title="确认批量编辑") != "Yes":
             continue
-        
-        # 检查是否有任何可导入的字段
-        has_importable_data = False
-        if import_options["-IMPORT_MAIN-"] and data.get("main") is not None:
-            has_importable_data = True
-        if import_options["-IMPORT_INFO-"] and data.get("info") is not None:
-            has_importable_data = True
-        if import_options["-IMPORT_KEXT-"] and data.get("kext") is not None:
-            has_importable_data = True
-        
-        if not has_importable_data:
-            skip_details.append((dev_id, "没有可导入的字段"))
-            skipped_count += 1
+
+        try:
+            with BulkEdit(session) as bulk:
+                if values_bulk["-OP_STATUS-"]:
+                    message = f"已设置 {bulk.set_matching(query, main=values_bulk['-NEW_STATUS-'])} 条状态"
+                elif values_bulk["-OP_KEXT-"]:
+                    message = f"已设置 {bulk.set_matching(query, kext=values_bulk['-NEW_KEXT-'].strip())} 条驱动"
+                elif values_bulk["-OP_RENAME-"]:
+                    if not values_bulk["-OLD_TEXT-"]:
+                        raise ValueError("请输入要替换的驱动名称")
+                    renamed = bulk.rename_kext(values_bulk["-OLD_TEXT-"], values_bulk["-NEW_TEXT-"], query or None)
+                    message = f"已重命名 {renamed} 条驱动"
+                else:
+                    created, removed, skipped = bulk.rerange_fuzzy(query)
+                    message = f"新建 {created} 条模糊条目，合并删除 {removed} 条精确条目"
+                    if skipped:
+                        message += f"\n已有不同内容而跳过: {', '.join(skipped)}"
+        except Exception as e:
+            sg.popup_error(f"批量编辑失败，已回滚: {str(e)}")
             continue
-        
-        # 如果是新条目，直接创建
-        if dev_id not in current_entries:
-            current_entries[dev_id] = {"main": None, "info": None, "kext": None}
-        
-        # 根据选项更新数据
-        if import_options["-IMPORT_MAIN-"] and data.get("main") is not None:
-            current_entries[dev_id]["main"] = data["main"]
-        if import_options["-IMPORT_INFO-"] and data.get("info") is not None:
-            current_entries[dev_id]["info"] = data["info"]
-        if import_options["-IMPORT_KEXT-"] and data.get("kext") is not None:
-            current_entries[dev_id]["kext"] = data["kext"]
-        
-        imported_count += 1
-    
-    # 保存更新后的内容
-    new_content = generate_file_content(current_entries, file_type)
-    if save_file_content(current_file, new_content):
-        show_import_result(imported_count, skipped_count, skip_details)
-    
-    return current_entries
+
+        changed = True
+        sg.popup_ok(message, title="批量编辑完成")
+
+    bulk_window.close()
+    return changed
+
+def compact_rules(session: EditSession) -> bool:
+    """
+    分析可合并为模糊/通配规则的精确条目，确认后在一个事务中应用
+    :return: 是否有修改
+    """
+    if session.file_type == "硬盘支持信息":
+        sg.popup_error("硬盘支持信息按名称匹配，不支持规则压缩")
+        return False
+
+    # 新规则会匹配范围内所有未收录的ID，需要pci.ids中的已知设备一并核对；没有pci.ids时只删除已被覆盖的条目
+    index = PciIdsIndex.load(pci_ids_default_path())
+    try:
+        proposals = RedundancyAnalyzer(session.entries, index.devices if index else ()).analyze()
+    except Exception as e:
+        sg.popup_error(f"分析失败: {str(e)}")
+        return False
+    if not proposals:
+        sg.popup_ok("没有可以合并的条目" + ("" if index else "\n（未找到pci.ids，不会新建模糊/通配规则）"), title="规则压缩")
+        return False
+
+    lines = [f"{p.rule or '(已被现有规则覆盖)'} <- {', '.join(p.removed)}" for p in proposals]
+    removed = sum(len(p.removed) for p in proposals)
+    sg.popup_scrolled("\n".join(lines), title=f"可删除 {removed} 条精确条目", size=(80, 20))
+    if any(p.rule for p in proposals):
+        message = ("列表中的设备和pci.ids中的已知设备查询结果已核对一致。\n"
+                   "注意：新建的模糊/通配规则还会匹配范围内pci.ids未收录的ID，这些ID将显示为规则中的状态。\n"
+                   "是否应用并写入文件?")
+    else:
+        message = "只删除已被现有规则覆盖的条目，所有ID的查询结果不变。" + ("" if index else "\n（未找到pci.ids，不会新建模糊/通配规则）") + "\n是否应用并写入文件?"
+    if sg.popup_yes_no(message, title="规则压缩") != "Yes":
+        return False
+
+    try:
+        created, removed = RedundancyAnalyzer.apply(session, proposals)
+    except Exception as e:
+        sg.popup_error(f"应用失败，已回滚: {str(e)}")
+        return False
+    sg.popup_ok(f"新建 {created} 条规则，删除 {removed} 条精确条目", title="规则压缩完成")
+    return True
+
+def merge_upstream(session: EditSession) -> bool:
+    """
+    将上游版本的列表三方合并到当前列表（我方为当前会话中的内容），确认后在一个事务中应用
+    :return: 是否有修改
+    """
+    base_file = sg.popup_get_file("选择共同祖先版本（上次同步时的列表）", file_types=(("列表文件", "*.list"), ("所有文件", "*.*")))
+    if not base_file:
+        return False
+    theirs_file = sg.popup_get_file("选择上游版本的列表", file_types=(("列表文件", "*.list"), ("所有文件", "*.*")))
+    if not theirs_file:
+        return False
+    prefer = "theirs" if sg.popup_yes_no("冲突时是否以上游为准?（否则保留当前内容）", title="三方合并") == "Yes" else "ours"
+
+    try:
+        merged, conflicts = merge3(load_entries(base_file), session.entries, load_entries(theirs_file), prefer)
+    except Exception as e:
+        sg.popup_error(f"合并失败: {str(e)}")
+        return False
+
+    changes = diff_entries(session.entries, merged)
+    if not changes:
+        sg.popup_ok("没有需要合并的修改", title="三方合并")
+        return False
+    lines = [f"{'+-~'['added removed changed'.split().index(c.kind)]} {c.key}" for c in changes]
+    if conflicts:
+        lines += ["", f"冲突 {len(conflicts)} 处（已取{'上游' if prefer == 'theirs' else '当前'}内容）:"]
+        lines += [f"{c.key} [{c.field}] 祖先={c.base!r} 当前={c.ours!r} 上游={c.theirs!r}" for c in conflicts]
+    sg.popup_scrolled("\n".join(lines), title=f"{len(changes)} 条修改", size=(90, 20))
+    if sg.popup_yes_no("是否应用合并结果并写入文件?", title="三方合并") != "Yes":
+        return False
+
+    try:
+        with Transaction(session) as transaction:
+            for change in changes:
+                if change.kind == "removed":
+                    transaction.delete(change.key)
+                else:
+                    record = merged[change.key]
+                    transaction.set(change.key, main=record.main, info=record.info, kext=record.kext)
+    except Exception as e:
+        sg.popup_error(f"应用失败，已回滚: {str(e)}")
+        return False
+    return True
 
 def create_main_window():
     """创建主编辑器窗口"""
@@ -279,6 +323,7 @@ def create_main_window():
                 justification="left",
                 select_mode=sg.TABLE_SELECT_MODE_BROWSE,
                 enable_events=True,
+                enable_click_events=True,
                 expand_x=True,
                 expand_y=True,
                 vertical_scroll_only=False
@@ -302,8 +347,16 @@ def create_main_window():
             sg.Button("新增", key="-ADD-"),
             sg.Button("保存", key="-SAVE-"),
             sg.Button("删除", key="-DELETE-"),
+            sg.Button("批量编辑", key="-BULK-"),
+            sg.Button("规则压缩", key="-COMPACT_RULES-"),
+            sg.Button("写入文件", key="-FLUSH-"),
+            sg.Button("合并日志", key="-REPLAY-"),
+            sg.Button("三方合并", key="-MERGE-"),
             sg.Button("验证格式", key="-VALIDATE-"),
             sg.Button("退出", key="-EXIT-"),
+            sg.Button("◀", key="-PREV_PAGE-"),
+            sg.Text("", key="-PAGE-", size=(22, 1)),
+            sg.Button("▶", key="-NEXT_PAGE-"),
             sg.Sizegrip()
         ],
         [sg.StatusBar("就绪", key="-STATUS-", size=(50, 1), expand_x=True)]
@@ -335,44 +388,95 @@ def update_edit_controls(window, file_type: str):
     window["-EDIT_INFO-"].update(disabled=False)
     window["-EDIT_KEXT-"].update(disabled=False)
 
-def generate_file_content(entries: Dict[str, dict], file_type: str) -> str:
-    """从条目数据生成文件内容"""
-    lines = []
-    for dev_id, data in entries.items():
-        # 主条目（设备ID=状态）
-        if data["main"] is not None and data["main"] != "":
-            lines.append(f"{dev_id}={data['main']}")
-        
-        # 详情信息（设备ID.info=详情）
-        if data["info"] is not None and data["info"] != "":
-            lines.append(f"{dev_id}.info={data['info']}")
-        
-        # 驱动信息（设备ID.kext=驱动）
-        if data["kext"] is not None and data["kext"] != "":
-            lines.append(f"{dev_id}.kext={data['kext']}")
-    
-    return "\n".join(lines)
-def update_table(window, file_type: str, filter_str: str = "") -> None:
-    filename, _ = SUPPORT_FILES[file_type]
-    content = load_file_content(filename)
-    entries = ListFileValidator.parse_file(content, file_type)
-    
-    table_data = []
-    for dev_id, data in entries.items():
-        if filter_str and filter_str.lower() not in dev_id.lower():
-            continue
-            
-        # 所有类型统一显示格式
-        status = data["main"] or ""
-        info = data["info"] or ""
-        kext = data["kext"] or ""
-        
-        table_data.append([dev_id, status, info, kext])
-    
-    window["-ENTRY_TABLE-"].update(values=table_data)
-    window["-STATUS-"].update(f"已加载 {len(table_data)} 条条目")
-    
-    return table_data
+
+class TableView:
+    """
+    表格视图：筛选、排序后只把当前页的行送入表格控件
+    """
+    PAGE_SIZE = 200
+    HEADINGS = ["设备ID", "状态", "支持详情", "所需驱动"]
+
+    def __init__(self, session: EditSession):
+        self.session = session
+        self.filter_str = ""
+        self.sort_column = None
+        self.reverse = False
+        self.offset = 0
+        self.keys = []
+
+    def refresh(self, window, filter_str: str = None) -> list:
+        """
+        重新筛选并刷新当前页
+        :param filter_str: 新的筛选词，None表示保持不变
+        :return: 当前页的行（与表格选中行下标对应）
+        """
+        if filter_str is not None and filter_str != self.filter_str:
+            self.filter_str = filter_str
+            self.offset = 0
+
+        keys = self.session.match(self.filter_str)
+        if self.sort_column is not None:
+            keys = self.session.sort_keys(keys, self.sort_column, self.reverse)
+        self.keys = keys
+        return self.show_page(window)
+
+    def show_page(self, window) -> list:
+        """只把当前页的行送入表格控件"""
+        total = len(self.keys)
+        self.offset = max(0, min(self.offset, (total - 1) // self.PAGE_SIZE * self.PAGE_SIZE if total else 0))
+        table_data = [self.session.row(key) for key in self.keys[self.offset:self.offset + self.PAGE_SIZE]]
+
+        window["-ENTRY_TABLE-"].update(values=table_data)
+        end = self.offset + len(table_data)
+        window["-PAGE-"].update(f"{self.offset + 1 if total else 0}-{end} / 共 {total} 条")
+        window["-PREV_PAGE-"].update(disabled=self.offset == 0)
+        window["-NEXT_PAGE-"].update(disabled=end >= total)
+
+        pending = f"，{len(self.session.pending) + self.session.journaled} 项修改未合并到列表文件" if self.session.dirty else ""
+        window["-STATUS-"].update(f"已加载 {total} 条条目{pending}")
+        return table_data
+
+    def turn_page(self, window, step: int) -> list:
+        """翻页"""
+        self.offset += step * self.PAGE_SIZE
+        return self.show_page(window)
+
+    def toggle_sort(self, window, column: int) -> list:
+        """点击表头排序，再次点击同一列时切换升降序"""
+        if self.sort_column == column:
+            self.reverse = not self.reverse
+        else:
+            self.sort_column, self.reverse = column, False
+        arrow = " ▼" if self.reverse else " ▲"
+        headings = [h + (arrow if i == column else "") for i, h in enumerate(self.HEADINGS)]
+        table = window["-ENTRY_TABLE-"].Widget
+        for i, heading in enumerate(headings):
+            table.heading(i, text=heading)
+        self.offset = 0
+        return self.refresh(window)
+
+def flush_session(session: EditSession) -> bool:
+    """把编辑会话中的修改（含日志）合并写回列表文件"""
+    try:
+        session.compact()
+        return True
+    except Exception as e:
+        sg.popup_error(f"保存文件失败: {str(e)}")
+        return False
+
+def confirm_flush(session: EditSession) -> bool:
+    """切换文件/退出前处理未写入的修改，返回False表示写入失败"""
+    if session is None or not session.dirty:
+        return True
+    if sg.popup_yes_no(f"{session.filename} 有 {len(session.pending) + session.journaled} 项修改未合并，是否写入列表文件?", title="未保存的修改") == "Yes":
+        return flush_session(session)
+    # 不合并时也把修改保留在日志中，下次打开会自动回放
+    try:
+        session.flush()
+    except Exception as e:
+        sg.popup_error(f"保存日志失败: {str(e)}")
+        return False
+    return True
 
 def load_file_content(filename: str) -> str:
     """加载文件内容"""
@@ -384,35 +488,26 @@ def load_file_content(filename: str) -> str:
         return ""
 
 def save_file_content(filename: str, content: str) -> bool:
-    """保存文件内容"""
+    """保存文件内容（原子替换）"""
     try:
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write(content)
+        atomic_write(filename, content)
         return True
     except Exception as e:
         sg.popup_error(f"保存文件失败: {str(e)}")
         return False
 
-def validate_file_content(content: str, file_type: str) -> Tuple[List[str], List[str]]:
-    """验证文件内容格式并返回可修复的错误"""
-    error_lines = []
-    repairable_errors = []
-    for i, line in enumerate(content.splitlines(), 1):
-        line = line.strip()
-        if not line:
-            continue
-        valid, msg = ListFileValidator.is_valid_entry(line, file_type)  # 添加file_type参数
-        if not valid:
-            error_entry = f"第{i}行: {msg} - {line}"
-            error_lines.append(error_entry)
-            if "无效设备ID格式" in msg or "状态值必须是0或1" in msg or "缺少等号分隔符" in msg:
-                repairable_errors.append(line)
+def validate_file_content(content: str, file_type: str) -> Tuple[List[str], List[Diagnostic]]:
+    """验证文件内容格式并返回可修复的问题"""
+    diagnostics = validate_list(content, file_type)
+    level_text = {"error": "错误", "warning": "警告"}
+    error_lines = [f"第{d.line}行: [{level_text[d.level]}] {d.message}" for d in diagnostics]
+    repairable_errors = [d for d in diagnostics if d.fixable]
     return error_lines, repairable_errors
 
 def main():
     window = create_main_window()
-    current_file = None
-    current_entries = {}
+    session = None
+    view = None
     current_table_data = []
     selected_index = None
     current_file_type = None  # 跟踪当前文件类型
@@ -421,26 +516,39 @@ def main():
     if SUPPORT_FILES:
         first_file_type = list(SUPPORT_FILES.keys())[0]
         window["-FILE_TYPE-"].update(first_file_type)
-        current_file, _ = SUPPORT_FILES[first_file_type]
         current_file_type = first_file_type  # 设置当前文件类型
-        current_entries = ListFileValidator.parse_file(load_file_content(current_file), first_file_type)
-        current_table_data = update_table(window, first_file_type)
-        window["-STATUS-"].update(f"已加载: {current_file}")
+        session = EditSession(SUPPORT_FILES[first_file_type][0], first_file_type).load()
+        view = TableView(session)
+        current_table_data = view.refresh(window)
+        window["-STATUS-"].update(f"已加载: {session.filename}")
 
     while True:
         event, values = window.read()
 
         if event in (sg.WIN_CLOSED, "-EXIT-"):
+            confirm_flush(session)
             break
 
         elif event == "-FILE_TYPE-":
             file_type = values["-FILE_TYPE-"]
-            current_file, _ = SUPPORT_FILES[file_type]
+            if not confirm_flush(session):
+                window["-FILE_TYPE-"].update(current_file_type)
+                continue
             current_file_type = file_type  # 更新当前文件类型
             update_edit_controls(window, file_type)  # 添加这行
-            current_entries = ListFileValidator.parse_file(load_file_content(current_file), file_type)
-            current_table_data = update_table(window, file_type)
-            window["-STATUS-"].update(f"已加载: {current_file}")
+            session = EditSession(SUPPORT_FILES[file_type][0], file_type).load()
+            view = TableView(session)
+            current_table_data = view.refresh(window, values["-FILTER-"])
+            window["-STATUS-"].update(f"已加载: {session.filename}")
+
+        elif isinstance(event, tuple) and event[0] == "-ENTRY_TABLE-" and view:
+            # 点击表头排序
+            row, column = event[2]
+            if row == -1 and column is not None and column >= 0:
+                current_table_data = view.toggle_sort(window, column)
+
+        elif event in ("-PREV_PAGE-", "-NEXT_PAGE-") and view:
+            current_table_data = view.turn_page(window, -1 if event == "-PREV_PAGE-" else 1)
 
         elif event == "-ENTRY_TABLE-":
             if values["-ENTRY_TABLE-"]:
@@ -461,12 +569,14 @@ def main():
                 else:
                     sg.popup_error("选择的行索引无效")
 
-        elif event == "-FILTER-" and current_file:
-            current_table_data = update_table(window, values["-FILE_TYPE-"], values["-FILTER-"])
+        elif event == "-FILTER-" and session:
+            current_table_data = view.refresh(window, values["-FILTER-"])
 
-        elif event == "-REFRESH-" and current_file:
-            current_entries = ListFileValidator.parse_file(load_file_content(current_file), current_file_type)
-            current_table_data = update_table(window, values["-FILE_TYPE-"], values["-FILTER-"])
+        elif event == "-REFRESH-" and session:
+            if session.pending and sg.popup_yes_no("重新加载将丢弃未写入日志的修改，是否继续?", title="刷新") != "Yes":
+                continue
+            session.load()
+            current_table_data = view.refresh(window, values["-FILTER-"])
 
         elif event == "-ADD-":
             window["-EDIT_ID-"].update("")
@@ -477,7 +587,7 @@ def main():
             window["-EDIT_ID-"].update(disabled=False)
             selected_index = None
 
-        elif event == "-SAVE-" and current_file:
+        elif event == "-SAVE-" and session:
             dev_id = values["-EDIT_ID-"].strip()
             status = values["-EDIT_STATUS-"].strip()
             info = values["-EDIT_INFO-"].strip()
@@ -498,51 +608,87 @@ def main():
                 sg.popup_error("状态值必须是0或1")
                 continue
 
-            # 创建或更新条目
-            if dev_id not in current_entries:
-                current_entries[dev_id] = {"main": None, "info": None, "kext": None}
-
-            # 更新所有字段（包括空值）
-            current_entries[dev_id]["main"] = status if status else ""
-            current_entries[dev_id]["info"] = info if info else ""
-            current_entries[dev_id]["kext"] = kext if kext else ""
-
-            # 生成并保存文件内容
-            content = generate_file_content(current_entries, current_file_type)
-            if save_file_content(current_file, content):
-                current_table_data = update_table(window, current_file_type, values["-FILTER-"])
-                window["-STATUS-"].update(f"已保存: {current_file}")
-
-        elif event == "-DELETE-" and current_file:
+            # 更新所有字段（包括空值），保存时只追加到编辑日志，累计到一定数量后合并进列表文件
+            session.set(dev_id, main=status, info=info, kext=kext)
+            try:
+                flushed = session.maybe_flush()
+            except Exception as e:
+                sg.popup_error(f"保存文件失败: {str(e)}")
+                flushed = False
+            current_table_data = view.refresh(window, values["-FILTER-"])
+            if flushed:
+                window["-STATUS-"].update(f"已保存到日志: {session.journal.path}")
+
+        elif event == "-DELETE-" and session:
             dev_id = values["-EDIT_ID-"].strip()
             if not dev_id:
                 sg.popup_error("没有选择要删除的条目!")
                 continue
 
-            if dev_id in current_entries:
+            if dev_id in session.entries:
                 if sg.popup_yes_no(f"确定要删除 {dev_id} 吗?", title="确认删除") == "Yes":
-                    del current_entries[dev_id]
-                    content = generate_file_content(current_entries, current_file_type)  # 确保传递file_type
-                    if save_file_content(current_file, content):
-                        current_table_data = update_table(window, current_file_type, values["-FILTER-"])
-                        window["-STATUS-"].update(f"已删除: {dev_id}")
-                        # 清空编辑区
-                        window["-EDIT_ID-"].update("")
-                        window["-EDIT_STATUS-"].update("")
-                        window["-EDIT_STATUS-"].update("")
-                        window["-EDIT_INFO-"].update("")
-                        window["-EDIT_KEXT-"].update("")
-
-
-        elif event == "-VALIDATE-" and current_file:
-            content = load_file_content(current_file)
+                    session.delete(dev_id)
+                    try:
+                        session.maybe_flush()
+                    except Exception as e:
+                        sg.popup_error(f"保存文件失败: {str(e)}")
+                    current_table_data = view.refresh(window, values["-FILTER-"])
+                    window["-STATUS-"].update(f"已删除: {dev_id}")
+                    # 清空编辑区
+                    window["-EDIT_ID-"].update("")
+                    window["-EDIT_STATUS-"].update("")
+                    window["-EDIT_STATUS-"].update("")
+                    window["-EDIT_INFO-"].update("")
+                    window["-EDIT_KEXT-"].update("")
+
+        elif event == "-BULK-" and session:
+            if show_bulk_edit_window(session):
+                current_table_data = view.refresh(window, values["-FILTER-"])
+
+        elif event == "-COMPACT_RULES-" and session:
+            if compact_rules(session):
+                current_table_data = view.refresh(window, values["-FILTER-"])
+
+        elif event == "-MERGE-" and session:
+            if merge_upstream(session):
+                current_table_data = view.refresh(window, values["-FILTER-"])
+                window["-STATUS-"].update(f"已合并上游修改: {session.filename}")
+
+        elif event == "-FLUSH-" and session:
+            if not session.dirty:
+                window["-STATUS-"].update("没有需要写入的修改")
+            elif flush_session(session):
+                current_table_data = view.refresh(window, values["-FILTER-"])
+                window["-STATUS-"].update(f"已保存: {session.filename}")
+
+        elif event == "-REPLAY-" and session:
+            journal_files = sg.popup_get_file(
+                "选择其他维护者的编辑日志", multiple_files=True,
+                file_types=(("编辑日志", "*.journal"), ("所有文件", "*.*"))
+            )
+            if not journal_files:
+                continue
+            applied = session.replay(journal_files.split(";"))
+            try:
+                session.maybe_flush()
+            except Exception as e:
+                sg.popup_error(f"保存日志失败: {str(e)}")
+            current_table_data = view.refresh(window, values["-FILTER-"])
+            window["-STATUS-"].update(f"已回放 {applied} 条操作")
+
+        elif event == "-VALIDATE-" and session:
+            # 验证的是磁盘上的原始内容，先写回未保存的修改
+            if session.dirty and not flush_session(session):
+                continue
+            content = load_file_content(session.filename)
             errors, repairable_errors = validate_file_content(content, current_file_type)
             
             if errors:
+                lines = content.splitlines()
                 repairable_text = "可自动修复的问题行:\n"
                 if repairable_errors:
-                    repairable_text += "\n".join([f"第{content.splitlines().index(line)+1}行: {line}" 
-                                               for line in repairable_errors])
+                    repairable_text += "\n".join([f"第{d.line}行: {lines[d.line - 1].strip()}" 
+                                               for d in repairable_errors])
                 else:
                     repairable_text += "无"
                 
@@ -561,15 +707,11 @@ def main():
                     if event_validate in (sg.WIN_CLOSED, "-CLOSE-"):
                         break
                     elif event_validate == "-REPAIR-" and repairable_errors:
-                        lines = content.splitlines()
-                        repaired_lines = [line for line in lines 
-                                        if line.strip() and line.strip() not in repairable_errors]
-                        
-                        repaired_content = "\n".join(repaired_lines)
-                        if save_file_content(current_file, repaired_content):
-                            current_entries = ListFileValidator.parse_file(repaired_content)
-                            current_table_data = update_table(window, values["-FILE_TYPE-"], values["-FILTER-"])
-                            sg.popup_ok(f"已自动修复 {len(repairable_errors)} 处问题", title="修复完成")
+                        repaired_content, repaired_count = apply_fixes(content, repairable_errors)
+                        if save_file_content(session.filename, repaired_content):
+                            session.load()
+                            current_table_data = view.refresh(window, values["-FILTER-"])
+                            sg.popup_ok(f"已自动修复 {repaired_count} 处问题", title="修复完成")
                             validate_window.close()
                             break
                 
@@ -577,7 +719,7 @@ def main():
             else:
                 sg.popup_ok("文件格式验证通过!", title="验证结果")
 
-        elif event == "-IMPORT-" and current_file:
+        elif event == "-IMPORT-" and session:
             import_window = create_import_window()
             
             while True:
@@ -591,13 +733,14 @@ def main():
                         continue
                     
                     # 让用户选择要导入的文件
-                    import_file = sg.popup_get_file("选择要导入的文件", file_types=(("列表文件", "*.list"), ("文本文件", "*.txt"), ("所有文件", "*.*")))
+                    import_file = sg.popup_get_file("选择要导入的文件", file_types=(("列表文件", "*.list"), ("文本文件", "*.txt"), ("PCI ID数据库", "pci.ids*"), ("所有文件", "*.*")))
                     if not import_file:
                         continue
                     
                     import_window.close()
-                    current_entries = import_entries(window, current_entries, current_file, values_import, import_file)
-                    current_table_data = update_table(window, values["-FILE_TYPE-"], values["-FILTER-"])
+                    session = import_entries(window, session, values_import, import_file)
+                    view.session = session
+                    current_table_data = view.refresh(window, values["-FILTER-"])
                     break
             
             import_window.close()
@@ -605,4 +748,4 @@ def main():
     window.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
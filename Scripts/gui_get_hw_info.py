@@ -6,6 +6,7 @@ from PyQt5.QtCore import Qt
 import wmi
 import re
 import os
+from pci_ids import PciIdsIndex
 
 class HardwareCard(QFrame):
     def __init__(self, hardware_type, items, parent=None):
@@ -238,6 +239,9 @@ class HardwareInfoGUI(QMainWindow):
         # 状态栏
         self.status_bar = self.statusBar()
         
+        # pci.ids 名称索引（可选），用于显示未收录设备的名称
+        self.pci_index = PciIdsIndex.load(get_resource_path("pci.ids"))
+        
         # 初始加载数据
         self.refresh_data()
     
@@ -549,8 +553,9 @@ class HardwareInfoGUI(QMainWindow):
                         kext_info.get(wildcard_id, "无"), 
                         "wildcard")
             
-            # 4. 没有匹配到
-            return None, device_id_or_name, "未知", "无", None
+            # 4. 没有匹配到，尝试从pci.ids获取设备名称
+            name = self.pci_index.describe(device_id_or_name) if self.pci_index else None
+            return None, device_id_or_name, f"未收录: {name}" if name else "未知", "无", None
     
     def extract_hardware_ids(self, pnp_id):
         """从PNPDeviceID中提取VEN和DEV并合并为VENID&DEVID格式"""
@@ -1,12 +1,31 @@
 import os
+import sys
 import subprocess
 import shutil
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import threading
-import time
+import multiprocessing
+import queue
 import psutil
-import pyautogui
+
+# USBToolBox 的 Python 代码（Resources/UTB/Scripts）作为库直接调用
+UTB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Resources", "UTB")
+if UTB_PATH not in sys.path:
+    sys.path.insert(0, UTB_PATH)
+
+from Scripts import discovery, instrument, usbdump, usbmap
+
+# 各阶段在日志中显示的名称
+STAGE_NAMES = {
+    "dump": "读取拓扑",
+    "parse": "解析",
+    "guess": "识别端口类型",
+    "build": "生成映射",
+    "write": "写入驱动",
+    "map": "批量生成",
+    "copy": "复制USBToolBox",
+}
 
 class USBCustomizerApp:
     def __init__(self, root):
@@ -15,14 +34,22 @@ class USBCustomizerApp:
         self.root.geometry("600x400")
         
         # 变量
-        self.utb_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Resources", "UTB")
+        self.utb_path = UTB_PATH
         self.output_dir = tk.StringVar()
         self.running = False
         self.proc = None
         self.stop_requested = False
+        # 端口探测：停止信号与探测到的接入过设备的端口
+        self.discovery_stop = None
+        self.port_history = frozenset()
+        # 工作线程不直接操作界面，把要执行的界面更新放入队列，由主线程定时取出
+        self.ui_queue = queue.Queue()
+        # 最近一次运行的计时记录
+        self.recorder = None
         
         # 创建UI
         self.create_widgets()
+        self.process_ui_queue()
         
     def create_widgets(self):
         # 主框架
@@ -31,7 +58,7 @@ class USBCustomizerApp:
         
         # 工具说明
         ttk.Label(main_frame, text="USB定制工具", font=('Arial', 14)).pack(pady=5)
-        ttk.Label(main_frame, text="自动运行USBToolBox并复制生成的驱动文件").pack(pady=5)
+        ttk.Label(main_frame, text="读取USB拓扑，自动识别端口类型并生成驱动文件").pack(pady=5)
         
         # 路径选择
         path_frame = ttk.Frame(main_frame)
@@ -54,6 +81,15 @@ class USBCustomizerApp:
         self.stop_btn = ttk.Button(btn_frame, text="停止", command=self.stop_customization, state=tk.DISABLED)
         self.stop_btn.pack(side=tk.LEFT, padx=5, ipadx=20, ipady=5)
         
+        self.batch_btn = ttk.Button(btn_frame, text="批量生成", command=self.start_batch)
+        self.batch_btn.pack(side=tk.LEFT, padx=5, ipadx=20, ipady=5)
+        
+        self.discovery_btn = ttk.Button(btn_frame, text="端口探测", command=self.toggle_discovery)
+        self.discovery_btn.pack(side=tk.LEFT, padx=5, ipadx=20, ipady=5)
+        
+        self.export_btn = ttk.Button(btn_frame, text="导出计时", command=self.export_timings)
+        self.export_btn.pack(side=tk.LEFT, padx=5, ipadx=20, ipady=5)
+        
         # 日志区域
         ttk.Label(main_frame, text="操作日志:").pack(anchor=tk.W)
         
@@ -72,9 +108,53 @@ class USBCustomizerApp:
             self.log(f"已选择输出目录: {dir_path}")
     
     def log(self, message):
+        """可在任意线程调用，实际写入由主线程完成"""
+        self.ui_queue.put(lambda: self.append_log(message))
+    
+    def append_log(self, message):
         self.log_text.insert(tk.END, message + "\n")
         self.log_text.see(tk.END)
-        self.root.update()
+    
+    def process_ui_queue(self):
+        """主线程中执行队列里的界面更新"""
+        while True:
+            try:
+                action = self.ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            action()
+        self.root.after(50, self.process_ui_queue)
+    
+    def new_recorder(self):
+        """为一次运行创建计时记录，每个阶段结束时在日志中输出用时"""
+        self.recorder = instrument.Recorder([self.log_event])
+        return self.recorder
+    
+    def log_event(self, event):
+        name = STAGE_NAMES.get(event.stage, event.stage)
+        if event.kind == "end" and event.stage != "map":
+            self.log(f"  {name}用时 {event.duration:.2f} 秒")
+        elif event.kind == "error":
+            self.log(f"  {name}失败，用时 {event.duration:.2f} 秒")
+    
+    def log_durations(self, recorder):
+        # 按流程顺序输出（识别端口类型在解析过程中完成，记录得比解析早）
+        durations = sorted(recorder.durations().items(), key=lambda i: list(STAGE_NAMES).index(i[0]) if i[0] in STAGE_NAMES else len(STAGE_NAMES))
+        self.log("各阶段用时: " + "，".join(f"{STAGE_NAMES.get(stage, stage)} {duration:.2f} 秒" for stage, duration in durations))
+    
+    def export_timings(self):
+        """把最近一次运行的计时记录导出为JSON，用于比较不同机器上的耗时"""
+        if not self.recorder:
+            messagebox.showinfo("提示", "还没有可导出的计时记录")
+            return
+        file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON", "*.json")], initialfile="usb_timings.json")
+        if not file_path:
+            return
+        try:
+            self.recorder.export(file_path)
+            self.log(f"计时记录已导出: {file_path}")
+        except Exception as e:
+            messagebox.showerror("错误", f"导出失败: {str(e)}")
     
     def start_customization(self):
         if self.running:
@@ -90,7 +170,8 @@ class USBCustomizerApp:
         self.stop_btn.config(state=tk.NORMAL)
         self.log("开始USB定制过程...")
         
-        threading.Thread(target=self.run_customization, daemon=True).start()
+        # Tk变量只在主线程读取，输出目录作为参数传给工作线程
+        threading.Thread(target=self.run_customization, args=(self.output_dir.get(),), daemon=True).start()
     
     def stop_customization(self):
         if not self.running:
@@ -105,134 +186,158 @@ class USBCustomizerApp:
                 for child in parent.children(recursive=True):
                     child.terminate()
                 parent.terminate()
-                self.log("已终止Windows.exe及其子进程")
+                self.log("已终止usbdump.exe")
             except Exception as e:
                 self.log(f"终止进程时出错: {str(e)}")
     
-    def run_customization(self):
+    def run_customization(self, output_path):
+        recorder = self.new_recorder()
         try:
-            # 1. 检查UTB路径
-            utb_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Resources", "UTB")
-            exe_path = os.path.join(utb_dir, "Windows.exe")
-            
-            if not os.path.exists(exe_path):
-                self.log(f"错误: 找不到Windows.exe ({exe_path})")
+            # 1. 检查usbdump路径
+            usbdump_path = os.path.join(self.utb_path, "resources", "usbdump.exe")
+            if not os.path.exists(usbdump_path):
+                self.log(f"错误: 找不到usbdump.exe ({usbdump_path})")
                 return
-                
-            self.log(f"找到Windows.exe: {exe_path}")
-            
-            # 2. 运行Windows.exe
-            self.log("启动USBToolBox TUI工具...")
-            self.proc = subprocess.Popen(exe_path, cwd=utb_dir)
-            
-            # 等待窗口激活
-            time.sleep(2)
-            self.activate_window("USBToolBox")
-            
-            # 需要按顺序选择的选项
-            options = ['P', 'D', 'B', 'A', 'S', 'K']
-            
-            for opt in options:
-                if self.stop_requested:
-                    break
-                    
-                self.log(f"准备选择选项: {opt}")
-                self.simulate_key_input(opt)
-                
-                if opt == 'B':
-                    self.handle_b_option()
-                
-            if not self.stop_requested:
-                time.sleep(2)
-                self.check_and_copy_results()
-            
+
+            # 2. 读取USB拓扑，边输出边解析
+            self.log("正在读取USB拓扑...")
+            self.proc = subprocess.Popen(usbdump_path, cwd=self.utb_path, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            # 与usbdump.get_controllers相同，退出时关闭stdout再等待进程结束
+            with self.proc:
+                try:
+                    controllers = usbdump.read_controllers(self.proc.stdout, recorder)
+                except Exception as e:
+                    # 解析中途出错时usbdump.exe可能仍在写入，无人读取的管道写满后会一直阻塞，先结束它
+                    self.proc.kill()
+                    if self.stop_requested and isinstance(e, ValueError):
+                        return
+                    raise
+            if self.stop_requested:
+                return
+            ports = sum(1 for controller in controllers for port in controller["ports"] if usbmap.is_mappable(port))
+            self.log(f"找到 {len(controllers)} 个USB控制器，{ports} 个端口")
+
+            # 3. 按识别出的端口类型直接在输出目录生成UTBMap.kext
+            self.log("正在生成UTBMap.kext...")
+            # 端口探测中接入过设备的端口优先保留
+            with recorder.stage("build") as stage:
+                plist = usbmap.build_map(controllers, history=self.port_history)
+                stage["ports"] = sum(len(i["IOProviderMergeProperties"]["ports"]) for i in plist["IOKitPersonalities"].values())
+            selected = stage["ports"]
+            if selected < ports:
+                self.log(f"每个控制器最多保留15个端口，已按使用记录和端口类型保留 {selected} 个，舍弃 {ports - selected} 个")
+            with recorder.stage("write"):
+                kext_path = usbmap.write_map(plist, output_path)
+            self.log(f"已生成: {kext_path}")
+
+            with recorder.stage("copy") as stage:
+                stage["ok"] = self.copy_usbtoolbox(output_path)
+            if stage["ok"]:
+                self.log("USB定制完成！")
+            self.log_durations(recorder)
+
         except Exception as e:
             self.log(f"发生错误: {str(e)}")
         finally:
             self.cleanup()
 
-    def activate_window(self, title):
-        """激活指定标题的窗口"""
+    def start_batch(self):
+        """从保存的usbdump JSON批量生成多台机器的UTBMap.kext"""
+        if self.running:
+            return
+
+        if not self.output_dir.get():
+            messagebox.showerror("错误", "请先选择输出目录")
+            return
+
+        dump_files = filedialog.askopenfilenames(title="选择保存的USB拓扑", filetypes=[("usbdump JSON", "*.json"), ("所有文件", "*.*")])
+        if not dump_files:
+            return
+
+        self.running = True
+        self.stop_requested = False
+        self.start_btn.config(state=tk.DISABLED)
+        self.batch_btn.config(state=tk.DISABLED)
+        self.log(f"开始批量生成，共 {len(dump_files)} 台机器...")
+
+        threading.Thread(target=self.run_batch, args=(dump_files, self.output_dir.get()), daemon=True).start()
+
+    def run_batch(self, dump_files, output_path):
+        recorder = self.new_recorder()
         try:
-            window = pyautogui.getWindowsWithTitle(title)[0]
-            if window:
-                window.activate()
-                time.sleep(1)
-                self.log(f"已激活窗口: {title}")
+            failed = 0
+            # 每台机器输出到 输出目录/<拓扑文件名>/UTBMap.kext
+            for result in usbmap.map_dumps(dump_files, output_path):
+                if "error" in result:
+                    failed += 1
+                    self.log(f"{os.path.basename(result['dump'])}: 生成失败 ({result['error']})")
+                else:
+                    dropped = f"（超出限制舍弃 {result['dropped']} 个）" if result["dropped"] else ""
+                    self.log(f"{os.path.basename(result['dump'])}: {result['controllers']} 个控制器，保留 {result['ports']} 个端口{dropped}")
+                    # 每台机器在工作进程中的各阶段用时
+                    recorder.record("map", sum(result["timings"].values()), dump=result["dump"], stages=result["timings"])
+
+            with recorder.stage("copy") as stage:
+                stage["ok"] = self.copy_usbtoolbox(output_path)
+            if stage["ok"]:
+                self.log(f"批量生成完成，成功 {len(dump_files) - failed} 台，失败 {failed} 台")
+            self.log_durations(recorder)
         except Exception as e:
-            self.log(f"窗口激活失败: {str(e)}")
+            self.log(f"发生错误: {str(e)}")
+        finally:
+            self.cleanup()
+
+    def toggle_discovery(self):
+        """开始/结束端口探测：探测期间依次在每个端口插拔U盘，不需要反复重新扫描"""
+        if self.discovery_stop:
+            self.discovery_stop.set()
+            self.log("正在结束端口探测...")
+            return
+
+        usbdump_path = os.path.join(self.utb_path, "resources", "usbdump.exe")
+        if not os.path.exists(usbdump_path):
+            self.log(f"错误: 找不到usbdump.exe ({usbdump_path})")
+            return
+
+        self.discovery_stop = threading.Event()
+        self.discovery_btn.config(text="结束探测")
+        self.log("端口探测已开始，请依次将U盘插入每个USB端口")
+        threading.Thread(target=self.run_discovery, args=(usbdump_path,), daemon=True).start()
+
+    def run_discovery(self, usbdump_path):
+        session = discovery.DiscoverySession()
+
+        def on_changes(changes):
+            for change in changes:
+                # 第一次扫描的结果只作为基准，不逐个输出
+                if change.before is None or not change.after or not change.after.active or change.before.active:
+                    continue
+                hub_name, index = change.key
+                self.log(f"端口 {index} ({hub_name}): 检测到 {', '.join(change.after.devices) or '设备'}")
 
-    def simulate_key_input(self, key):
-        """模拟键盘输入：先输入字母，等待1秒后回车"""
         try:
-            # 输入字母
-            pyautogui.press(key)
-            self.log(f"已输入: {key}")
-            
-            # 等待1秒
-            time.sleep(1)
-            
-            # 按回车
-            pyautogui.press('enter')
-            self.log("已按回车键")
-            
-            # 等待命令执行
-            time.sleep(1)
+            session.run(discovery.poll_usbdump(usbdump_path, 1.0, self.discovery_stop, self.utb_path), on_changes, self.discovery_stop)
         except Exception as e:
-            self.log(f"模拟输入失败: {str(e)}")
-            raise
-
-    def handle_b_option(self):
-        """特殊处理B选项后的流程"""
-        self.log("进入B选项特殊处理流程...")
-        attempts = 0
-        max_attempts = 5
-        
-        while attempts < max_attempts and not self.stop_requested:
-            # 模拟输入B和回车
-            self.simulate_key_input('B')
-            attempts += 1
-            self.log(f"第{attempts}次尝试发送B选项")
-            
-            # 检查是否应该退出循环
-            if self.check_for_quit_prompt():
-                self.log("检测到退出提示，继续下一步")
-                return
-                
-        if attempts >= max_attempts:
-            self.log("警告: 已达到最大B选项尝试次数")
-
-    def check_for_quit_prompt(self):
-        """检查是否出现退出提示（简化实现）"""
-        # 实际实现应该包含更精确的检测逻辑
-        time.sleep(2)  # 等待可能的输出
-        return True  # 假设总是检测到
-
-    def check_and_copy_results(self):
-        """检查并复制结果文件"""
-        utb_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Resources", "UTB")
-        utb_map_path = os.path.join(utb_dir, "UTBMap.kext")
-        usb_toolbox_path = os.path.join(utb_dir, "USBToolBox.kext")
-        
-        if not os.path.exists(utb_map_path):
-            self.log("错误: 未生成UTBMap.kext")
-            return
-            
+            self.log(f"端口探测出错: {str(e)}")
+        finally:
+            self.port_history = self.port_history | session.history
+            self.log(f"端口探测结束，共 {len(self.port_history)} 个端口接入过设备，生成时将优先保留")
+            self.discovery_stop = None
+            self.ui_queue.put(lambda: self.discovery_btn.config(text="端口探测"))
+
+    def copy_usbtoolbox(self, output_path):
+        """复制USBToolBox.kext到输出目录（UTBMap.kext已直接生成在输出目录中）"""
+        usb_toolbox_path = os.path.join(self.utb_path, "USBToolBox.kext")
         if not os.path.exists(usb_toolbox_path):
             self.log("错误: 未找到USBToolBox.kext")
-            return
-            
-        self.log("成功生成驱动文件")
-        
-        output_path = self.output_dir.get()
-        self.log(f"正在复制文件到: {output_path}")
-        
+            return False
+
         try:
-            shutil.copytree(utb_map_path, os.path.join(output_path, "UTBMap.kext"), dirs_exist_ok=True)
             shutil.copytree(usb_toolbox_path, os.path.join(output_path, "USBToolBox.kext"), dirs_exist_ok=True)
-            self.log("USB定制完成！")
         except Exception as e:
             self.log(f"复制文件时出错: {str(e)}")
+            return False
+        return True
 
     def cleanup(self):
         """清理资源"""
@@ -243,8 +348,9 @@ class USBCustomizerApp:
                 pass
         self.proc = None
         self.running = False
-        self.root.after(0, lambda: self.start_btn.config(state=tk.NORMAL))
-        self.root.after(0, lambda: self.stop_btn.config(state=tk.DISABLED))
+        self.ui_queue.put(lambda: self.start_btn.config(state=tk.NORMAL))
+        self.ui_queue.put(lambda: self.stop_btn.config(state=tk.DISABLED))
+        self.ui_queue.put(lambda: self.batch_btn.config(state=tk.NORMAL))
 
 def main():
     root = tk.Tk()
@@ -252,4 +358,6 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
+    # 批量生成使用进程池，打包后需要
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,191 @@
+'''
+The MIT License (MIT)
+Copyright © 2025 王孝慈
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+'''
+
+# pci.ids 厂商/设备名称索引：离线批量补全支持列表中缺失的 .info，并为硬件检测工具提供名称查询
+#
+# 用法:
+#   python pci_ids.py pci.ids --fill [--dry-run] [列表文件...]
+#   python pci_ids.py pci.ids --lookup 10DE&1C82
+
+import os
+import re
+import sys
+import json
+import argparse
+from typing import Dict, Iterator, Optional, Tuple
+
+HEX4 = re.compile(r'^[0-9A-Fa-f]{4}$')
+
+# 可以用pci.ids补全详情的列表（硬盘列表按名称匹配，不适用）
+DEFAULT_LISTS = ("GPUSupportInfo.list", "ETHSupportInfo.list", "HDASupportInfo.list")
+
+def default_path() -> str:
+    """随程序分发的pci.ids路径（打包后在_MEIPASS中，开发环境在脚本目录），与硬件检测工具一致"""
+    return os.path.join(getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__))), "pci.ids")
+
+def iter_pci_ids(path: str) -> Iterator[Tuple[int, int, str, str, str]]:
+    """
+    流式解析pci.ids，子系统行与设备类别(C 开头)段落会被忽略
+    :param path: pci.ids 路径
+    :return: (行号, 已读取字节数, "vendor"/"device", VVVV 或 VVVV&DDDD, 名称)
+    """
+    vendor = None
+    with open(path, "rb") as f:
+        consumed = 0
+        for line_num, raw in enumerate(f, 1):
+            consumed += len(raw)
+            line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+            if not line or line.startswith("#") or line.startswith("\t\t"):
+                continue
+
+            if line.startswith("\t"):
+                if vendor is None:
+                    continue
+                device, _, name = line.strip().partition(" ")
+                if HEX4.match(device) and name.strip():
+                    yield line_num, consumed, "device", f"{vendor}&{device.upper()}", name.strip()
+                continue
+
+            # 顶层行：厂商或设备类别
+            vendor_id, name = line[:4], line[4:].strip()
+            if HEX4.match(vendor_id) and line[4:5] == " " and name:
+                vendor = vendor_id.upper()
+                yield line_num, consumed, "vendor", vendor, name
+            else:
+                vendor = None
+
+class PciIdsIndex:
+    """pci.ids 名称索引，解析结果缓存在 pci.ids 旁边，源文件未变化时直接读取缓存"""
+    CACHE_SUFFIX = ".index.json"
+
+    def __init__(self, vendors: Optional[Dict[str, str]] = None, devices: Optional[Dict[str, str]] = None):
+        self.vendors = vendors or {}
+        self.devices = devices or {}
+
+    @classmethod
+    def build(cls, path: str) -> "PciIdsIndex":
+        """从pci.ids构建索引"""
+        index = cls()
+        for _, _, kind, key, name in iter_pci_ids(path):
+            if kind == "vendor":
+                index.vendors[key] = name
+            else:
+                index.devices[key] = name
+        return index
+
+    @classmethod
+    def load(cls, path: str, use_cache: bool = True) -> Optional["PciIdsIndex"]:
+        """
+        加载索引
+        :param path: pci.ids 路径
+        :param use_cache: 是否读写索引缓存
+        :return: 索引，pci.ids 不存在时返回None
+        """
+        if not path or not os.path.exists(path):
+            return None
+
+        stat = os.stat(path)
+        stamp = [stat.st_size, int(stat.st_mtime)]
+        cache_path = path + cls.CACHE_SUFFIX
+        if use_cache:
+            try:
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    cached = json.load(f)
+                if cached.get("stamp") == stamp:
+                    return cls(cached["vendors"], cached["devices"])
+            except (OSError, ValueError, KeyError):
+                pass
+
+        index = cls.build(path)
+        if use_cache:
+            try:
+                with open(cache_path, "w", encoding="utf-8") as f:
+                    json.dump({"stamp": stamp, "vendors": index.vendors, "devices": index.devices},
+                              f, ensure_ascii=False, separators=(",", ":"))
+            except OSError:
+                pass
+        return index
+
+    def vendor_name(self, device_id: str) -> Optional[str]:
+        """按 VVVV 或 VVVV&DDDD 查询厂商名称"""
+        return self.vendors.get(device_id[:4].upper()) if device_id else None
+
+    def device_name(self, device_id: str) -> Optional[str]:
+        """按 VVVV&DDDD 查询设备名称"""
+        return self.devices.get(device_id.upper()) if device_id else None
+
+    def describe(self, device_id: str) -> Optional[str]:
+        """
+        返回"厂商 设备"形式的描述，FFFF通配ID只返回厂商名
+        :param device_id: VVVV&DDDD
+        """
+        if not device_id or "&" not in device_id:
+            return None
+        vendor = self.vendor_name(device_id)
+        if device_id.upper().endswith("&FFFF"):
+            return vendor
+        device = self.device_name(device_id)
+        if device:
+            return f"{vendor} {device}" if vendor else device
+        return None
+
+def fill_missing_info(index: PciIdsIndex, list_files, dry_run: bool = False) -> Dict[str, int]:
+    """
+    批量补全各列表中缺失的 .info 详情（XXFF模糊ID若不是真实设备则查不到，会被跳过）
+    :param index: pci.ids 索引
+    :param list_files: 列表文件路径
+    :param dry_run: 只统计不写入
+    :return: {文件: 补全条数}
+    """
+    from support_list import EditSession, file_type_for
+
+    result = {}
+    for list_file in list_files:
+        session = EditSession(list_file, file_type_for(list_file)).load()
+        filled = 0
+        for dev_id, data in list(session.entries.items()):
+            if data["info"] or not re.match(r'^[0-9A-Fa-f]{4}&[0-9A-Fa-f]{4}$', dev_id):
+                continue
+            description = index.describe(dev_id)
+            if description:
+                session.set(dev_id, info=description)
+                filled += 1
+        if filled and not dry_run:
+            session.compact()
+        result[list_file] = filled
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="pci.ids 名称索引与支持列表详情补全")
+    parser.add_argument("pci_ids", help="pci.ids 文件路径")
+    parser.add_argument("lists", nargs="*", help="要补全的列表文件（默认为显卡/网卡/声卡列表）")
+    parser.add_argument("--fill", action="store_true", help="补全缺失的 .info 详情")
+    parser.add_argument("--dry-run", action="store_true", help="只统计不写入")
+    parser.add_argument("--lookup", metavar="VVVV&DDDD", action="append", default=[], help="查询设备名称")
+    args = parser.parse_intermixed_args(argv)
+
+    index = PciIdsIndex.load(args.pci_ids)
+    if index is None:
+        print(f"找不到 pci.ids: {args.pci_ids}")
+        return 1
+    print(f"已加载 {len(index.vendors)} 个厂商，{len(index.devices)} 个设备")
+
+    for device_id in args.lookup:
+        print(f"{device_id.upper()}: {index.describe(device_id) or '未收录'}")
+
+    if args.fill:
+        lists = args.lists or [f for f in DEFAULT_LISTS if os.path.exists(f)]
+        for list_file, filled in fill_missing_info(index, lists, args.dry_run).items():
+            print(f"{list_file}: {'可补全' if args.dry_run else '已补全'} {filled} 条")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
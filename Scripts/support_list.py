@@ -0,0 +1,1244 @@
+'''
+The MIT License (MIT)
+Copyright © 2025 王孝慈
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+'''
+
+# 支持信息列表(.list)的解析、生成与编辑会话，不依赖GUI，可供编辑器和命令行工具共用
+
+import re
+import os
+import sys
+import json
+import argparse
+import time
+import getpass
+import stat
+import tempfile
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Tuple, List, Optional, Iterable, Iterator, Callable
+
+from pci_ids import iter_pci_ids
+
+FIELDS = ("main", "info", "kext")
+
+# 列表文件名与文件类型的对应关系（与编辑器的SUPPORT_FILES一致）
+LIST_FILE_TYPES = {
+    "GPUSupportInfo.list": "GPU支持信息",
+    "HDASupportInfo.list": "声卡支持信息",
+    "ETHSupportInfo.list": "网卡支持信息",
+    "HDSupportInfo.list": "硬盘支持信息",
+}
+
+DEVICE_ID_RE = re.compile(r'^[0-9A-Fa-f]{4}&[0-9A-Fa-f]{4}$')
+
+class ListRecord:
+    """
+    单个条目（状态/详情/驱动）
+    使用 __slots__ 存储，值字符串经过驻留：数百行相同的驱动/详情说明在内存中只保存一份
+    支持 record["info"] 形式的读写，与原来的字典条目用法一致
+    """
+    __slots__ = FIELDS
+
+    def __init__(self, main: str = "", info: str = "", kext: str = ""):
+        self.main = sys.intern(main) if main else ""
+        self.info = sys.intern(info) if info else ""
+        self.kext = sys.intern(kext) if kext else ""
+
+    def __getitem__(self, name: str) -> str:
+        if name not in FIELDS:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __setitem__(self, name: str, value: Optional[str]) -> None:
+        if name not in FIELDS:
+            raise KeyError(name)
+        setattr(self, name, sys.intern(value) if value else "")
+
+    def get(self, name: str, default=None):
+        return getattr(self, name) if name in FIELDS else default
+
+    def copy(self) -> "ListRecord":
+        return ListRecord(self.main, self.info, self.kext)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ListRecord):
+            return (self.main, self.info, self.kext) == (other.main, other.info, other.kext)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ListRecord(main={self.main!r}, info={self.info!r}, kext={self.kext!r})"
+
+def file_type_for(path: str) -> str:
+    """根据文件名推断文件类型，未知文件按设备ID列表处理"""
+    return LIST_FILE_TYPES.get(os.path.basename(path), "")
+
+class ListFileValidator:
+    """列表文件格式验证器"""
+    @staticmethod
+    def is_valid_entry(line: str, file_type: str) -> Tuple[bool, str]:
+        """验证单行条目是否有效"""
+        line = line.strip()
+        if not line or line.startswith("#"):
+            return True, ""
+
+        if "=" not in line:
+            return False, "缺少等号分隔符"
+
+        key, value = line.split("=", 1)
+        key = key.strip()
+        value = value.strip()
+
+        # 硬盘支持信息验证规则
+        if file_type == "硬盘支持信息":
+            if not key:
+                return False, "关键词不能为空"
+            # 允许任意格式的值
+            return True, ""
+
+        # 其他支持信息验证规则
+        if not key.endswith(('.info', '.kext')):
+            if not re.match(r'^[0-9A-Fa-f]{4}&[0-9A-Fa-f]{4}$', key):
+                return False, f"无效设备ID格式: {key}"
+            if value and value not in ('0', '1'):
+                return False, "状态值必须是0或1"
+
+        return True, ""
+
+    @staticmethod
+    def parse_file(content: str, file_type: str) -> Dict[str, ListRecord]:
+        """解析文件内容为结构化数据"""
+        result = {}
+        intern = sys.intern
+        for line in content.splitlines():
+            line = line.strip()
+            if not line or line[0] == "#":
+                continue
+
+            key, sep, value = line.partition("=")
+            if not sep:
+                continue
+            key = key.strip()
+            value = value.strip()
+
+            base_key = key.partition(".")[0]
+            record = result.get(base_key)
+            if record is None:
+                record = result[base_key] = ListRecord()
+
+            value = intern(value) if value else ""
+            if key.endswith(".info"):
+                record.info = value
+            elif key.endswith(".kext"):
+                record.kext = value
+            else:
+                record.main = value
+
+        return result
+
+def generate_file_content(entries: Dict[str, ListRecord], file_type: str) -> str:
+    """从条目数据生成文件内容"""
+    lines = []
+    append = lines.append
+    for dev_id, data in entries.items():
+        # 主条目（设备ID=状态）
+        if data.main:
+            append(f"{dev_id}={data.main}")
+
+        # 详情信息（设备ID.info=详情）
+        if data.info:
+            append(f"{dev_id}.info={data.info}")
+
+        # 驱动信息（设备ID.kext=驱动）
+        if data.kext:
+            append(f"{dev_id}.kext={data.kext}")
+
+    return "\n".join(lines)
+
+def atomic_write(filename: str, content: str) -> None:
+    """
+    原子写入文件：先写同目录临时文件并fsync，再重命名覆盖，中途崩溃不会留下半截文件
+    :param filename: 目标文件
+    :param content: 文件内容
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, temp_path = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp创建的文件权限为0600，替换前改为原文件的权限（新文件按umask）
+        os.chmod(temp_path, _file_mode(filename))
+        os.replace(temp_path, filename)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    # 同步目录项，保证重命名本身落盘（Windows不支持打开目录，忽略）
+    if os.name != "nt":
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+def _file_mode(filename: str) -> int:
+    """已有文件的权限位；文件不存在时为按umask创建新文件的默认权限"""
+    try:
+        return stat.S_IMODE(os.stat(filename).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+class FileLock:
+    """
+    基于系统文件锁(fcntl/msvcrt)的进程间锁，用于多个编辑器同时追加和合并日志
+    锁随文件句柄释放，持有锁的进程崩溃后不会留下残留锁；锁文件本身保留不删除
+    """
+    def __init__(self, path: str, timeout: float = 10.0):
+        self.path = path
+        self.timeout = timeout
+        self.file = None
+
+    def __enter__(self):
+        deadline = time.time() + self.timeout
+        self.file = open(self.path, "a+b")
+        while True:
+            try:
+                self._lock()
+                return self
+            except OSError:
+                if time.time() > deadline:
+                    self.file.close()
+                    raise TimeoutError(f"等待文件锁超时: {self.path}")
+                time.sleep(0.05)
+
+    def __exit__(self, *exc):
+        try:
+            self._unlock()
+        finally:
+            self.file.close()
+
+    if os.name == "nt":
+        def _lock(self):
+            import msvcrt
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_NBLCK, 1)
+
+        def _unlock(self):
+            import msvcrt
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        def _lock(self):
+            import fcntl
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        def _unlock(self):
+            import fcntl
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+
+class EditJournal:
+    """
+    只追加的编辑日志，与列表文件放在一起（xxx.list.journal）
+    每行一条JSON操作：{"op": "set"/"delete", "key": ..., "fields": {...}, "ts": ..., "author": ...}
+    """
+    SUFFIX = ".journal"
+
+    def __init__(self, list_file: str):
+        self.path = list_file + self.SUFFIX
+        # 追加与合并共用同一把锁，合并读取到删除日志之间不会有新操作写入
+        self.lock_path = list_file + ".lock"
+
+    def lock(self) -> FileLock:
+        return FileLock(self.lock_path)
+
+    def append(self, ops: Iterable[tuple]) -> int:
+        """
+        追加操作并fsync
+        :param ops: [(op, key, fields), ...]
+        :return: 写入的条数
+        """
+        author = getpass.getuser()
+        lines = [
+            json.dumps({"op": op, "key": key, "fields": fields, "ts": time.time(), "author": author},
+                       ensure_ascii=False) + "\n"
+            for op, key, fields in ops
+        ]
+        if not lines:
+            return 0
+        with self.lock(), open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+        return len(lines)
+
+    def read(self) -> List[dict]:
+        """读取全部操作，忽略崩溃时写了一半的末行"""
+        return self.read_file(self.path)
+
+    @staticmethod
+    def read_file(path: str) -> List[dict]:
+        """读取任意日志文件（用于回放其他维护者的日志）"""
+        records = []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record.get("op") in ("set", "delete") and record.get("key"):
+                        records.append(record)
+        except FileNotFoundError:
+            pass
+        return records
+
+    def clear(self) -> None:
+        """合并完成后删除日志"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+class EditSession:
+    """
+    编辑会话：条目常驻内存，编辑以操作的形式应用
+    保存时只把操作追加到日志，合并(compact)时才把日志折叠进列表文件并原子替换
+    """
+    # 日志累计多少条操作后自动合并进列表文件
+    AUTO_COMPACT_OPS = 200
+
+    def __init__(self, filename: str, file_type: str):
+        """
+        :param filename: 列表文件路径
+        :param file_type: 文件类型（SUPPORT_FILES中的键）
+        """
+        self.filename = filename
+        self.file_type = file_type
+        self.entries: Dict[str, ListRecord] = {}
+        self.pending: List[tuple] = []
+        self.journal = EditJournal(filename)
+        self.journaled = 0
+        # 小写搜索索引 {键: "ID␟状态␟详情␟驱动"}，以及上一次筛选的结果（用于增量筛选）
+        self._index: Optional[Dict[str, str]] = None
+        self._last_filter: Optional[Tuple[str, List[str]]] = None
+
+    @property
+    def dirty(self) -> bool:
+        """是否有尚未合并进列表文件的修改（包括已写入日志的）"""
+        return bool(self.pending) or self.journaled > 0
+
+    def _read_base(self) -> Dict[str, ListRecord]:
+        try:
+            with open(self.filename, "r", encoding="utf-8") as f:
+                content = f.read()
+        except FileNotFoundError:
+            content = ""
+        return ListFileValidator.parse_file(content, self.file_type)
+
+    def load(self) -> "EditSession":
+        """从文件（重新）加载条目并回放日志，丢弃未写入日志的修改"""
+        self.entries = self._read_base()
+        records = self.journal.read()
+        for record in records:
+            self._apply_op(self.entries, record["op"], record["key"], record.get("fields"))
+        self.journaled = len(records)
+        self.pending = []
+        self.reset_index()
+        return self
+
+    @staticmethod
+    def _apply_op(entries: Dict[str, ListRecord], op: str, key: str, fields: Optional[dict]) -> bool:
+        """把一条操作应用到条目字典，返回是否产生了变化"""
+        if op == "set":
+            entry = entries.get(key)
+            if entry is None:
+                entry = entries[key] = ListRecord()
+            for name, value in (fields or {}).items():
+                if name in FIELDS:
+                    entry[name] = value
+            return True
+        if op == "delete":
+            return entries.pop(key, None) is not None
+        raise ValueError(f"未知的编辑操作: {op}")
+
+    def apply(self, op: str, key: str, fields: Optional[dict] = None) -> None:
+        """
+        应用一条编辑操作
+        :param op: "set" 新增/更新，"delete" 删除
+        :param key: 设备ID/关键词
+        :param fields: set操作时要更新的字段，未给出的字段保持不变
+        """
+        if self._apply_op(self.entries, op, key, fields):
+            self.pending.append((op, key, dict(fields or {})))
+            self._update_index(key)
+
+    def set(self, key: str, **fields) -> None:
+        """新增或更新条目"""
+        self.apply("set", key, fields)
+
+    def delete(self, key: str) -> None:
+        """删除条目"""
+        self.apply("delete", key)
+
+    @staticmethod
+    def _search_text(key: str, data: dict) -> str:
+        return "\x1f".join((key, data.main, data.info, data.kext)).lower()
+
+    def reset_index(self) -> None:
+        """条目被整体替换后丢弃搜索索引，下次筛选时重建"""
+        self._index = None
+        self._last_filter = None
+
+    def _update_index(self, key: str) -> None:
+        """单条修改后增量更新索引"""
+        if self._index is not None:
+            data = self.entries.get(key)
+            if data is None:
+                self._index.pop(key, None)
+            else:
+                self._index[key] = self._search_text(key, data)
+        self._last_filter = None
+
+    def match(self, filter_str: str = "") -> List[str]:
+        """
+        按ID/状态/详情/驱动筛选（不区分大小写）
+        输入在上一次筛选词后继续追加字符时，只在上一次的结果中继续缩小范围
+        :return: 匹配的键（保持文件顺序）
+        """
+        if self._index is None:
+            self._index = {key: self._search_text(key, data) for key, data in self.entries.items()}
+        index = self._index
+
+        needle = filter_str.strip().lower()
+        if not needle:
+            keys = list(index)
+        else:
+            last = self._last_filter
+            candidates = last[1] if last and last[0] and needle.startswith(last[0]) else index
+            keys = [key for key in candidates if needle in index[key]]
+        self._last_filter = (needle, keys)
+        return keys
+
+    def row(self, key: str) -> list:
+        """返回表格行 [设备ID, 状态, 详情, 驱动]"""
+        data = self.entries[key]
+        return [key, data.main, data.info, data.kext]
+
+    def rows(self, filter_str: str = "") -> List[list]:
+        """
+        按筛选条件返回表格行
+        :param filter_str: 筛选词
+        :return: [[设备ID, 状态, 详情, 驱动], ...]
+        """
+        return [self.row(key) for key in self.match(filter_str)]
+
+    def sort_keys(self, keys: List[str], column: int, reverse: bool = False) -> List[str]:
+        """
+        按表格列排序
+        :param column: 0 设备ID，1 状态，2 详情，3 驱动
+        """
+        name = ("main", "info", "kext")[column - 1] if column else None
+        entries = self.entries
+        if name is None:
+            return sorted(keys, key=str.lower, reverse=reverse)
+        return sorted(keys, key=lambda k: (entries[k][name].lower(), k), reverse=reverse)
+
+    def content(self) -> str:
+        """生成当前条目对应的文件内容"""
+        return generate_file_content(self.entries, self.file_type)
+
+    def flush(self) -> bool:
+        """
+        把未保存的操作追加到日志（小量追加，不重写列表文件）
+        :return: 是否实际写入
+        """
+        if not self.pending:
+            return False
+        self.journaled += self.journal.append(self.pending)
+        self.pending = []
+        return True
+
+    def compact(self) -> bool:
+        """
+        把日志折叠进列表文件：重新读取列表文件并回放完整日志（包含其他编辑器追加的操作），
+        原子替换列表文件后删除日志
+        :return: 是否实际写入
+        """
+        self.flush()
+        with self.journal.lock():
+            records = self.journal.read()
+            if not records:
+                self.journaled = 0
+                return False
+            entries = self._read_base()
+            for record in records:
+                self._apply_op(entries, record["op"], record["key"], record.get("fields"))
+            atomic_write(self.filename, generate_file_content(entries, self.file_type))
+            self.journal.clear()
+        self.entries = entries
+        self.journaled = 0
+        self.reset_index()
+        return True
+
+    def replay(self, journal_paths: Iterable[str]) -> int:
+        """
+        回放其他维护者的日志，按时间顺序合并为本会话的修改
+        :param journal_paths: 日志文件路径列表
+        :return: 应用的操作数
+        """
+        records = []
+        for path in journal_paths:
+            records.extend(EditJournal.read_file(path))
+        records.sort(key=lambda r: r.get("ts", 0))
+        before = len(self.pending)
+        for record in records:
+            self.apply(record["op"], record["key"], record.get("fields"))
+        return len(self.pending) - before
+
+    def maybe_flush(self) -> bool:
+        """保存操作到日志，日志达到阈值时自动合并进列表文件"""
+        flushed = self.flush()
+        if self.journaled >= self.AUTO_COMPACT_OPS:
+            self.compact()
+        return flushed
+
+def iter_list_lines(path: str) -> Iterator[Tuple[int, int, str]]:
+    """
+    逐行读取文件，不整体载入内存
+    :return: (行号, 已读取字节数, 去除首尾空白的行)
+    """
+    with open(path, "rb") as f:
+        consumed = 0
+        for line_num, raw in enumerate(f, 1):
+            consumed += len(raw)
+            yield line_num, consumed, raw.decode("utf-8", errors="replace").strip()
+
+def iter_pci_ids_lines(path: str) -> Iterator[Tuple[int, int, str]]:
+    """
+    把pci.ids数据库流式转换为.list格式的行（VVVV&DDDD.info=设备名）
+    :return: 与 iter_list_lines 相同的 (行号, 已读取字节数, 行)
+    """
+    for line_num, consumed, kind, key, name in iter_pci_ids(path):
+        if kind == "device":
+            yield line_num, consumed, f"{key}.info={name}"
+
+def is_pci_ids(path: str) -> bool:
+    """根据文件名判断是否为pci.ids数据库"""
+    return os.path.basename(path).lower().startswith("pci.ids")
+
+class Transaction:
+    """
+    一组编辑操作：记录每个条目修改前的状态，成功时一次性合并写回，出错时全部回滚
+    可作为上下文管理器使用
+    """
+    def __init__(self, session: EditSession):
+        self.session = session
+        self.mark = len(session.pending)
+        self._undo: Dict[str, Optional[ListRecord]] = {}
+
+    @property
+    def count(self) -> int:
+        """本事务产生的操作数"""
+        return len(self.session.pending) - self.mark
+
+    def _remember(self, key: str) -> None:
+        if key not in self._undo:
+            old = self.session.entries.get(key)
+            self._undo[key] = old.copy() if old is not None else None
+
+    def set(self, key: str, **fields) -> None:
+        self._remember(key)
+        self.session.set(key, **fields)
+
+    def delete(self, key: str) -> None:
+        self._remember(key)
+        self.session.delete(key)
+
+    def rollback(self) -> None:
+        """撤销本事务对会话的修改"""
+        entries = self.session.entries
+        for key, old in self._undo.items():
+            if old is None:
+                entries.pop(key, None)
+            else:
+                entries[key] = old
+        del self.session.pending[self.mark:]
+        self.session.reset_index()
+        self._undo.clear()
+
+    def commit(self) -> None:
+        """一次性合并写回列表文件"""
+        if self.count:
+            self.session.compact()
+        self._undo.clear()
+
+    def __enter__(self) -> "Transaction":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+class BulkEdit(Transaction):
+    """
+    批量编辑：按正则查询设备ID，对所有匹配条目批量设置状态/驱动、重命名驱动、合并为XXFF模糊条目
+        with BulkEdit(session) as bulk:
+            bulk.set_matching(r"10DE&0[4-6]..", main="0")
+    """
+    def select(self, pattern: str) -> List[str]:
+        """
+        返回设备ID完整匹配正则的条目（不区分大小写）
+        :param pattern: 如 10DE&0[4-6]..
+        """
+        regex = re.compile(pattern, re.IGNORECASE)
+        return [key for key in self.session.entries if regex.fullmatch(key)]
+
+    def set_matching(self, pattern: str, **fields) -> int:
+        """为所有匹配条目设置字段，返回修改条数"""
+        keys = self.select(pattern)
+        for key in keys:
+            self.set(key, **fields)
+        return len(keys)
+
+    def rename_kext(self, old: str, new: str, pattern: Optional[str] = None) -> int:
+        """
+        把驱动说明中的 old 全部替换为 new
+        :param pattern: 只处理匹配的条目，None表示全部
+        :return: 修改条数
+        """
+        keys = self.select(pattern) if pattern else list(self.session.entries)
+        changed = 0
+        for key in keys:
+            kext = self.session.entries[key].kext
+            if old in kext:
+                self.set(key, kext=kext.replace(old, new))
+                changed += 1
+        return changed
+
+    def rerange_fuzzy(self, pattern: str) -> Tuple[int, int, List[str]]:
+        """
+        把匹配的精确条目按 VVVV&DD 分组合并为 VVVV&DDFF 模糊条目
+        每组取最常见的(状态, 驱动)作为模糊条目；详情取组内共有的详情，各不相同时留空
+        状态、驱动、详情都与模糊条目一致的精确条目被删除，其余保留为例外，各设备的详情不会丢失
+        已存在且内容不同的XXFF条目不会被覆盖，该组跳过
+        :return: (新建模糊条目数, 删除的精确条目数, 跳过的分组)
+        """
+        entries = self.session.entries
+        groups: Dict[str, List[str]] = {}
+        for key in self.select(pattern):
+            if DEVICE_ID_RE.match(key) and not key.upper().endswith("FF"):
+                groups.setdefault(key[:7].upper(), []).append(key)
+
+        created = removed = 0
+        skipped = []
+        for prefix, keys in groups.items():
+            votes: Dict[Tuple[str, str], List[str]] = {}
+            for key in keys:
+                votes.setdefault((entries[key].main, entries[key].kext), []).append(key)
+            (status, kext), members = max(votes.items(), key=lambda item: len(item[1]))
+            # 只有一个成员或多个成员共有的详情才适合作为整组的详情
+            info, count = Counter(entries[key].info for key in members).most_common(1)[0]
+            if count == 1 and len(members) > 1:
+                info = ""
+
+            fuzzy_key = f"{prefix}FF"
+            existing = entries.get(fuzzy_key)
+            if existing is not None and (existing.main, existing.kext) != (status, kext):
+                skipped.append(fuzzy_key)
+                continue
+            if existing is None:
+                self.set(fuzzy_key, main=status, info=info, kext=kext)
+                created += 1
+            else:
+                info = existing.info
+            for key in members:
+                if entries[key].info == info:
+                    self.delete(key)
+                    removed += 1
+        return created, removed, skipped
+
+class ImportCancelled(Exception):
+    """导入被用户取消"""
+
+class StreamingImport:
+    """
+    流式分块导入：逐行读取源文件，按块校验并合并进编辑会话
+    取消或出错时回滚本次导入对会话的全部修改，成功后一次性合并写回
+    """
+    # 每块处理的条目数
+    CHUNK_SIZE = 2000
+    # 最多保留的跳过详情条数（计数不受影响）
+    MAX_SKIP_DETAILS = 1000
+
+    def __init__(self, session: EditSession, source: str, import_main: bool = True, import_info: bool = True,
+                 import_kext: bool = True, overwrite: bool = False, skip_errors: bool = True):
+        """
+        :param session: 目标编辑会话
+        :param source: 导入文件（.list/.txt 或 pci.ids）
+        """
+        self.session = session
+        self.source = source
+        self.fields = [name for name, enabled in zip(FIELDS, (import_main, import_info, import_kext)) if enabled]
+        self.overwrite = overwrite
+        self.skip_errors = skip_errors
+
+        self.imported_count = 0
+        self.skipped_count = 0
+        self.skip_details: List[Tuple[str, str]] = []
+        self._transaction: Optional[Transaction] = None
+        self._imported_keys = set()
+
+    def _skip(self, item: str, reason: str) -> None:
+        self.skipped_count += 1
+        if len(self.skip_details) < self.MAX_SKIP_DETAILS:
+            self.skip_details.append((item, reason))
+
+    def _lines(self) -> Iterator[Tuple[int, int, str]]:
+        if is_pci_ids(self.source):
+            if self.session.file_type == "硬盘支持信息":
+                raise ValueError("硬盘支持信息不支持导入pci.ids")
+            return iter_pci_ids_lines(self.source)
+        return iter_list_lines(self.source)
+
+    def _merge_chunk(self, chunk: Dict[str, dict]) -> None:
+        """把一块已解析的条目合并进会话"""
+        entries = self.session.entries
+        for dev_id, data in chunk.items():
+            # 检查是否已存在且不覆盖（本次导入早先写入的同名条目不算已存在）
+            if dev_id in entries and dev_id not in self._imported_keys and not self.overwrite:
+                self._skip(dev_id, "已存在且不覆盖")
+                continue
+
+            fields = {name: data[name] for name in self.fields if data.get(name) is not None}
+            if not fields:
+                self._skip(dev_id, "没有可导入的字段")
+                continue
+
+            self._transaction.set(dev_id, **fields)
+            if dev_id not in self._imported_keys:
+                self._imported_keys.add(dev_id)
+                self.imported_count += 1
+
+    def rollback(self) -> None:
+        """撤销本次导入对会话的修改"""
+        self._transaction.rollback()
+        self._imported_keys.clear()
+        self.imported_count = 0
+
+    def run(self, progress: Optional[Callable[[int, int, int], bool]] = None) -> None:
+        """
+        执行导入，成功后合并写回列表文件
+        :param progress: 进度回调 (已读字节, 总字节, 已导入条数)，返回False表示取消
+        :raises ImportCancelled: 用户取消（已回滚）
+        :raises ValueError: 不跳过格式错误时遇到错误行（已回滚）
+        """
+        total = os.path.getsize(self.source)
+        file_type = self.session.file_type
+        self._transaction = Transaction(self.session)
+        chunk: Dict[str, dict] = {}
+        last_key = None
+
+        try:
+            for line_num, consumed, line in self._lines():
+                if not line or line.startswith("#"):
+                    continue
+
+                valid, msg = ListFileValidator.is_valid_entry(line, file_type)
+                if not valid:
+                    if not self.skip_errors:
+                        raise ValueError(f"第{line_num}行格式错误: {msg}")
+                    self._skip(f"第{line_num}行", f"格式错误: {msg}")
+                    continue
+
+                key, value = line.split("=", 1)
+                key = key.strip()
+                value = value.strip()
+                base_key = key.split(".")[0] if "." in key else key
+
+                # 同一设备的多行通常相邻，块满且换到新设备时再合并，避免把一个设备拆到两块
+                if len(chunk) >= self.CHUNK_SIZE and base_key != last_key:
+                    self._merge_chunk(chunk)
+                    chunk = {}
+                    if progress and progress(consumed, total, self.imported_count) is False:
+                        raise ImportCancelled()
+                last_key = base_key
+
+                data = chunk.setdefault(base_key, {"main": None, "info": None, "kext": None})
+                if key.endswith(".info"):
+                    data["info"] = value if value else None
+                elif key.endswith(".kext"):
+                    data["kext"] = value if value else None
+                else:
+                    data["main"] = value if value else None
+
+            self._merge_chunk(chunk)
+            if progress and progress(total, total, self.imported_count) is False:
+                raise ImportCancelled()
+        except BaseException:
+            self.rollback()
+            raise
+
+        self._transaction.commit()
+
+# 结构化诊断：level 为 "error"/"warning"，fixable 表示可由 apply_fixes 自动删除该行
+Diagnostic = namedtuple("Diagnostic", "file line level code message fixable")
+
+def validate_list(content: str, file_type: str, filename: str = "") -> List[Diagnostic]:
+    """
+    一次线性扫描校验列表内容
+    检查：语法、设备ID格式、状态值、重复键、孤立的 .info/.kext、精确条目与模糊/通配条目状态冲突
+    :param content: 文件内容
+    :param file_type: 文件类型
+    :param filename: 用于诊断输出的文件名
+    :return: 按行号排序的诊断列表
+    """
+    is_hd = (file_type == "硬盘支持信息")
+    diagnostics = []
+    seen = {}
+    mains = {}
+    attr_lines = {}
+
+    def report(line_num, level, code, message, fixable=False):
+        diagnostics.append(Diagnostic(filename, line_num, level, code, message, fixable))
+
+    for line_num, line in enumerate(content.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if "=" not in line:
+            report(line_num, "error", "syntax", f"缺少等号分隔符: {line}", True)
+            continue
+
+        key, value = line.split("=", 1)
+        key = key.strip()
+        value = value.strip()
+        base_key, suffix = key, ""
+        for candidate in (".info", ".kext"):
+            if key.endswith(candidate):
+                base_key, suffix = key[:-len(candidate)], candidate
+                break
+
+        if not base_key:
+            report(line_num, "error", "empty-key", "关键词不能为空", True)
+            continue
+        if not is_hd and not DEVICE_ID_RE.match(base_key):
+            report(line_num, "error", "bad-id", f"无效设备ID格式: {key}", True)
+            continue
+        if not suffix and not is_hd and value and value not in ("0", "1"):
+            report(line_num, "error", "bad-status", f"状态值必须是0或1: {key}={value}", True)
+            continue
+
+        # 加载时后出现的值生效，因此重复时删除较早的行
+        norm_key = key.upper()
+        if norm_key in seen:
+            first_line, first_value = seen[norm_key]
+            detail = "值相同" if first_value == value else f"原值 {first_value!r} 被覆盖为 {value!r}"
+            report(first_line, "warning", "duplicate", f"重复键 {key}（第{line_num}行再次出现，{detail}）", True)
+        seen[norm_key] = (line_num, value)
+
+        norm_base = base_key.upper()
+        if suffix:
+            attr_lines.setdefault(norm_base, line_num)
+        else:
+            mains[norm_base] = (line_num, value)
+
+    for norm_base, line_num in attr_lines.items():
+        if norm_base not in mains:
+            report(line_num, "warning", "orphan", f"{norm_base} 只有详情/驱动，没有状态行")
+
+    for norm_base, (line_num, status) in mains.items():
+        for rule in _covering_rules(norm_base, mains, is_hd):
+            rule_status = mains[rule][1]
+            if rule_status != status:
+                report(line_num, "warning", "fuzzy-conflict",
+                       f"{norm_base}={status} 与第{mains[rule][0]}行的 {rule}={rule_status} 冲突")
+
+    diagnostics.sort(key=lambda d: d.line)
+    return diagnostics
+
+def _covering_rules(key: str, mains: Dict[str, tuple], is_hd: bool) -> List[str]:
+    """返回覆盖某个精确条目、且应当与其一致的模糊规则"""
+    if is_hd:
+        if key.startswith("*"):
+            return []
+        return [rule for rule in mains if rule.startswith("*") and rule[1:] in key]
+    vendor, device = key.split("&")
+    if device.endswith("FF"):
+        return []
+    # 厂商通配(FFFF)本来就是兜底规则，精确条目覆盖它属于正常用法，只检查范围较窄的XXFF模糊规则
+    fuzzy = f"{vendor}&{device[:2]}FF"
+    return [fuzzy] if fuzzy in mains else []
+
+def apply_fixes(content: str, diagnostics: Iterable[Diagnostic]) -> Tuple[str, int]:
+    """
+    一次线性扫描删除所有可修复问题所在的行
+    :return: (修复后的内容, 删除的行数)
+    """
+    drop = {d.line for d in diagnostics if d.fixable}
+    kept = [line for line_num, line in enumerate(content.splitlines(), 1) if line_num not in drop and line.strip()]
+    return "\n".join(kept), len(drop)
+
+def validate_path(path: str, fix: bool = False) -> List[Diagnostic]:
+    """
+    校验（并可选修复）单个列表文件，供进程池调用
+    :return: 修复前的诊断列表
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    diagnostics = validate_list(content, file_type_for(path), path)
+    if fix and any(d.fixable for d in diagnostics):
+        atomic_write(path, apply_fixes(content, diagnostics)[0])
+    return diagnostics
+
+def validate_all(paths: Iterable[str], fix: bool = False, parallel: bool = True) -> Dict[str, List[Diagnostic]]:
+    """
+    并行校验多个列表文件
+    :return: {文件: 诊断列表}
+    """
+    paths = list(paths)
+    if not parallel or len(paths) < 2:
+        return {path: validate_path(path, fix) for path in paths}
+    with ProcessPoolExecutor(max_workers=min(len(paths), os.cpu_count() or 1)) as pool:
+        return dict(zip(paths, pool.map(validate_path, paths, [fix] * len(paths))))
+
+# 与 gui_get_hw_info 的匹配顺序一致：精确 → XXFF 模糊 → FFFF 厂商通配，括号内为缺少详情时显示的默认文字
+MATCH_ORDER = (("exact", "未知"), ("fuzzy", "未知(模糊匹配)"), ("wildcard", "未知(厂商通用支持)"))
+
+def rule_table(entries: Dict[str, ListRecord]) -> Dict[str, ListRecord]:
+    """只保留有状态行的条目，键转为大写（与检测工具加载列表的方式一致）"""
+    return {key.upper(): record for key, record in entries.items() if record.main}
+
+def lookup(rules: Dict[str, ListRecord], device_id: str) -> Tuple[Optional[str], str, str]:
+    """
+    按检测工具的规则查询设备
+    :param rules: rule_table 的结果
+    :param device_id: VVVV&DDDD
+    :return: (状态, 详情, 驱动)，未匹配时状态为None
+    """
+    vendor, _, device = device_id.upper().partition("&")
+    candidates = (f"{vendor}&{device}", f"{vendor}&{device[:2]}FF", f"{vendor}&FFFF")
+    for rule, (_, unknown) in zip(candidates, MATCH_ORDER):
+        record = rules.get(rule)
+        if record is not None:
+            return record.main, record.info or unknown, record.kext or "无"
+    return None, "未知", "无"
+
+RuleProposal = namedtuple("RuleProposal", "rule record removed")
+
+class RedundancyAnalyzer:
+    """
+    冗余分析：找出可以由一条 XXFF 模糊或 FFFF 通配规则表达的精确条目
+    每个建议都会逐个核对：列表中的所有键（以及可选的已知设备ID，如pci.ids中的设备）
+    在合并前后的查询结果（状态/详情/驱动）必须完全相同，否则放弃该建议
+    新建的模糊/通配规则会让范围内所有未收录的ID开始匹配，因此只有提供了已知设备ID时才新建规则；
+    未提供时只删除已被现有规则覆盖的精确条目（不改变任何ID的查询结果）
+    注意：合并后这些设备的匹配类型会从“完全匹配”变为“模糊/厂商匹配”
+    """
+    MIN_GROUP = 3
+
+    def __init__(self, entries: Dict[str, ListRecord], known_ids: Iterable[str] = (), min_group: int = MIN_GROUP):
+        """
+        :param entries: 列表条目
+        :param known_ids: 额外参与核对的设备ID（不在列表中，但不能因新规则改变查询结果），为空时不新建规则
+        :param min_group: 至少多少条相同的精确条目才值得合并
+        """
+        self.entries = entries
+        self.known_ids = [device_id.upper() for device_id in known_ids]
+        self.min_group = min_group
+
+    @property
+    def new_rules(self) -> bool:
+        """是否会新建模糊/通配规则"""
+        return bool(self.known_ids)
+
+    def _groups(self, rules: Dict[str, ListRecord], width: int) -> Dict[str, Dict[tuple, List[str]]]:
+        """按键前缀(VVVV&DD 或 VVVV)分组，组内按(状态, 详情, 驱动)再分"""
+        groups: Dict[str, Dict[tuple, List[str]]] = {}
+        for key, record in rules.items():
+            if not DEVICE_ID_RE.match(key) or key.endswith("FF"):
+                continue
+            triple = (record.main, record.info, record.kext)
+            groups.setdefault(key[:width], {}).setdefault(triple, []).append(key)
+        return groups
+
+    def _verify(self, old: Dict[str, ListRecord], new: Dict[str, ListRecord], keys: Iterable[str]) -> List[str]:
+        """返回查询结果发生变化的键"""
+        return [key for key in keys if lookup(old, key) != lookup(new, key)]
+
+    def analyze(self) -> List[RuleProposal]:
+        """
+        依次尝试：删除已被现有规则覆盖的精确条目、新建 XXFF 模糊规则、新建 FFFF 通配规则
+        :return: 通过核对的建议列表
+        """
+        old = rule_table(self.entries)
+        current = dict(old)
+        check_keys = [key for key in old if DEVICE_ID_RE.match(key)] + self.known_ids
+        proposals = []
+
+        # 1. 已被现有模糊/通配规则表达的精确条目
+        redundant = []
+        for key in list(current):
+            if not DEVICE_ID_RE.match(key) or key.endswith("FF"):
+                continue
+            record = current.pop(key)
+            if lookup(current, key) == lookup(old, key):
+                redundant.append(key)
+            else:
+                current[key] = record
+        if redundant:
+            proposals.append(RuleProposal(None, None, redundant))
+
+        # 2/3. 新建模糊规则(VVVV&DD → VVVV&DDFF)，再新建厂商通配规则(VVVV → VVVV&FFFF)
+        for width, suffix in ((7, "FF"), (4, "&FFFF")) if self.new_rules else ():
+            for prefix, triples in self._groups(current, width).items():
+                rule = prefix + suffix
+                if rule in current:
+                    continue
+                triple, members = max(triples.items(), key=lambda item: len(item[1]))
+                if len(members) < self.min_group:
+                    continue
+
+                candidate = {key: record for key, record in current.items() if key not in members}
+                candidate[rule] = ListRecord(*triple)
+                affected = [key for key in check_keys if key.startswith(prefix)]
+                if self._verify(old, candidate, affected):
+                    continue
+                current = candidate
+                proposals.append(RuleProposal(rule, ListRecord(*triple), members))
+
+        # 最终整体核对一次
+        changed = self._verify(old, current, check_keys)
+        if changed:
+            raise RuntimeError(f"合并后查询结果发生变化: {', '.join(changed[:10])}")
+        return proposals
+
+    @staticmethod
+    def apply(session: EditSession, proposals: List[RuleProposal]) -> Tuple[int, int]:
+        """
+        在一个事务中应用建议并一次写回
+        :return: (新建规则数, 删除条目数)
+        """
+        original = {key.upper(): key for key in session.entries}
+        created = removed = 0
+        with Transaction(session) as transaction:
+            for proposal in proposals:
+                if proposal.rule:
+                    record = proposal.record
+                    transaction.set(proposal.rule, main=record.main, info=record.info, kext=record.kext)
+                    created += 1
+                for key in proposal.removed:
+                    transaction.delete(original.get(key, key))
+                    removed += 1
+        return created, removed
+
+EntryChange = namedtuple("EntryChange", "key kind fields")
+MergeConflict = namedtuple("MergeConflict", "key field base ours theirs")
+
+def load_entries(path: str) -> Dict[str, ListRecord]:
+    """读取并解析列表文件（不存在时为空）"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return ListFileValidator.parse_file(f.read(), file_type_for(path))
+    except FileNotFoundError:
+        return {}
+
+def _by_upper(entries: Dict[str, ListRecord]) -> Dict[str, Tuple[str, ListRecord]]:
+    return {key.upper(): (key, record) for key, record in entries.items()}
+
+def diff_entries(old: Dict[str, ListRecord], new: Dict[str, ListRecord]) -> List[EntryChange]:
+    """
+    按键比较两个列表（键不区分大小写，与行顺序无关）
+    :return: [EntryChange(键, "added"/"removed"/"changed", {字段: (旧值, 新值)})]
+    """
+    old_map = _by_upper(old)
+    changes = []
+    seen = set()
+    for norm, (key, record) in _by_upper(new).items():
+        seen.add(norm)
+        if norm not in old_map:
+            changes.append(EntryChange(key, "added", {f: ("", record[f]) for f in FIELDS if record[f]}))
+            continue
+        before = old_map[norm][1]
+        fields = {f: (before[f], record[f]) for f in FIELDS if before[f] != record[f]}
+        if fields:
+            changes.append(EntryChange(key, "changed", fields))
+    for norm, (key, record) in old_map.items():
+        if norm not in seen:
+            changes.append(EntryChange(key, "removed", {f: (record[f], "") for f in FIELDS if record[f]}))
+    return changes
+
+def merge3(base: Dict[str, ListRecord], ours: Dict[str, ListRecord], theirs: Dict[str, ListRecord],
+           prefer: str = "ours") -> Tuple[Dict[str, ListRecord], List[MergeConflict]]:
+    """
+    按条目、按字段的三方合并，一次遍历完成
+    每个字段：两边相同取该值；只有一边相对base有修改则取修改方；两边都改且不同则为冲突，按prefer取值
+    一边删除而另一边修改同一条目也视为冲突（字段为"entry"）
+    :param prefer: 冲突时取 "ours" 或 "theirs"
+    :return: (合并后的条目，顺序为ours在前、theirs新增的条目在后；冲突列表)
+    """
+    base_map, ours_map, theirs_map = _by_upper(base), _by_upper(ours), _by_upper(theirs)
+    merged: Dict[str, ListRecord] = {}
+    conflicts: List[MergeConflict] = []
+    empty = ListRecord()
+
+    order = list(ours_map) + [norm for norm in theirs_map if norm not in ours_map]
+    order += [norm for norm in base_map if norm not in ours_map and norm not in theirs_map]
+    for norm in order:
+        b, o, t = base_map.get(norm), ours_map.get(norm), theirs_map.get(norm)
+        key = (o or t or b)[0]
+        b_rec, o_rec, t_rec = (b or (None, None))[1], (o or (None, None))[1], (t or (None, None))[1]
+
+        # 条目级：删除
+        if o_rec is None or t_rec is None:
+            present = o_rec if o_rec is not None else t_rec
+            if present is None:
+                continue
+            if b_rec is None:
+                merged[key] = present.copy()          # 只有一边新增
+            elif present == b_rec:
+                continue                               # 一边删除，另一边未改动
+            else:
+                conflicts.append(MergeConflict(key, "entry", "存在", "已删除" if o_rec is None else "已修改",
+                                               "已删除" if t_rec is None else "已修改"))
+                keep = (o_rec if prefer == "ours" else t_rec)
+                if keep is not None:
+                    merged[key] = keep.copy()
+            continue
+
+        b_rec = b_rec or empty
+        values = {}
+        for field in FIELDS:
+            bv, ov, tv = b_rec[field], o_rec[field], t_rec[field]
+            if ov == tv or tv == bv:
+                values[field] = ov
+            elif ov == bv:
+                values[field] = tv
+            else:
+                conflicts.append(MergeConflict(key, field, bv, ov, tv))
+                values[field] = ov if prefer == "ours" else tv
+        merged[key] = ListRecord(values["main"], values["info"], values["kext"])
+    return merged, conflicts
+
+def cmd_validate(args) -> int:
+    """校验列表，存在错误（--strict 时包括警告）时返回1"""
+    files = args.files or [name for name in LIST_FILE_TYPES if os.path.exists(name)]
+    results = validate_all(files, args.fix)
+    diagnostics = [d for path in files for d in results[path]]
+
+    if args.json:
+        print(json.dumps([d._asdict() for d in diagnostics], ensure_ascii=False, indent=2))
+    else:
+        for d in diagnostics:
+            fixed = " (已修复)" if args.fix and d.fixable else ""
+            print(f"{d.file}:{d.line}: {d.level}: [{d.code}] {d.message}{fixed}")
+        errors = sum(d.level == "error" for d in diagnostics)
+        print(f"共 {len(files)} 个文件，{errors} 个错误，{len(diagnostics) - errors} 个警告")
+
+    failing = [d for d in diagnostics if (d.level == "error" or args.strict) and not (args.fix and d.fixable)]
+    return 1 if failing else 0
+
+def cmd_compact(args) -> int:
+    """分析可合并为模糊/通配规则的精确条目，--apply 时写回"""
+    files = args.files or [name for name in LIST_FILE_TYPES
+                           if os.path.exists(name) and LIST_FILE_TYPES[name] != "硬盘支持信息"]
+    known_ids = []
+    if args.known:
+        from pci_ids import PciIdsIndex
+        index = PciIdsIndex.load(args.known)
+        if index is None:
+            print(f"找不到 pci.ids: {args.known}")
+            return 1
+        known_ids = list(index.devices)
+    else:
+        print("未指定 --known，只删除已被现有规则覆盖的条目，不新建模糊/通配规则")
+
+    for path in files:
+        session = EditSession(path, file_type_for(path)).load()
+        proposals = RedundancyAnalyzer(session.entries, known_ids, args.min_group).analyze()
+        for proposal in proposals:
+            target = proposal.rule or "(已被现有规则覆盖)"
+            print(f"{path}: {target} <- {len(proposal.removed)} 条: {', '.join(proposal.removed)}")
+        removed = sum(len(p.removed) for p in proposals)
+        if args.apply and proposals:
+            created, removed = RedundancyAnalyzer.apply(session, proposals)
+            print(f"{path}: 新建 {created} 条规则，删除 {removed} 条精确条目，剩余 {len(session.entries)} 条")
+        else:
+            print(f"{path}: 可删除 {removed} 条精确条目（共 {len(session.entries)} 条）")
+    return 0
+
+def cmd_diff(args) -> int:
+    """按条目比较两个列表"""
+    changes = diff_entries(load_entries(args.old), load_entries(args.new))
+    marks = {"added": "+", "removed": "-", "changed": "~"}
+    for change in changes:
+        detail = "; ".join(f"{field}: {old!r} -> {new!r}" for field, (old, new) in change.fields.items())
+        print(f"{marks[change.kind]} {change.key}  {detail}")
+    print(f"新增 {sum(c.kind == 'added' for c in changes)}，删除 {sum(c.kind == 'removed' for c in changes)}，"
+          f"修改 {sum(c.kind == 'changed' for c in changes)}")
+    return 0
+
+def cmd_merge(args) -> int:
+    """三方合并，存在冲突时返回1"""
+    merged, conflicts = merge3(load_entries(args.base), load_entries(args.ours), load_entries(args.theirs), args.prefer)
+    for c in conflicts:
+        print(f"冲突 {c.key} [{c.field}] base={c.base!r} ours={c.ours!r} theirs={c.theirs!r}")
+    output = args.output or args.ours
+    atomic_write(output, generate_file_content(merged, file_type_for(output)))
+    print(f"已合并 {len(merged)} 条到 {output}，{len(conflicts)} 处冲突（已取{args.prefer}）")
+    return 1 if conflicts else 0
+
+def main(argv=None):
+    """
+    命令行工具：
+        python support_list.py validate [--fix] [--json] [--strict] [列表文件...]   （可用于 pre-commit）
+        python support_list.py compact [--apply] [--known pci.ids] [列表文件...]
+        python support_list.py diff 旧列表 新列表
+        python support_list.py merge 共同祖先 我方 上游 [-o 输出] [--prefer ours|theirs]
+    """
+    parser = argparse.ArgumentParser(description="硬件支持信息列表工具")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    validate = commands.add_parser("validate", help="校验列表")
+    validate.add_argument("files", nargs="*", help="列表文件（默认校验当前目录下全部列表）")
+    validate.add_argument("--fix", action="store_true", help="自动删除可修复的问题行")
+    validate.add_argument("--json", action="store_true", help="以JSON输出诊断")
+    validate.add_argument("--strict", action="store_true", help="警告也视为失败")
+    validate.set_defaults(func=cmd_validate)
+
+    compact = commands.add_parser("compact", help="把精确条目合并为模糊/通配规则")
+    compact.add_argument("files", nargs="*", help="列表文件（默认为显卡/网卡/声卡列表）")
+    compact.add_argument("--apply", action="store_true", help="写回列表文件")
+    compact.add_argument("--known", metavar="PCI_IDS", help="用pci.ids中的设备一并核对，未指定时不新建规则")
+    compact.add_argument("--min-group", type=int, default=RedundancyAnalyzer.MIN_GROUP, help="最少合并条数")
+    compact.set_defaults(func=cmd_compact)
+
+    diff = commands.add_parser("diff", help="按条目比较两个列表")
+    diff.add_argument("old")
+    diff.add_argument("new")
+    diff.set_defaults(func=cmd_diff)
+
+    merge = commands.add_parser("merge", help="三方合并")
+    merge.add_argument("base", help="共同祖先版本")
+    merge.add_argument("ours", help="我方版本")
+    merge.add_argument("theirs", help="上游版本")
+    merge.add_argument("-o", "--output", help="输出文件（默认覆盖我方版本）")
+    merge.add_argument("--prefer", choices=("ours", "theirs"), default="ours", help="冲突时取哪一方")
+    merge.set_defaults(func=cmd_merge)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,10 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Scripts/*.py are imported as top-level modules; the USBToolBox library is the "Scripts" package under Resources/UTB
+sys.path.insert(0, os.path.join(ROOT, "Scripts"))
+sys.path.insert(0, os.path.join(ROOT, "Scripts", "Resources", "UTB"))
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
@@ -0,0 +1,88 @@
+import sys
+import textwrap
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("PySide6")
+
+from PySide6.QtCore import Qt
+
+from gui_acpi_exp import CompileWorker
+
+# Stands in for iasl: the mode comes before the DSL path that CompileWorker appends
+STUB_IASL = textwrap.dedent("""
+    import sys, time
+    mode = sys.argv[1]
+    print("Intel ACPI Component Architecture (stub)", flush=True)
+    if mode == "hang":
+        time.sleep(30)
+    time.sleep(0.5)
+    print("Compiling " + sys.argv[2], flush=True)
+    sys.exit(0 if mode == "ok" else 1)
+""")
+
+
+@pytest.fixture
+def make_worker(tmp_path):
+    stub = tmp_path / "iasl_stub.py"
+    stub.write_text(STUB_IASL)
+    dsl = tmp_path / "SSDT-TEST.dsl"
+    dsl.write_text("DefinitionBlock (\"\", \"SSDT\", 2, \"OCLT\", \"TEST\", 0) {}\n")
+
+    def make(mode, timeout=30):
+        worker = CompileWorker([sys.executable, str(stub), mode], str(dsl), timeout)
+        worker.lines = []
+        worker.log_update.connect(worker.lines.append)
+        return worker
+
+    return make
+
+
+def test_output_is_streamed_while_running(make_worker):
+    worker = make_worker("ok")
+    running_at_banner = []
+    worker.log_update.connect(lambda line: "stub" in line and running_at_banner.append(worker.process.poll() is None))
+    worker.run()
+    assert worker.status == "ok"
+    assert running_at_banner == [True]
+    assert any(line.startswith("Compiling ") for line in worker.lines)
+
+
+def test_nonzero_exit_is_failed(make_worker):
+    worker = make_worker("fail")
+    worker.run()
+    assert worker.status == "failed"
+    assert worker.message == "返回码 1"
+
+
+def test_timeout_terminates_compiler(make_worker):
+    worker = make_worker("hang", timeout=1)
+    start = time.monotonic()
+    worker.run()
+    assert worker.status == "timeout"
+    assert time.monotonic() - start < 10
+    assert worker.process.poll() is not None
+
+
+def test_cancel_terminates_compiler(make_worker):
+    worker = make_worker("hang")
+    started = threading.Event()
+    # run() is driven from a plain thread with no event loop, so the slot has to be called directly
+    worker.log_update.connect(lambda line: "stub" in line and started.set(), Qt.DirectConnection)
+    thread = threading.Thread(target=worker.run)
+    thread.start()
+    assert started.wait(10)
+    worker.stop()
+    thread.join(10)
+    assert not thread.is_alive()
+    assert worker.status == "canceled"
+
+
+def test_first_result_wins(make_worker):
+    worker = make_worker("ok")
+    worker.run()
+    worker.stop()
+    worker._on_timeout()
+    assert worker.status == "ok"
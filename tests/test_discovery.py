@@ -0,0 +1,79 @@
+import os
+import threading
+
+import pytest
+
+from Scripts import discovery, usbdump
+
+DUMP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "usbdump_small.json")
+
+
+@pytest.fixture(scope="module")
+def snapshot():
+    return usbdump.parse_dump_file(DUMP)
+
+
+def free_ports(snapshot):
+    return [
+        (controller["hub_name"], port.index)
+        for controller in snapshot.controllers
+        for port in controller["ports"]
+        if port.status == "NoDeviceConnected"
+    ]
+
+
+def test_plug_session_records_every_port(snapshot):
+    session = discovery.DiscoverySession()
+    reported = []
+    history = session.run(discovery.simulate_plug_session(snapshot, "Test Stick"), reported.append)
+
+    initial = {
+        (hub["hub_name"], port.index)
+        for hub in snapshot.hubs.values()
+        for port in hub["ports"]
+        if port.status == "DeviceConnected"
+    }
+    assert history == initial | set(free_ports(snapshot))
+    assert all(session.seen[key] == {"Test Stick"} for key in free_ports(snapshot))
+
+    # The first snapshot reports every port once, then each free port is plugged and unplugged again
+    first, *plugs = reported
+    assert all(change.before is None for change in first)
+    assert len(first) == sum(len(hub["ports"]) for hub in snapshot.hubs.values())
+    assert len(plugs) == 2 * len(free_ports(snapshot))
+    for plugged, unplugged in zip(plugs[::2], plugs[1::2]):
+        (plug,), (unplug,) = plugged, unplugged
+        assert plug.key == unplug.key
+        assert not plug.before.active and plug.after == discovery.PortState("DeviceConnected", ("Test Stick",))
+        assert unplug.before == plug.after and unplug.after == plug.before
+    # Every port ends where it started
+    assert session.states == discovery.get_port_states(snapshot)
+
+
+def test_plug_session_limited_to_ports(snapshot):
+    wanted = set(free_ports(snapshot)[:2])
+    session = discovery.DiscoverySession()
+    reported = []
+    session.run(discovery.simulate_plug_session(snapshot, ports=wanted), reported.append)
+    assert {change.key for changes in reported[1:] for change in changes} == wanted
+
+
+def test_stop_event_ends_session(snapshot):
+    stop = threading.Event()
+    session = discovery.DiscoverySession()
+    reported = []
+
+    def callback(changes):
+        reported.append(changes)
+        if len(reported) == 2:
+            stop.set()
+
+    session.run(discovery.simulate_plug_session(snapshot), callback, stop)
+    assert len(reported) == 2
+    assert len(session.history - {key for key, state in discovery.get_port_states(snapshot).items() if state.active}) == 1
+
+
+def test_snapshot_update_reports_only_changed_ports(snapshot):
+    session = discovery.DiscoverySession()
+    session.update(snapshot)
+    assert session.update(snapshot) == []
@@ -0,0 +1,46 @@
+import os
+import re
+
+import pytest
+
+pytest.importorskip("PySide6")
+
+from gui_acpi_exp import SSDTBuilder
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Scripts")
+
+
+@pytest.fixture(autouse=True)
+def scripts_dir(monkeypatch):
+    # resource_path looks up Resources/dsl relative to the working directory, like a run from Scripts/
+    monkeypatch.chdir(SCRIPTS)
+
+
+def referenced_paths(content):
+    return set(re.findall(r"\\_([A-Z0-9_.]+)\.(?:_ON|_OFF|_PS0|_PS3|_DSM)\b", content))
+
+
+def test_rename_keeps_target_path():
+    # The second target ends in DGPU, the name every template gives its own device
+    targets = [("SB.PCI0.GFX0", "off"), ("SB.PCI0.RP01.DGPU", "off")]
+    content, collisions = SSDTBuilder.merge_disable_dsl(targets)
+
+    assert collisions == []
+    assert "Device(DGPU)" in content
+    assert "Device(DG01)" in content
+    assert "RP01.DG01" not in content
+    assert "\\_SB.PCI0.RP01.DGPU._OFF()" in content
+    assert referenced_paths(content) == {"SB.PCI0.GFX0", "SB.PCI0.RP01.DGPU"}
+    for path in referenced_paths(content):
+        assert f"External(_{path}._ON, MethodObj)" in content
+        assert f"External(_{path}._OFF, MethodObj)" in content
+
+
+def test_rename_across_templates():
+    targets = [("SB.PCI0.PEG0.PEGP", "off"), ("SB.PCI0.PEG1.DGPU", "s3"), ("SB.PCI0.PEG0.PEGP", "off")]
+    content, collisions = SSDTBuilder.merge_disable_dsl(targets)
+
+    assert collisions == []
+    assert content.count("Device(") == 2
+    assert "Device(DG01)" in content
+    assert referenced_paths(content) == {"SB.PCI0.PEG0.PEGP", "SB.PCI0.PEG1.DGPU"}
@@ -0,0 +1,121 @@
+import json
+import os
+
+import pytest
+
+from pci_ids import PciIdsIndex, fill_missing_info
+
+PCI_IDS = """\
+# Inline excerpt in the pci.ids format
+10de  NVIDIA Corporation
+\t1c82  GP107 [GeForce GTX 1050 Ti]
+\t\t1043 8613  Phoenix GeForce GTX 1050 Ti
+1002  Advanced Micro Devices, Inc. [AMD/ATI]
+\t67df  Ellesmere [Radeon RX 470/480/570/570X/580/580X/590]
+8086  Intel Corporation
+\t3e92  CoffeeLake-S GT2 [UHD Graphics 630]
+C 03  Display controller
+\t00  VGA compatible controller
+"""
+
+LIST = "10DE&1C82=1\n10DE&1CFF=0\n8086&FFFF=1\n1002&67DF=1\n1002&67DF.info=RX 580\n1234&5678=1\n"
+
+
+@pytest.fixture
+def pci_ids(tmp_path):
+    path = tmp_path / "pci.ids"
+    path.write_text(PCI_IDS, encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def index(pci_ids):
+    return PciIdsIndex.load(pci_ids)
+
+
+def test_describe(index):
+    assert index.describe("10de&1c82") == "NVIDIA Corporation GP107 [GeForce GTX 1050 Ti]"
+    # A fuzzy XXFF ID is not a real device
+    assert index.describe("10DE&1CFF") is None
+    assert index.describe("8086&FFFF") == "Intel Corporation"
+    assert index.describe("10DE&0000") is None
+    assert index.describe("1234&5678") is None
+    assert index.describe("10DE") is None
+    # Class sections are not vendors
+    assert "C 03" not in index.vendors and len(index.devices) == 3
+
+
+def test_cache_follows_pci_ids(pci_ids):
+    cache_path = pci_ids + PciIdsIndex.CACHE_SUFFIX
+    PciIdsIndex.load(pci_ids)
+    with open(cache_path, encoding="utf-8") as f:
+        cached = json.load(f)
+    assert cached["devices"]["8086&3E92"] == "CoffeeLake-S GT2 [UHD Graphics 630]"
+
+    # An unchanged pci.ids is answered from the cache alone
+    cached["devices"]["8086&3E92"] = "from cache"
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump(cached, f)
+    assert PciIdsIndex.load(pci_ids).device_name("8086&3E92") == "from cache"
+
+    with open(pci_ids, "a", encoding="utf-8") as f:
+        f.write("8086  Intel Corporation\n\t9bc8  CometLake-S GT2 [UHD Graphics 630]\n")
+    index = PciIdsIndex.load(pci_ids)
+    assert index.device_name("8086&9BC8") == "CometLake-S GT2 [UHD Graphics 630]"
+    assert index.device_name("8086&3E92") == "CoffeeLake-S GT2 [UHD Graphics 630]"
+
+    with open(cache_path, "w", encoding="utf-8") as f:
+        f.write("{")
+    assert PciIdsIndex.load(pci_ids).device_name("10DE&1C82") == "GP107 [GeForce GTX 1050 Ti]"
+
+
+def test_load_without_cache(pci_ids, tmp_path):
+    assert PciIdsIndex.load(pci_ids, use_cache=False).describe("8086&FFFF") == "Intel Corporation"
+    assert not os.path.exists(pci_ids + PciIdsIndex.CACHE_SUFFIX)
+    assert PciIdsIndex.load(str(tmp_path / "missing.ids")) is None
+
+
+def test_fill_missing_info(index, tmp_path):
+    list_file = tmp_path / "GPUSupportInfo.list"
+    list_file.write_text(LIST, encoding="utf-8")
+
+    assert fill_missing_info(index, [str(list_file)], dry_run=True) == {str(list_file): 2}
+    assert list_file.read_text(encoding="utf-8") == LIST
+    assert not os.path.exists(str(list_file) + ".journal")
+
+    assert fill_missing_info(index, [str(list_file)]) == {str(list_file): 2}
+    assert list_file.read_text(encoding="utf-8").splitlines() == [
+        "10DE&1C82=1",
+        "10DE&1C82.info=NVIDIA Corporation GP107 [GeForce GTX 1050 Ti]",
+        "10DE&1CFF=0",
+        "8086&FFFF=1",
+        "8086&FFFF.info=Intel Corporation",
+        "1002&67DF=1",
+        "1002&67DF.info=RX 580",
+        "1234&5678=1",
+    ]
+    assert fill_missing_info(index, [str(list_file)], dry_run=True) == {str(list_file): 0}
+
+
+def test_support_info_fallback_order(index):
+    # get_hw_info reads WMI at import time and only runs on Windows
+    pytest.importorskip("wmi")
+    from get_hw_info import get_support_info
+
+    support = {"10DE&1C82": "1", "10DE&1CFF": "0", "10DE&1DFF": "0", "8086&FFFF": "1"}
+    details = {"10DE&1C82": "GTX 1050 Ti"}
+    kexts = {"8086&FFFF": "WhateverGreen"}
+
+    assert get_support_info("10DE&1C82", support, details, kexts, index) == ("1", "10DE&1C82", "GTX 1050 Ti", "无")
+    assert get_support_info("10DE&1D81", support, details, kexts, index) == ("0", "10DE&1D81", "未知(模糊匹配)", "无")
+    # Listed through the vendor rule: keeps the list's answer even though pci.ids knows the name
+    assert get_support_info("8086&3E92", support, details, kexts, index) == \
+        ("1", "8086&3E92", "未知(厂商通用支持)", "WhateverGreen")
+    assert get_support_info("1002&67DF", support, details, kexts, index) == \
+        (None, "1002&67DF", "未收录: Advanced Micro Devices, Inc. [AMD/ATI] Ellesmere [Radeon RX 470/480/570/570X/580/580X/590]", "无")
+    # Listed without a .info line: still listed, so no "未收录" name from pci.ids
+    assert get_support_info("1002&67DF", dict(support, **{"1002&67DF": "0"}), details, kexts, index) == \
+        ("0", "1002&67DF", "未知", "无")
+    assert get_support_info("1234&5678", support, details, kexts, index) == (None, "1234&5678", "未知", "无")
+    assert get_support_info("1002&67DF", support, details, kexts) == (None, "1002&67DF", "未知", "无")
+    assert get_support_info("", support, details, kexts, index) == (None, "N/A", "未知", "无")
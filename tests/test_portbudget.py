@@ -0,0 +1,75 @@
+import itertools
+import os
+
+import pytest
+
+from Scripts import portbudget, usbdump
+
+DUMP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "usbdump_small.json")
+
+
+@pytest.fixture(scope="module")
+def controllers():
+    return usbdump.parse_dump_file(DUMP).controllers
+
+
+def indexes(ports):
+    return [port.index for port in ports]
+
+
+def test_companions_form_one_unit(controllers):
+    first, second = controllers
+    assert [indexes(unit.ports) for unit in portbudget.get_port_units(first)] == [[1, 5], [2, 6], [3, 7], [4, 8], [9]]
+    # Port 8 names port 4 as its companion even though port 4 doesn't name it back
+    assert [indexes(unit.ports) for unit in portbudget.get_port_units(second)] == [[1, 5], [2, 6], [3, 7], [4, 8], [9]]
+
+
+@pytest.mark.parametrize(
+    "search, limit, history, kept",
+    [
+        # The internal port with a device, then the lone internal port
+        ("exact", 3, frozenset(), [3, 7, 9]),
+        ("greedy", 3, frozenset(), [3, 7, 9]),
+        # Two used pairs tie; the earlier one wins
+        ("exact", 4, frozenset(), [1, 3, 5, 7]),
+        # Greedy takes the lone port with the best value per port and leaves a slot unused
+        ("greedy", 4, frozenset(), [3, 7, 9]),
+        # A device seen during discovery counts like one connected now
+        ("exact", 4, frozenset({("USB#ROOT_HUB30#0", 6)}), [2, 3, 6, 7]),
+        ("exact", 15, frozenset(), [1, 2, 3, 4, 5, 6, 7, 8, 9]),
+    ],
+)
+def test_select_ports(controllers, search, limit, history, kept):
+    policy = portbudget.DEFAULT_POLICY._replace(limit=limit, search=search)
+    assert indexes(portbudget.select_ports(controllers[0], history, policy)) == kept
+
+
+def best_value(units, limit):
+    best = 0
+    for count in range(len(units) + 1):
+        for chosen in itertools.combinations(units, count):
+            if sum(unit.cost for unit in chosen) <= limit:
+                best = max(best, sum(unit.value for unit in chosen))
+    return best
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_exact_is_optimal_and_within_limit(seed):
+    controller = portbudget.make_synthetic_controller(14, seed)
+    units = sorted(portbudget.get_port_units(controller), key=lambda i: i.index)
+    for limit in (1, 4, 7):
+        exact = portbudget.select_exact(units, limit)
+        greedy = portbudget.select_greedy(units, limit)
+        assert sum(unit.cost for unit in exact) <= limit
+        assert sum(unit.cost for unit in greedy) <= limit
+        assert sum(unit.value for unit in exact) == best_value(units, limit)
+        assert sum(unit.value for unit in greedy) <= sum(unit.value for unit in exact)
+
+
+def test_selection_never_splits_a_unit():
+    controller = portbudget.make_synthetic_controller(40, seed=3)
+    units = {port.index: unit for unit in portbudget.get_port_units(controller) for port in unit.ports}
+    kept = set(indexes(portbudget.select_ports(controller)))
+    assert len(kept) <= portbudget.DEFAULT_POLICY.limit
+    for index in kept:
+        assert set(indexes(units[index].ports)) <= kept
@@ -0,0 +1,231 @@
+import os
+import stat
+import subprocess
+import sys
+
+import pytest
+
+import support_list
+from support_list import EditJournal, EditSession, FileLock, ListRecord, Transaction, merge3
+
+FILE_TYPE = "GPU支持信息"
+BASE = "10DE&1C82=1\n10DE&1C82.info=GTX 1050 Ti\n1002&67DF=1\n1002&67DF.kext=WhateverGreen\n"
+
+
+@pytest.fixture
+def list_file(tmp_path):
+    path = tmp_path / "GPUSupportInfo.list"
+    path.write_text(BASE, encoding="utf-8")
+    return str(path)
+
+
+def session(path):
+    return EditSession(path, FILE_TYPE).load()
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_journal_reload_and_compact_across_sessions(list_file):
+    first = session(list_file)
+    first.set("10DE&1C82", main="0")
+    first.delete("1002&67DF")
+    assert first.flush()
+    # Saving only appends to the journal; the list itself is untouched until compaction
+    assert read(list_file) == BASE
+    assert len(EditJournal(list_file).read()) == 2
+
+    second = session(list_file)
+    assert second.journaled == 2
+    assert second.row("10DE&1C82") == ["10DE&1C82", "0", "GTX 1050 Ti", ""]
+    assert "1002&67DF" not in second.entries
+    second.set("8086&3E92", main="1", info="UHD 630")
+    second.flush()
+
+    # Compaction replays the whole journal, including what the other session appended
+    assert first.compact()
+    assert read(list_file) == "10DE&1C82=0\n10DE&1C82.info=GTX 1050 Ti\n8086&3E92=1\n8086&3E92.info=UHD 630"
+    assert not os.path.exists(list_file + EditJournal.SUFFIX)
+    assert not first.dirty
+
+    second.load()
+    assert not second.dirty
+    assert second.entries == first.entries
+    assert not second.compact()
+
+
+def test_unflushed_edits_stay_in_memory(list_file):
+    first = session(list_file)
+    first.set("10DE&1C82", main="0")
+    assert first.dirty
+    assert session(list_file).row("10DE&1C82")[1] == "1"
+    first.load()
+    assert first.row("10DE&1C82")[1] == "1"
+    assert not first.dirty
+
+
+def test_torn_journal_line_is_ignored(list_file):
+    first = session(list_file)
+    first.set("10DE&1C82", main="0")
+    first.flush()
+    with open(list_file + EditJournal.SUFFIX, "a", encoding="utf-8") as f:
+        f.write('{"op": "delete", "key": "10DE&1')
+
+    second = session(list_file)
+    assert second.journaled == 1
+    assert second.row("10DE&1C82")[1] == "0"
+    second.compact()
+    assert read(list_file).startswith("10DE&1C82=0\n")
+
+
+def test_transaction_rolls_back_on_error(list_file):
+    edit = session(list_file)
+    with pytest.raises(RuntimeError):
+        with Transaction(edit) as transaction:
+            transaction.set("10DE&1C82", main="0", kext="NVDAStartup")
+            transaction.delete("1002&67DF")
+            transaction.set("8086&3E92", main="1")
+            raise RuntimeError("import failed")
+
+    assert edit.entries == support_list.ListFileValidator.parse_file(BASE, FILE_TYPE)
+    assert not edit.dirty
+    assert edit.match("nvda") == []
+    assert read(list_file) == BASE
+    assert not os.path.exists(list_file + EditJournal.SUFFIX)
+
+    with Transaction(edit) as transaction:
+        transaction.delete("1002&67DF")
+    assert read(list_file) == "10DE&1C82=1\n10DE&1C82.info=GTX 1050 Ti"
+
+
+def test_compact_keeps_file_mode(list_file, tmp_path):
+    os.chmod(list_file, 0o640)
+    edit = session(list_file)
+    edit.set("10DE&1C82", main="0")
+    assert edit.compact()
+    assert stat.S_IMODE(os.stat(list_file).st_mode) == 0o640
+    # No temporary file is left next to the list
+    assert sorted(os.listdir(tmp_path)) == ["GPUSupportInfo.list", "GPUSupportInfo.list.lock"]
+
+    new_file = str(tmp_path / "new.list")
+    support_list.atomic_write(new_file, "1234&5678=1")
+    umask = os.umask(0)
+    os.umask(umask)
+    assert stat.S_IMODE(os.stat(new_file).st_mode) == 0o666 & ~umask
+
+
+HOLD_LOCK = """
+import sys, time
+sys.path.insert(0, sys.argv[1])
+from support_list import FileLock
+with FileLock(sys.argv[2]):
+    print("locked", flush=True)
+    time.sleep(60)
+"""
+
+
+@pytest.mark.skipif(os.name == "nt", reason="kills the lock holder with a POSIX signal")
+def test_compact_after_lock_holder_crash(list_file):
+    edit = session(list_file)
+    edit.set("10DE&1C82", main="0")
+    edit.flush()
+
+    scripts = os.path.dirname(support_list.__file__)
+    holder = subprocess.Popen([sys.executable, "-c", HOLD_LOCK, scripts, edit.journal.lock_path], stdout=subprocess.PIPE, text=True)
+    try:
+        assert holder.stdout.readline().strip() == "locked"
+        with pytest.raises(TimeoutError):
+            with FileLock(edit.journal.lock_path, timeout=0.2):
+                pass
+    finally:
+        holder.kill()
+        holder.wait()
+        holder.stdout.close()
+
+    # The OS drops the lock with the dead process, so nothing has to be cleaned up by hand
+    assert os.path.exists(edit.journal.lock_path)
+    assert edit.compact()
+    assert read(list_file).startswith("10DE&1C82=0\n")
+
+
+def test_replay_merges_journals_in_time_order(list_file, tmp_path):
+    other = tmp_path / "other" / "GPUSupportInfo.list"
+    other.parent.mkdir()
+    other.write_text(BASE, encoding="utf-8")
+    late = EditJournal(str(other))
+    early = EditJournal(str(tmp_path / "early.list"))
+    early.append([("set", "10DE&1C82", {"main": "0", "info": "old"})])
+    late.append([("set", "10DE&1C82", {"info": "new"}), ("delete", "1002&67DF", None)])
+
+    edit = session(list_file)
+    assert edit.replay([late.path, early.path]) == 3
+    assert edit.row("10DE&1C82") == ["10DE&1C82", "0", "new", ""]
+    assert "1002&67DF" not in edit.entries
+    assert edit.dirty
+
+
+def records(entries):
+    return {key: ListRecord(*fields) for key, fields in entries.items()}
+
+
+def fields(merged):
+    return {key: (record.main, record.info, record.kext) for key, record in merged.items()}
+
+
+GTX = ("1", "GTX 1050 Ti", "")
+RX = ("1", "RX 580", "WhateverGreen")
+
+# (base, ours, theirs, merged with prefer="ours", merged with prefer="theirs", conflicts as (key, field))
+MERGE_CASES = {
+    "unchanged": ({"A": GTX}, {"A": GTX}, {"A": GTX}, {"A": GTX}, {"A": GTX}, []),
+    "ours modified": ({"A": GTX}, {"A": ("0", "GTX 1050 Ti", "")}, {"A": GTX},
+                      {"A": ("0", "GTX 1050 Ti", "")}, {"A": ("0", "GTX 1050 Ti", "")}, []),
+    "theirs modified": ({"A": GTX}, {"A": GTX}, {"A": ("1", "GTX 1050", "")},
+                        {"A": ("1", "GTX 1050", "")}, {"A": ("1", "GTX 1050", "")}, []),
+    "same change": ({"A": GTX}, {"A": ("0", "GTX 1050 Ti", "")}, {"A": ("0", "GTX 1050 Ti", "")},
+                    {"A": ("0", "GTX 1050 Ti", "")}, {"A": ("0", "GTX 1050 Ti", "")}, []),
+    "different fields": ({"A": GTX}, {"A": ("0", "GTX 1050 Ti", "")}, {"A": ("1", "GTX 1050 Ti", "NVDAStartup")},
+                         {"A": ("0", "GTX 1050 Ti", "NVDAStartup")}, {"A": ("0", "GTX 1050 Ti", "NVDAStartup")}, []),
+    "modify/modify": ({"A": GTX}, {"A": ("1", "GTX 1050 Ti 4GB", "")}, {"A": ("1", "GTX 1050 Ti (GP107)", "")},
+                      {"A": ("1", "GTX 1050 Ti 4GB", "")}, {"A": ("1", "GTX 1050 Ti (GP107)", "")}, [("A", "info")]),
+    "ours deleted": ({"A": GTX, "B": RX}, {"B": RX}, {"A": GTX, "B": RX}, {"B": RX}, {"B": RX}, []),
+    "theirs deleted": ({"A": GTX, "B": RX}, {"A": GTX, "B": RX}, {"A": GTX}, {"A": GTX}, {"A": GTX}, []),
+    "both deleted": ({"A": GTX, "B": RX}, {"B": RX}, {"B": RX}, {"B": RX}, {"B": RX}, []),
+    "delete/modify": ({"A": GTX}, {}, {"A": ("0", "GTX 1050 Ti", "")},
+                      {}, {"A": ("0", "GTX 1050 Ti", "")}, [("A", "entry")]),
+    "modify/delete": ({"A": GTX}, {"A": ("0", "GTX 1050 Ti", "")}, {},
+                      {"A": ("0", "GTX 1050 Ti", "")}, {}, [("A", "entry")]),
+    "added by ours": ({}, {"A": GTX}, {}, {"A": GTX}, {"A": GTX}, []),
+    "added by theirs": ({}, {}, {"B": RX}, {"B": RX}, {"B": RX}, []),
+    "same add": ({}, {"A": GTX}, {"A": GTX}, {"A": GTX}, {"A": GTX}, []),
+    "different adds": ({}, {"A": ("1", "GTX 1050 Ti", "")}, {"A": ("0", "GTX 1050 Ti", "NVDAStartup")},
+                       {"A": ("1", "GTX 1050 Ti", "NVDAStartup")}, {"A": ("0", "GTX 1050 Ti", "NVDAStartup")},
+                       [("A", "main")]),
+}
+
+
+@pytest.mark.parametrize("name", list(MERGE_CASES))
+@pytest.mark.parametrize("prefer", ["ours", "theirs"])
+def test_merge3(name, prefer):
+    base, ours, theirs, merged_ours, merged_theirs, expected_conflicts = MERGE_CASES[name]
+    merged, conflicts = merge3(records(base), records(ours), records(theirs), prefer)
+    assert fields(merged) == (merged_ours if prefer == "ours" else merged_theirs)
+    assert [(c.key, c.field) for c in conflicts] == expected_conflicts
+
+
+def test_merge3_reports_all_three_values():
+    _, conflicts = merge3(records({"A": GTX}), records({"A": ("1", "4GB", "")}), records({"A": ("1", "GP107", "")}))
+    assert conflicts == [support_list.MergeConflict("A", "info", "GTX 1050 Ti", "4GB", "GP107")]
+
+
+def test_merge3_order_and_key_case():
+    base = records({"10DE&1C82": GTX, "1002&67DF": RX})
+    ours = records({"8086&3E92": ("1", "UHD 630", ""), "1002&67df": RX, "10DE&1C82": GTX})
+    theirs = records({"10de&1c82": ("0", "GTX 1050 Ti", ""), "1002&67DF": RX, "8086&9BC8": ("1", "UHD 630", "")})
+    merged, conflicts = merge3(base, ours, theirs)
+    # Keys match regardless of case and keep our spelling; our order comes first, then what only theirs added
+    assert list(merged) == ["8086&3E92", "1002&67df", "10DE&1C82", "8086&9BC8"]
+    assert merged["10DE&1C82"].main == "0"
+    assert conflicts == []
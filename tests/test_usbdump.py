@@ -0,0 +1,63 @@
+import json
+import os
+
+import pytest
+
+from Scripts import usbdump
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+# Raw usbdump.exe output of two xHCI controllers, with an external hub, a Type-C and an internal port, an
+# overcurrent port and a USB 2 port whose USB 3 companion sits on the other controller
+DUMP = os.path.join(FIXTURES, "usbdump_small.json")
+# Guessed type and companion of every root hub port, as produced by the code before the port index was added
+EXPECTED = os.path.join(FIXTURES, "usbdump_small_ports.json")
+
+
+@pytest.fixture(scope="module")
+def expected():
+    with open(EXPECTED, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module")
+def topology():
+    topology = usbdump.UsbTopology()
+    with open(DUMP, "rb") as f:
+        topology.parse(usbdump.iter_usbdump(f))
+    return topology
+
+
+def test_guessed_types_match_baseline(expected):
+    snapshot = usbdump.parse_dump_file(DUMP)
+    ports = {(hub["hub_name"], port.index): port for hub in snapshot.controllers for port in hub["ports"]}
+    assert sorted(ports) == sorted((item["hub"], item["index"]) for item in expected)
+    for item in expected:
+        port = ports[(item["hub"], item["index"])]
+        assert port.status == item["status"], item
+        assert port.guessed == item["guessed"], item
+
+
+def test_companions_resolve_through_port_index(topology, expected):
+    for item in expected:
+        port = topology.ports[(item["hub"], item["index"])]
+        companion = topology.get_companion_port(port)
+        if item["companion"] is None:
+            assert companion is None, item
+        else:
+            assert (port.companion_hub, port.companion_port) == tuple(item["companion"])
+            assert companion is topology.ports[tuple(item["companion"])]
+
+
+def test_external_hubs_are_indexed(topology):
+    external = [name for name in topology.hubs if not name.startswith("USB#ROOT_HUB")]
+    assert external
+    for name in external:
+        for port in topology.get_hub_by_name(name)["ports"]:
+            assert topology.ports[(name, port.index)] is port
+
+
+def test_streamed_and_buffered_parse_agree():
+    with open(DUMP, "rb") as f:
+        streamed = usbdump.UsbTopology().parse(usbdump.iter_usbdump(f, chunk_size=512))
+    buffered = usbdump.parse_dump_file(DUMP)
+    assert usbdump.thaw(streamed.controllers) == usbdump.thaw(buffered.controllers)
@@ -0,0 +1,111 @@
+import json
+import os
+import plistlib
+import shutil
+import stat
+from pathlib import Path
+
+import pytest
+
+from Scripts import usbdump, usbmap
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+DUMP = os.path.join(FIXTURES, "usbdump_small.json")
+EXPECTED = os.path.join(FIXTURES, "usbdump_small_ports.json")
+
+
+@pytest.fixture(scope="module")
+def controllers():
+    return usbdump.parse_dump_file(DUMP).controllers
+
+
+def plist_path(kext_path):
+    return kext_path / "Contents" / "Info.plist"
+
+
+def test_same_topology_gives_identical_plist(controllers, tmp_path):
+    first = usbmap.write_map(usbmap.build_map(controllers), tmp_path / "a")
+    second = usbmap.write_map(usbmap.build_map(usbdump.parse_dump_file(DUMP).controllers), tmp_path / "b")
+    assert first == tmp_path / "a" / "UTBMap.kext"
+    assert plist_path(first).read_bytes() == plist_path(second).read_bytes()
+
+
+def test_ports_and_connectors(controllers, tmp_path):
+    with open(EXPECTED, encoding="utf-8") as f:
+        expected = json.load(f)
+    kext_path = usbmap.write_map(usbmap.build_map(controllers), tmp_path)
+    with plist_path(kext_path).open("rb") as f:
+        personalities = plistlib.load(f)["IOKitPersonalities"]
+
+    assert sorted(personalities) == sorted(controller["name"] for controller in controllers)
+    for controller in controllers:
+        personality = personalities[controller["name"]]
+        assert personality["IOPropertyMatch"] == {"pcidebug": ":".join(str(i) for i in controller["identifiers"]["bdf"])}
+        properties = personality["IOProviderMergeProperties"]
+        # Overcurrent ports have no guessed type and stay out of the map
+        mappable = [item for item in expected if item["hub"] == controller["hub_name"] and item["guessed"] is not None]
+        assert sorted(properties["ports"]) == sorted(f"Port {item['index']}" for item in mappable)
+        for item in mappable:
+            port = properties["ports"][f"Port {item['index']}"]
+            assert port["port"] == item["index"].to_bytes(4, "little")
+            assert port["UsbConnector"] == item["guessed"]
+        assert properties["port-count"] == max(item["index"] for item in mappable).to_bytes(4, "little")
+
+
+def test_duplicate_controllers_get_unique_names(controllers):
+    first = controllers[0]
+    twin = dict(first, identifiers=dict(first["identifiers"], bdf=(0, 20, 3)))
+    personalities = usbmap.build_map([first, twin])["IOKitPersonalities"]
+    assert sorted(personalities) == [first["name"], f"{first['name']} 0:20:3"]
+    assert personalities[f"{first['name']} 0:20:3"]["IOPropertyMatch"] == {"pcidebug": "0:20:3"}
+
+
+def test_write_replaces_atomically_and_keeps_mode(controllers, tmp_path):
+    kext_path = usbmap.write_map(usbmap.build_map(controllers, model="MacBookPro16,1"), tmp_path)
+    path = plist_path(kext_path)
+    umask = os.umask(0)
+    os.umask(umask)
+    assert stat.S_IMODE(path.stat().st_mode) == 0o666 & ~umask
+
+    os.chmod(path, 0o640)
+    usbmap.write_map(usbmap.build_map(controllers), tmp_path)
+    assert stat.S_IMODE(path.stat().st_mode) == 0o640
+    assert os.listdir(path.parent) == ["Info.plist"]
+    with path.open("rb") as f:
+        assert "model" not in next(iter(plistlib.load(f)["IOKitPersonalities"].values()))
+
+
+def test_failed_write_keeps_previous_map(controllers, tmp_path, monkeypatch):
+    path = plist_path(usbmap.write_map(usbmap.build_map(controllers), tmp_path))
+    previous = path.read_bytes()
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(usbmap.plistlib, "dump", fail)
+    with pytest.raises(OSError):
+        usbmap.write_map(usbmap.build_map(controllers, model="MacBookPro16,1"), tmp_path)
+    assert path.read_bytes() == previous
+    assert os.listdir(path.parent) == ["Info.plist"]
+
+
+def test_map_dumps(controllers, tmp_path):
+    dumps = []
+    for name in ("desk", "laptop"):
+        dumps.append(Path(shutil.copy(DUMP, tmp_path / f"{name}.json")))
+    broken = tmp_path / "broken.json"
+    broken.write_text("[")
+
+    results = list(usbmap.map_dumps(dumps + [broken], tmp_path / "maps", max_workers=2))
+    assert [result["dump"] for result in results] == [str(i) for i in dumps + [broken]]
+    assert "error" in results[2]
+    expected = plist_path(usbmap.write_map(usbmap.build_map(controllers), tmp_path / "single")).read_bytes()
+    for result in results[:2]:
+        assert result["controllers"] == 2
+        assert result["ports"] == 18
+        assert result["dropped"] == 0
+        assert Path(result["kext"]).parent.parent == tmp_path / "maps"
+        assert plist_path(Path(result["kext"])).read_bytes() == expected
+
+    with pytest.raises(ValueError):
+        list(usbmap.map_dumps([dumps[0], tmp_path / "other" / "desk.json"], tmp_path / "maps"))